@@ -0,0 +1,225 @@
+"""Admission control and backpressure for live transcription.
+
+Each meeting may have `meeting_in_flight` speech segments at the model and
+`meeting_queue` more waiting; the whole process at most `max_in_flight` at
+the model. Free model slots go round-robin to meetings with waiting work,
+so one meeting with a long backlog cannot starve the others. When a
+meeting's queue is full, the overload policy is applied to that meeting
+only:
+
+- merge: the new speech is appended to the meeting's newest queued segment,
+  up to `merge_max_seconds`; audio the two share where the buffered windows
+  overlap is kept once. This means fewer, longer model calls and no lost
+  audio. Past that length the oldest segment is dropped.
+- drop_oldest: the oldest queued segment is dropped.
+- reject: queued segments are dropped as with drop_oldest, and new meetings
+  are refused while every model slot is busy and a full round of work is
+  already waiting.
+
+`max_meetings` caps concurrent meetings under every policy, and a meeting id
+can only be admitted once at a time. A meeting whose
+queue fills up gets a `slow_down` flow-control message, and a `resume`
+message once its queue has drained to half.
+"""
+import asyncio
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Optional
+
+from app.vad import SpeechSegment
+
+OVERLOAD_POLICIES = ("merge", "drop_oldest", "reject")
+
+# Close code for refused meetings: "Try Again Later" (RFC 6455)
+CLOSE_TRY_AGAIN_LATER = 1013
+
+
+class QueuedJob:
+    """Speech waiting for a model slot; `granted` resolves to False if it is dropped"""
+
+    def __init__(self, tag: Dict, segment: SpeechSegment):
+        self.tag = tag
+        self.segment = segment
+        self.granted = asyncio.get_running_loop().create_future()
+
+    @property
+    def seconds(self) -> float:
+        return len(self.segment.pcm) / (2 * self.segment.channels * self.segment.sample_rate)
+
+
+class MeetingBudget:
+    def __init__(self, notify: Optional[Callable[[Dict], None]] = None):
+        self.notify = notify
+        self.waiting = deque()
+        self.running = 0
+        self.throttled = False
+        self.merged = 0
+        self.dropped = 0
+
+    def to_dict(self) -> Dict:
+        return {"queued": len(self.waiting), "running": self.running, "throttled": self.throttled,
+                "merged": self.merged, "dropped": self.dropped}
+
+
+class AdmissionController:
+    def __init__(self, max_meetings: int = 0, max_in_flight: int = 8, meeting_in_flight: int = 2,
+                 meeting_queue: int = 4, policy: str = "merge", merge_max_seconds: float = 30.0,
+                 min_chunk_ms: int = 1000):
+        if policy not in OVERLOAD_POLICIES:
+            raise ValueError(f"Unknown overload policy {policy!r}; expected one of {', '.join(OVERLOAD_POLICIES)}")
+        self.max_meetings = max_meetings
+        self.max_in_flight = max_in_flight
+        self.meeting_in_flight = meeting_in_flight
+        self.meeting_queue = meeting_queue
+        self.policy = policy
+        self.merge_max_seconds = merge_max_seconds
+        self.min_chunk_ms = min_chunk_ms
+        self._meetings = OrderedDict()  # meeting_id -> MeetingBudget, in round-robin order
+        self.running = 0
+        self.merged = 0
+        self.dropped = 0
+        self.rejected = 0
+
+    @property
+    def queued(self) -> int:
+        return sum(len(budget.waiting) for budget in self._meetings.values())
+
+    @property
+    def saturated(self) -> bool:
+        return self.running >= self.max_in_flight and self.queued >= self.max_in_flight
+
+    def admit(self, meeting_id: str) -> Optional[str]:
+        """Register a new meeting; returns why it was refused, or None if admitted"""
+        if meeting_id in self._meetings:
+            # A second connection would share the budget, and the first release() would drop its work
+            self.rejected += 1
+            return "Meeting is already connected"
+        if self.max_meetings and len(self._meetings) >= self.max_meetings:
+            self.rejected += 1
+            return f"Server is at its limit of {self.max_meetings} meetings"
+        if self.policy == "reject" and self.saturated:
+            self.rejected += 1
+            return "Server is overloaded"
+        self._meetings[meeting_id] = MeetingBudget()
+        return None
+
+    def attach(self, meeting_id: str, notify: Optional[Callable[[Dict], None]] = None):
+        """Set where a meeting's flow-control messages go (registers it if needed)"""
+        budget = self._meetings.setdefault(meeting_id, MeetingBudget())
+        budget.notify = notify
+
+    def release(self, meeting_id: str):
+        """Forget a meeting; anything it still has waiting is dropped"""
+        budget = self._meetings.pop(meeting_id, None)
+        if budget is not None:
+            for job in budget.waiting:
+                if not job.granted.done():
+                    job.granted.set_result(False)
+
+    def submit(self, meeting_id: str, tag: Dict, segment: SpeechSegment) -> Optional[QueuedJob]:
+        """Queue speech for the model.
+
+        Returns the job to await, or None if the speech was merged into a
+        job that is already queued (whose tag is extended to cover it).
+        """
+        budget = self._meetings.setdefault(meeting_id, MeetingBudget())
+        if len(budget.waiting) >= self.meeting_queue:
+            if self.policy == "merge" and self._merge(budget.waiting[-1], tag, segment):
+                budget.merged += 1
+                self.merged += 1
+                self._update_flow(meeting_id, budget)
+                return None
+            oldest = budget.waiting.popleft()
+            if not oldest.granted.done():
+                oldest.granted.set_result(False)
+            budget.dropped += 1
+            self.dropped += 1
+
+        job = QueuedJob(tag, segment)
+        budget.waiting.append(job)
+        self._update_flow(meeting_id, budget)
+        self._dispatch()
+        return job
+
+    def finished(self, meeting_id: str):
+        """A granted job is done; its slot goes to the next meeting in line"""
+        self.running -= 1
+        budget = self._meetings.get(meeting_id)
+        if budget is not None:
+            budget.running -= 1
+        self._dispatch()
+
+    def withdraw(self, meeting_id: str, job: QueuedJob):
+        """The job's waiter was cancelled: give back its queue place or its slot"""
+        if job.granted.cancelled():
+            budget = self._meetings.get(meeting_id)
+            if budget is not None and job in budget.waiting:
+                budget.waiting.remove(job)
+                self._update_flow(meeting_id, budget)
+        elif job.granted.result():
+            self.finished(meeting_id)
+
+    def _merge(self, job: QueuedJob, tag: Dict, segment: SpeechSegment) -> bool:
+        if (job.segment.sample_rate, job.segment.channels) != (segment.sample_rate, segment.channels):
+            return False
+        frame_bytes = 2 * segment.channels
+        pcm = segment.pcm
+        if "window_end" in job.tag and "window_start" in tag and "window_end" in tag:
+            # Overlapping windows: the start of this one is already in the queued job. Taking the
+            # segment to end at its window's end (VAD only ever trims it shorter) never drops new audio
+            start = tag["window_end"] - len(pcm) / (frame_bytes * segment.sample_rate)
+            shared = job.tag["window_end"] - start
+            if shared > 0:
+                pcm = pcm[min(len(pcm), round(shared * segment.sample_rate) * frame_bytes):]
+        added = len(pcm) / (frame_bytes * segment.sample_rate)
+        if job.seconds + added > self.merge_max_seconds:
+            return False
+        job.segment = SpeechSegment(job.segment.pcm + pcm, segment.sample_rate, segment.channels)
+        job.tag.update({key: tag[key] for key in ("window_end", "seq") if key in tag})
+        return True
+
+    def _dispatch(self):
+        while self.running < self.max_in_flight:
+            for meeting_id, budget in self._meetings.items():
+                if budget.waiting and budget.running < self.meeting_in_flight:
+                    break
+            else:
+                return
+            # The meeting just served goes to the back of the line
+            self._meetings.move_to_end(meeting_id)
+            job = budget.waiting.popleft()
+            if job.granted.done():
+                continue  # its waiter is gone
+            budget.running += 1
+            self.running += 1
+            job.granted.set_result(True)
+            self._update_flow(meeting_id, budget)
+
+    def _update_flow(self, meeting_id: str, budget: MeetingBudget):
+        queued = len(budget.waiting)
+        if not budget.throttled and queued >= self.meeting_queue:
+            budget.throttled = True
+            message = {"flow_control": "slow_down", "queued": queued, "policy": self.policy,
+                       "min_chunk_ms": self.min_chunk_ms}
+        elif budget.throttled and queued <= self.meeting_queue // 2:
+            budget.throttled = False
+            message = {"flow_control": "resume", "queued": queued}
+        else:
+            return
+        if budget.notify is not None:
+            budget.notify(message)
+
+    def meeting_stats(self, meeting_id: str) -> Optional[Dict]:
+        budget = self._meetings.get(meeting_id)
+        return budget.to_dict() if budget is not None else None
+
+    def stats(self) -> Dict:
+        return {
+            "policy": self.policy,
+            "meetings": len(self._meetings),
+            "running": self.running,
+            "queued": self.queued,
+            "throttled_meetings": sum(1 for budget in self._meetings.values() if budget.throttled),
+            "merged": self.merged,
+            "dropped": self.dropped,
+            "rejected_meetings": self.rejected,
+        }
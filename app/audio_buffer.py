@@ -0,0 +1,153 @@
+import numpy as np
+from typing import NamedTuple, Optional
+
+
+class AudioWindow(NamedTuple):
+    pcm: np.ndarray  # interleaved int16 samples
+    sample_rate: int
+    channels: int
+    start_frame: int  # position of the first frame since the stream started
+
+    @property
+    def start_time(self) -> float:
+        return self.start_frame / self.sample_rate
+
+    @property
+    def end_time(self) -> float:
+        return (self.start_frame + len(self.pcm) // self.channels) / self.sample_rate
+
+
+class RingBuffer:
+    """Preallocated int16 ring buffer addressed by absolute frame index"""
+
+    def __init__(self, capacity_frames: int, channels: int = 1):
+        self.capacity = capacity_frames
+        self.channels = channels
+        self._data = np.zeros((capacity_frames, channels), dtype=np.int16)
+        self.frames_written = 0
+
+    @property
+    def oldest_frame(self) -> int:
+        """Absolute index of the oldest frame still held in the buffer"""
+        return max(0, self.frames_written - self.capacity)
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+    def write(self, samples: np.ndarray):
+        frames = samples.reshape(-1, self.channels)
+        if len(frames) > self.capacity:
+            # Only the newest `capacity` frames can be kept
+            self.frames_written += len(frames) - self.capacity
+            frames = frames[-self.capacity:]
+
+        pos = self.frames_written % self.capacity
+        first = min(len(frames), self.capacity - pos)
+        self._data[pos:pos + first] = frames[:first]
+        self._data[:len(frames) - first] = frames[first:]
+        self.frames_written += len(frames)
+
+    def read(self, start_frame: int, num_frames: int) -> np.ndarray:
+        """Copy `num_frames` frames starting at absolute `start_frame` (interleaved)"""
+        if start_frame < self.oldest_frame or start_frame + num_frames > self.frames_written:
+            raise IndexError("Requested frames are not in the buffer")
+
+        out = np.empty((num_frames, self.channels), dtype=np.int16)
+        pos = start_frame % self.capacity
+        first = min(num_frames, self.capacity - pos)
+        out[:first] = self._data[pos:pos + first]
+        out[first:] = self._data[:num_frames - first]
+        return out.reshape(-1)
+
+
+class MeetingAudio:
+    def __init__(self, sample_rate: int, channels: int, buffer_seconds: float,
+                 window_seconds: float, overlap_seconds: float):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.window_frames = int(window_seconds * sample_rate)
+        self.hop_frames = self.window_frames - int(overlap_seconds * sample_rate)
+        capacity = max(int(buffer_seconds * sample_rate), self.window_frames)
+        self.ring = RingBuffer(capacity, channels)
+        self.next_window_start = 0
+        self.dropped_frames = 0
+
+
+class AudioStream:
+    """Per-meeting bounded audio buffers served as overlapping windows.
+
+    Incoming chunks of any size are written to a fixed-size ring buffer per
+    meeting; `get_audio_chunk` hands out `window_seconds` windows that
+    overlap by `overlap_seconds`. If the reader falls behind by more than
+    `buffer_seconds`, the oldest audio is overwritten and counted as dropped.
+    """
+
+    def __init__(self, buffer_seconds: float = 60.0, window_seconds: float = 10.0,
+                 overlap_seconds: float = 1.0):
+        if not 0 <= overlap_seconds < window_seconds:
+            raise ValueError("overlap_seconds must be smaller than window_seconds")
+        self.buffer_seconds = buffer_seconds
+        self.window_seconds = window_seconds
+        self.overlap_seconds = overlap_seconds
+        self.streams = {}  # meeting_id -> MeetingAudio
+
+    def add_audio_chunk(self, meeting_id: str, audio_data, sample_rate: int = 16000, channels: int = 1):
+        stream = self.streams.get(meeting_id)
+        if stream and (stream.sample_rate, stream.channels) != (sample_rate, channels):
+            print(f"Audio format changed for meeting {meeting_id}; resetting its buffer")
+            stream = None
+        if stream is None:
+            stream = MeetingAudio(sample_rate, channels, self.buffer_seconds,
+                                  self.window_seconds, self.overlap_seconds)
+            self.streams[meeting_id] = stream
+        stream.ring.write(np.frombuffer(audio_data, dtype=np.int16))
+
+    def get_audio_chunk(self, meeting_id: str) -> Optional[AudioWindow]:
+        """Return the next full window for a meeting, or None if not enough audio yet"""
+        stream = self.streams.get(meeting_id)
+        if stream is None:
+            return None
+
+        ring = stream.ring
+        if stream.next_window_start < ring.oldest_frame:
+            stream.dropped_frames += ring.oldest_frame - stream.next_window_start
+            stream.next_window_start = ring.oldest_frame
+        if stream.next_window_start + stream.window_frames > ring.frames_written:
+            return None
+
+        start = stream.next_window_start
+        stream.next_window_start += stream.hop_frames
+        return AudioWindow(ring.read(start, stream.window_frames), stream.sample_rate, stream.channels, start)
+
+    def flush_stream(self, meeting_id: str) -> Optional[AudioWindow]:
+        """Return the trailing partial window, if it holds more than the overlap"""
+        stream = self.streams.get(meeting_id)
+        if stream is None:
+            return None
+
+        ring = stream.ring
+        start = max(stream.next_window_start, ring.oldest_frame)
+        remaining = ring.frames_written - start
+        overlap = stream.window_frames - stream.hop_frames
+        if remaining <= 0 or (stream.next_window_start > 0 and remaining <= overlap):
+            return None
+        stream.next_window_start = ring.frames_written
+        return AudioWindow(ring.read(start, remaining), stream.sample_rate, stream.channels, start)
+
+    def memory_usage(self, meeting_id: str) -> Optional[dict]:
+        stream = self.streams.get(meeting_id)
+        if stream is None:
+            return None
+        ring = stream.ring
+        return {
+            "buffer_bytes": ring.nbytes,
+            "capacity_seconds": ring.capacity / stream.sample_rate,
+            "buffered_seconds": round((ring.frames_written - ring.oldest_frame) / stream.sample_rate, 3),
+            "received_seconds": round(ring.frames_written / stream.sample_rate, 3),
+            "dropped_seconds": round(stream.dropped_frames / stream.sample_rate, 3),
+        }
+
+    def clear_stream(self, meeting_id: str):
+        if meeting_id in self.streams:
+            del self.streams[meeting_id]
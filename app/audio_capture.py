@@ -0,0 +1,128 @@
+"""Server-side capture of the default speaker's loopback audio.
+
+The recording thread scales and clips each block in place, in the float
+buffer soundcard returns, and then casts it into one of a few preallocated
+int16 blocks. Each block is handed to the event loop with
+`call_soon_threadsafe` and returns to a free list once the sink has copied
+it into the meeting's ring buffer, so the loop allocates no sample buffers of
+its own. Time is a monotonic sample index rather than wall-clock timestamps,
+and it counts dropped blocks too.
+If the event loop falls behind and no block is free, the block is dropped
+and counted rather than stalling the recorder. If recording fails (e.g. no
+loopback device), the error is kept for `stats()` and `on_error` is called on
+the event loop.
+"""
+import asyncio
+import queue
+import threading
+
+import numpy as np
+
+
+class AudioCapture:
+    def __init__(self, sample_rate: int = 16000, channels: int = 1, block_frames: int = 1600,
+                 pool_blocks: int = 32):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.block_frames = block_frames
+        self.is_running = False
+        self.recording_thread = None
+        self.current_meeting_id = None
+        self._speaker = None
+        self._loop = None
+        self._sink = None
+        self._on_error = None
+        self.error = None
+        self._blocks = np.zeros((pool_blocks, block_frames * channels), dtype=np.int16)
+        self._free = queue.SimpleQueue()
+        for slot in range(pool_blocks):
+            self._free.put(slot)
+        self.frames_captured = 0
+        self.blocks_dropped = 0
+
+    def _get_speaker(self):
+        if self._speaker is None:
+            # soundcard is only needed for server-side capture, so import it here
+            import soundcard as sc
+            self._speaker = sc.default_speaker()
+        return self._speaker
+
+    def start_capture(self, meeting_id: str, sink, loop: asyncio.AbstractEventLoop = None,
+                      on_error=None) -> bool:
+        """Start recording; `sink(pcm, start_frame)` runs on the event loop for every block.
+
+        `pcm` is an int16 view that is reused once the sink returns, so the
+        sink must copy what it keeps. `start_frame` is the block's position in
+        frames since recording started; dropped blocks still advance it, so a
+        jump shows where audio is missing. `on_error(error)` runs on the event loop
+        if the recording thread stops because of an error.
+        """
+        if self.is_running:
+            return False
+
+        self.is_running = True
+        self.current_meeting_id = meeting_id
+        self._loop = loop or asyncio.get_running_loop()
+        self._sink = sink
+        self._on_error = on_error
+        self.error = None
+        self.frames_captured = 0
+        self.blocks_dropped = 0
+        self.recording_thread = threading.Thread(target=self._capture_audio, name="audio-capture", daemon=True)
+        self.recording_thread.start()
+        return True
+
+    def stop_capture(self):
+        self.is_running = False
+        if self.recording_thread:
+            self.recording_thread.join()
+            self.recording_thread = None
+        self.current_meeting_id = None
+
+    def _deliver(self, slot: int, samples: int, start_frame: int):
+        try:
+            if self._sink is not None:
+                self._sink(self._blocks[slot, :samples], start_frame)
+        except Exception as e:
+            print(f"Error handling captured audio: {e}")
+        finally:
+            self._free.put(slot)
+
+    def _capture_audio(self):
+        try:
+            speaker = self._get_speaker()
+
+            # Create a recorder; soundcard returns float32 frames in [-1, 1]
+            with speaker.recorder(samplerate=self.sample_rate, channels=self.channels,
+                                  blocksize=self.block_frames) as recorder:
+                while self.is_running:
+                    audio_data = recorder.record(numframes=self.block_frames)
+                    np.multiply(audio_data, 32767, out=audio_data)
+                    np.clip(audio_data, -32768, 32767, out=audio_data)
+                    samples = min(audio_data.size, self._blocks.shape[1])
+                    start_frame = self.frames_captured
+                    self.frames_captured += samples // self.channels
+
+                    try:
+                        slot = self._free.get_nowait()
+                    except queue.Empty:
+                        self.blocks_dropped += 1
+                        continue
+                    np.copyto(self._blocks[slot, :samples], audio_data.reshape(-1)[:samples], casting="unsafe")
+                    self._loop.call_soon_threadsafe(self._deliver, slot, samples, start_frame)
+
+        except Exception as e:
+            print(f"Error in audio capture: {e}")
+            self.error = str(e)
+            self.is_running = False
+            if self._on_error is not None:
+                self._loop.call_soon_threadsafe(self._on_error, e)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.is_running,
+            "meeting_id": self.current_meeting_id,
+            "captured_seconds": round(self.frames_captured / self.sample_rate, 3),
+            "blocks_dropped": self.blocks_dropped,
+            "error": self.error,
+        }
@@ -0,0 +1,94 @@
+"""FLAC and Ogg/Opus encoding and decoding through soundfile (libsndfile).
+
+soundfile is imported on first use, so the server still starts without it;
+only compressed frames, uploads and model payloads then fail. All functions
+here are blocking and meant to run off the event loop.
+"""
+import io
+import os
+from typing import Tuple
+
+import numpy as np
+
+from app.audio_protocol import CODEC_FLAC, CODEC_OGG_OPUS, CODEC_PCM_S16LE, build_wav
+
+CODEC_MIME_TYPES = {
+    CODEC_PCM_S16LE: "audio/wav",
+    CODEC_FLAC: "audio/flac",
+    CODEC_OGG_OPUS: "audio/ogg",
+}
+
+# Upload extensions and the MIME type Gemini is given for them
+FILE_MIME_TYPES = {
+    ".wav": "audio/wav",
+    ".flac": "audio/flac",
+    ".ogg": "audio/ogg",
+    ".opus": "audio/ogg",
+}
+
+# Sample rates the Opus encoder accepts
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+class CodecError(ValueError):
+    """Raised when compressed audio cannot be decoded or encoded"""
+
+
+def _soundfile():
+    try:
+        import soundfile
+    except ImportError as e:
+        raise CodecError("Compressed audio needs the soundfile package") from e
+    return soundfile
+
+
+def codecs_available() -> bool:
+    try:
+        _soundfile()
+        return True
+    except CodecError:
+        return False
+
+
+def decode_audio(data) -> Tuple[np.ndarray, int, int]:
+    """Decode a complete FLAC or Ogg file to (interleaved int16 PCM, sample_rate, channels)"""
+    sf = _soundfile()
+    try:
+        samples, sample_rate = sf.read(io.BytesIO(data), dtype="int16", always_2d=True)
+    except (RuntimeError, sf.SoundFileError) as e:
+        raise CodecError(f"Cannot decode audio: {e}") from e
+    return memoryview(samples).cast("B"), sample_rate, samples.shape[1]
+
+
+def encode_audio(pcm, sample_rate: int, channels: int, codec: int) -> bytes:
+    """Encode interleaved int16 PCM as a complete file of the given codec"""
+    if codec == CODEC_PCM_S16LE:
+        return build_wav(pcm, sample_rate, channels)
+
+    sf = _soundfile()
+    samples = np.frombuffer(pcm, dtype=np.int16).reshape(-1, channels)
+    if codec == CODEC_FLAC:
+        file_format, subtype = "FLAC", "PCM_16"
+    elif codec == CODEC_OGG_OPUS:
+        if sample_rate not in OPUS_SAMPLE_RATES:
+            raise CodecError(f"Opus does not support {sample_rate} Hz")
+        file_format, subtype = "OGG", "OPUS"
+    else:
+        raise CodecError(f"Unknown codec: {codec}")
+
+    buffer = io.BytesIO()
+    try:
+        sf.write(buffer, samples, sample_rate, format=file_format, subtype=subtype)
+    except (RuntimeError, sf.SoundFileError) as e:
+        raise CodecError(f"Cannot encode audio: {e}") from e
+    return buffer.getvalue()
+
+
+def audio_file_info(path: str) -> Tuple[float, int, int]:
+    """(duration_seconds, sample_rate, channels) of an audio file, without decoding it"""
+    sf = _soundfile()
+    try:
+        info = sf.info(path)
+    except (RuntimeError, sf.SoundFileError) as e:
+        raise CodecError(f"Cannot read {os.path.basename(path)}: {e}") from e
+    return info.duration, info.samplerate, info.channels
@@ -0,0 +1,285 @@
+"""Normalize arbitrary PCM to the pipeline's format (16 kHz mono int16 by default).
+
+Covers WAV header parsing that tolerates the variants recorders produce
+(WAVE_FORMAT_EXTENSIBLE, RF64, extra or oddly sized chunks, data sizes left
+unset by streaming writers), conversion of 8/16/24/32-bit integer and
+32/64-bit float samples, downmixing and polyphase resampling. Everything
+works on bounded blocks and keeps the state needed to continue across
+block boundaries, so files of any length and websocket streams go through
+the same code.
+"""
+import math
+import struct
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Input frames converted per block when reading files
+READ_BLOCK_FRAMES = 16384
+
+
+class WavFormat(NamedTuple):
+    format_tag: int
+    sample_rate: int
+    channels: int
+    sample_width: int  # bytes per sample, container size
+    data_offset: int
+    data_bytes: int
+
+
+def read_wav_format(f) -> WavFormat:
+    """Parse the RIFF header of a seekable binary file and locate its sample data.
+
+    Raises ValueError for files that are not WAV or whose encoding is not
+    integer or float PCM.
+    """
+    f.seek(0, 2)
+    file_size = f.tell()
+    f.seek(0)
+    riff = f.read(12)
+    if len(riff) < 12 or riff[:4] not in (b"RIFF", b"RF64") or riff[8:12] != b"WAVE":
+        raise ValueError("Not a RIFF/WAVE file")
+
+    fmt = None
+    ds64_data_bytes = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            raise ValueError("WAV file has no data chunk")
+        chunk_id, size = struct.unpack("<4sI", header)
+        start = f.tell()
+
+        if chunk_id == b"ds64":
+            # RF64: the real sizes live here, the 32-bit fields hold 0xFFFFFFFF
+            body = f.read(size)
+            if len(body) >= 16:
+                ds64_data_bytes = struct.unpack_from("<Q", body, 8)[0]
+        elif chunk_id == b"fmt ":
+            body = f.read(size)
+            if len(body) < 16:
+                raise ValueError("WAV fmt chunk is truncated")
+            format_tag, channels, sample_rate, _, block_align, bits = struct.unpack_from("<HHIIHH", body)
+            if format_tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                # The sub-format GUID starts with the actual format tag
+                format_tag = struct.unpack_from("<H", body, 24)[0]
+            if not channels or not sample_rate:
+                raise ValueError("WAV header has zero channels or sample rate")
+            # Trust block_align for the container size (24-bit samples may sit in 32-bit slots)
+            sample_width = block_align // channels if block_align >= channels else (bits + 7) // 8
+            fmt = (format_tag, sample_rate, channels, sample_width)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk precedes the fmt chunk")
+            available = file_size - start
+            if size == 0xFFFFFFFF and ds64_data_bytes is not None:
+                size = ds64_data_bytes
+            if size == 0 or size > available:
+                # Streaming writers leave the size unset or at its maximum
+                size = available
+            format_tag, sample_rate, channels, sample_width = fmt
+            if format_tag == WAVE_FORMAT_PCM and sample_width not in (1, 2, 3, 4):
+                raise ValueError(f"Unsupported WAV sample width: {sample_width * 8}-bit")
+            if format_tag == WAVE_FORMAT_IEEE_FLOAT and sample_width not in (4, 8):
+                raise ValueError(f"Unsupported WAV float width: {sample_width * 8}-bit")
+            if format_tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT):
+                raise ValueError(f"Unsupported WAV encoding: format tag {format_tag:#06x}")
+            return WavFormat(format_tag, sample_rate, channels, sample_width, start, size)
+
+        # Chunks are word aligned: odd sizes are followed by a pad byte
+        f.seek(start + size + (size & 1))
+
+
+def pcm_to_array(raw, fmt: WavFormat) -> np.ndarray:
+    """Samples of `raw` as (frames, channels): int16 kept as is, everything else float32 in [-1, 1]"""
+    frame_bytes = fmt.sample_width * fmt.channels
+    raw = memoryview(raw)[:len(raw) - len(raw) % frame_bytes]
+    width = fmt.sample_width
+
+    if fmt.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        samples = np.frombuffer(raw, dtype="<f4" if width == 4 else "<f8").astype(np.float32, copy=False)
+    elif width == 2:
+        samples = np.frombuffer(raw, dtype="<i2")
+    elif width == 1:
+        # 8-bit WAV is unsigned with its midpoint at 128
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 3:
+        # Sign-extend by placing the three bytes at the top of an int32
+        triples = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+        widened = np.zeros((len(triples), 4), dtype=np.uint8)
+        widened[:, 1:] = triples
+        samples = widened.view("<i4").reshape(-1).astype(np.float32) / 2147483648.0
+    else:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648.0
+    return samples.reshape(-1, fmt.channels)
+
+
+def float_to_int16(samples: np.ndarray) -> np.ndarray:
+    scaled = np.multiply(samples, 32768.0, dtype=np.float32)
+    np.rint(scaled, out=scaled)
+    np.clip(scaled, -32768, 32767, out=scaled)
+    return scaled.astype(np.int16)
+
+
+class Resampler:
+    """Streaming polyphase resampler for (frames, channels) float32 blocks.
+
+    Upsamples by `up`, low-pass filters with a Kaiser-windowed sinc and keeps
+    every `down`-th sample, computing only the outputs that are kept: each
+    output is one dot product between a filter phase and the input samples
+    around it. The tail of each block is kept for the next one.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int, channels: int = 1, zero_crossings: int = 16,
+                 batch: int = 8192):
+        divisor = math.gcd(in_rate, out_rate)
+        self.up = out_rate // divisor
+        self.down = in_rate // divisor
+        self.channels = channels
+        self.batch = batch
+
+        # Enough input samples per output to span `zero_crossings` lobes of the sinc on each side
+        self._half = math.ceil(zero_crossings * max(self.up, self.down) / self.up)
+        self._taps = 2 * self._half
+        length = self._taps * self.up
+        cutoff = 0.475 / max(self.up, self.down)  # cycles per upsampled sample, just below Nyquist
+        # Centred exactly on input sample `base`, so the output is not shifted by a fraction of a sample
+        t = np.arange(length) - self._half * self.up
+        kernel = 2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(length + 1, 8.6)[:length] * self.up
+        # _phases[p, k] weighs input sample (base - k) for outputs whose position falls on phase p
+        self._phases = np.ascontiguousarray(kernel.reshape(self._taps, self.up).T, dtype=np.float32)
+        self._offsets = np.arange(self._taps)
+
+        self._history = np.zeros((self._taps, channels), dtype=np.float32)
+        self._start = -self._taps  # input index of _history[0]
+        self._received = 0
+        self._produced = 0
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Resample the next block; returns every output sample that can be computed so far"""
+        self._received += len(samples)
+        buffer = np.concatenate((self._history, samples))
+        # Output n needs input up to index (n * down) // up + half
+        end = max(self._produced, ((self._received - self._half) * self.up - 1) // self.down + 1)
+        return self._emit(buffer, end)
+
+    def flush(self) -> np.ndarray:
+        """Outputs that depend on input past the end of the stream (treated as silence)"""
+        buffer = np.concatenate((self._history, np.zeros((self._half, self.channels), dtype=np.float32)))
+        end = -(-self._received * self.up // self.down)
+        return self._emit(buffer, end)
+
+    def _emit(self, buffer: np.ndarray, end: int) -> np.ndarray:
+        outputs = []
+        for first in range(self._produced, end, self.batch):
+            n = np.arange(first, min(first + self.batch, end), dtype=np.int64)
+            position = n * self.down
+            base = position // self.up + self._half - self._start
+            window = buffer[base[:, None] - self._offsets]
+            outputs.append(np.einsum("nk,nkc->nc", self._phases[position % self.up], window))
+
+        next_base = (end * self.down) // self.up + self._half - self._taps + 1
+        keep_from = max(0, next_base - self._start)
+        self._history = buffer[keep_from:]
+        self._start += keep_from
+        self._produced = end
+        if not outputs:
+            return np.zeros((0, self.channels), dtype=np.float32)
+        return np.concatenate(outputs).astype(np.float32, copy=False)
+
+
+class AudioNormalizer:
+    """Stateful conversion of one stream to `target_rate` Hz, `target_channels`, int16.
+
+    Input blocks are (frames, channels) or interleaved arrays of int16 or
+    float samples. Audio already in the target format passes through
+    without conversion.
+    """
+
+    def __init__(self, sample_rate: int, channels: int, target_rate: int = 16000, target_channels: int = 1):
+        if channels != target_channels and target_channels != 1:
+            raise ValueError(f"Cannot convert {channels} channels to {target_channels}")
+        self.source = (sample_rate, channels)
+        self.channels = channels
+        self.target_rate = target_rate
+        self.target_channels = target_channels
+        self.passthrough = self.source == (target_rate, target_channels)
+        self._resampler = Resampler(sample_rate, target_rate, target_channels) if sample_rate != target_rate else None
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Normalize one block; returns interleaved int16 samples"""
+        if self.passthrough and samples.dtype == np.int16:
+            return samples.reshape(-1)
+
+        if samples.dtype == np.int16:
+            frames = samples.reshape(-1, self.channels).astype(np.float32) / 32768.0
+        else:
+            frames = samples.reshape(-1, self.channels).astype(np.float32, copy=False)
+        if self.channels != self.target_channels:
+            frames = frames.mean(axis=1, keepdims=True, dtype=np.float32)
+        if self._resampler is not None:
+            frames = self._resampler.process(frames)
+        return float_to_int16(frames).reshape(-1)
+
+    def flush(self) -> np.ndarray:
+        """The resampler's last samples, once the stream has ended"""
+        if self._resampler is None:
+            return np.zeros(0, dtype=np.int16)
+        return float_to_int16(self._resampler.flush()).reshape(-1)
+
+
+class NormalizedReader:
+    """Reads a stream in target format, exactly `frames` at a time until it ends.
+
+    `read_block(frames)` returns up to `frames` source frames as a
+    (frames, channels) array, and an empty array at the end of the stream.
+    """
+
+    def __init__(self, read_block: Callable[[int], np.ndarray], sample_rate: int, channels: int,
+                 target_rate: int = 16000, target_channels: int = 1, block_frames: int = READ_BLOCK_FRAMES):
+        self._read_block = read_block
+        self._normalizer = AudioNormalizer(sample_rate, channels, target_rate, target_channels)
+        self.sample_rate = target_rate
+        self.channels = target_channels
+        self._block_frames = block_frames
+        self._pending = []
+        self._pending_samples = 0
+        self._ended = False
+
+    def read(self, frames: int) -> np.ndarray:
+        wanted = frames * self.channels
+        while self._pending_samples < wanted and not self._ended:
+            block = self._read_block(self._block_frames)
+            if len(block):
+                converted = self._normalizer.process(block)
+            else:
+                self._ended = True
+                converted = self._normalizer.flush()
+            self._pending.append(converted)
+            self._pending_samples += len(converted)
+
+        pending = np.concatenate(self._pending) if len(self._pending) != 1 else self._pending[0]
+        result, rest = pending[:wanted], pending[wanted:]
+        self._pending = [rest]
+        self._pending_samples = len(rest)
+        return result
+
+
+def open_wav(f, target_rate: int = 16000, target_channels: int = 1,
+             block_frames: int = READ_BLOCK_FRAMES) -> NormalizedReader:
+    """NormalizedReader over a seekable binary WAV file; raises ValueError if it can't be read"""
+    fmt = read_wav_format(f)
+    frame_bytes = fmt.sample_width * fmt.channels
+    remaining = [fmt.data_bytes - fmt.data_bytes % frame_bytes]
+    f.seek(fmt.data_offset)
+
+    def read_block(frames: int) -> np.ndarray:
+        raw = f.read(min(frames * frame_bytes, remaining[0]))
+        remaining[0] -= len(raw)
+        return pcm_to_array(raw, fmt)
+
+    return NormalizedReader(read_block, fmt.sample_rate, fmt.channels, target_rate, target_channels, block_frames)
+
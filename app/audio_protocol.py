@@ -0,0 +1,77 @@
+import struct
+from typing import NamedTuple
+
+# Binary websocket frame layout (little-endian):
+#   version:u8  codec:u8  channels:u16  seq:u32  sample_rate:u32  timestamp_ms:u64
+# followed by the audio payload: raw 16-bit PCM for CODEC_PCM_S16LE, or a
+# complete, self-contained FLAC or Ogg/Opus file for the compressed codecs.
+FRAME_HEADER = struct.Struct("<BBHIIQ")
+FRAME_VERSION = 1
+CODEC_PCM_S16LE = 0
+CODEC_FLAC = 1
+CODEC_OGG_OPUS = 2
+CODECS = (CODEC_PCM_S16LE, CODEC_FLAC, CODEC_OGG_OPUS)
+
+# Canonical 44-byte RIFF/WAVE header for PCM data
+WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+
+class AudioFrame(NamedTuple):
+    seq: int
+    sample_rate: int
+    channels: int
+    timestamp_ms: int
+    codec: int
+    payload: memoryview
+
+
+class FrameError(ValueError):
+    """Raised when a binary audio frame cannot be decoded"""
+
+
+def pack_frame(pcm: bytes, seq: int, sample_rate: int, timestamp_ms: int,
+               channels: int = 1, codec: int = CODEC_PCM_S16LE) -> bytes:
+    """Build a binary audio frame (used by clients and benchmarks)"""
+    header = FRAME_HEADER.pack(FRAME_VERSION, codec, channels, seq, sample_rate, timestamp_ms)
+    return b"".join((header, pcm))
+
+
+def parse_frame(data: bytes) -> AudioFrame:
+    """Decode a binary audio frame without copying the payload"""
+    if len(data) < FRAME_HEADER.size:
+        raise FrameError(f"Frame too short: {len(data)} bytes")
+
+    version, codec, channels, seq, sample_rate, timestamp_ms = FRAME_HEADER.unpack_from(data)
+    if version != FRAME_VERSION:
+        raise FrameError(f"Unsupported frame version: {version}")
+    if not channels or not sample_rate:
+        raise FrameError("Frame header has zero channels or sample rate")
+    if codec not in CODECS:
+        raise FrameError(f"Unsupported codec: {codec}")
+
+    payload = memoryview(data)[FRAME_HEADER.size:]
+    if codec == CODEC_PCM_S16LE and len(payload) % (2 * channels):
+        raise FrameError("PCM payload is not a whole number of 16-bit frames")
+
+    return AudioFrame(seq, sample_rate, channels, timestamp_ms, codec, payload)
+
+
+def wav_header(num_bytes: int, sample_rate: int, channels: int, sample_width: int = 2) -> bytes:
+    """Return the RIFF header for `num_bytes` of interleaved PCM"""
+    block_align = channels * sample_width
+    return WAV_HEADER.pack(
+        b"RIFF", 36 + num_bytes, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate,
+        sample_rate * block_align, block_align, sample_width * 8,
+        b"data", num_bytes,
+    )
+
+
+def build_wav(pcm, sample_rate: int, channels: int, sample_width: int = 2) -> bytes:
+    """Wrap PCM in a WAV container in memory.
+
+    `pcm` may be bytes or a memoryview; the samples are copied exactly once,
+    into the returned buffer that is handed to the model.
+    """
+    header = wav_header(len(pcm), sample_rate, channels, sample_width)
+    return b"".join((header, pcm))
@@ -0,0 +1,84 @@
+import numpy as np
+from typing import Iterator
+
+from app.audio_buffer import AudioWindow
+from app.audio_normalize import NormalizedReader, open_wav
+
+
+def quietest_cut(block: np.ndarray, sample_rate: int, channels: int,
+                 search_seconds: float, frame_ms: int = 30) -> int:
+    """Frame index of the quietest point in the last `search_seconds` of `block`"""
+    total_frames = len(block) // channels
+    frame_len = max(1, sample_rate * frame_ms // 1000)
+    search_start = max(0, total_frames - int(search_seconds * sample_rate))
+    num_frames = (total_frames - search_start) // frame_len
+    if num_frames < 1:
+        return total_frames
+
+    region = block[search_start * channels:(search_start + num_frames * frame_len) * channels]
+    mono = region.reshape(-1, channels).mean(axis=1) if channels > 1 else region.astype(np.float32)
+    energy = np.square(mono.reshape(num_frames, frame_len), dtype=np.float32).mean(axis=1)
+    quietest = int(np.argmin(energy))
+    return max(1, search_start + quietest * frame_len + frame_len // 2)
+
+
+def iter_wav_segments(path: str, max_segment_seconds: float = 30.0, search_seconds: float = 5.0,
+                      frame_ms: int = 30, sample_rate: int = 16000, channels: int = 1) -> Iterator[AudioWindow]:
+    """Read a WAV file in bounded blocks and yield segments cut at silences.
+
+    Any integer or float PCM WAV is normalized to `sample_rate` Hz,
+    `channels` and int16 as it is read. Each segment is at most
+    `max_segment_seconds` long and ends at the quietest frame within its last
+    `search_seconds`, so words are rarely split. Only one segment's worth of
+    samples is held in memory at a time.
+    """
+    with open(path, "rb") as wav_file:
+        reader = open_wav(wav_file, sample_rate, channels)
+        yield from _cut_segments(reader, max_segment_seconds, search_seconds, frame_ms)
+
+
+def iter_audio_segments(path: str, max_segment_seconds: float = 30.0, search_seconds: float = 5.0,
+                        frame_ms: int = 30, sample_rate: int = 16000, channels: int = 1) -> Iterator[AudioWindow]:
+    """Like `iter_wav_segments`, for any file soundfile can decode (FLAC, Ogg/Opus).
+
+    Compressed files are decoded block by block, so memory stays bounded by
+    one segment of PCM here too.
+    """
+    if path.lower().endswith(".wav"):
+        yield from iter_wav_segments(path, max_segment_seconds, search_seconds, frame_ms, sample_rate, channels)
+        return
+
+    # soundfile is optional; only compressed uploads need it
+    import soundfile
+
+    with soundfile.SoundFile(path) as audio_file:
+        # Audio already in the target format is read as int16 and passed through untouched
+        dtype = "int16" if (audio_file.samplerate, audio_file.channels) == (sample_rate, channels) else "float32"
+
+        def read_block(frames):
+            return audio_file.read(frames, dtype=dtype, always_2d=True)
+
+        reader = NormalizedReader(read_block, audio_file.samplerate, audio_file.channels, sample_rate, channels)
+        yield from _cut_segments(reader, max_segment_seconds, search_seconds, frame_ms)
+
+
+def _cut_segments(reader: NormalizedReader, max_segment_seconds: float, search_seconds: float,
+                  frame_ms: int) -> Iterator[AudioWindow]:
+    sample_rate, channels = reader.sample_rate, reader.channels
+    max_frames = max(1, int(max_segment_seconds * sample_rate))
+    carry = np.zeros(0, dtype=np.int16)
+    start_frame = 0
+    while True:
+        block = np.concatenate((carry, reader.read(max_frames - len(carry) // channels)))
+        total_frames = len(block) // channels
+        if total_frames == 0:
+            return
+        if total_frames < max_frames:
+            # End of file: whatever is left is the final segment
+            yield AudioWindow(block, sample_rate, channels, start_frame)
+            return
+
+        cut = quietest_cut(block, sample_rate, channels, search_seconds, frame_ms)
+        yield AudioWindow(block[:cut * channels], sample_rate, channels, start_frame)
+        carry = block[cut * channels:]
+        start_frame += cut
@@ -0,0 +1,307 @@
+"""Offline bulk transcription of a directory of recordings.
+
+Walks a directory for WAV, FLAC and Ogg/Opus files. Each recording is
+normalized to 16 kHz mono, cut into segments at pauses and encoded for the
+model in a process pool; the segments are spooled to disk, so memory stays
+bounded however long the recordings are. Segments are then transcribed with
+bounded concurrency through the same cache, call policy and batcher as the
+server. The segments are then fed in order to the RecommendationService,
+as a live meeting's would be, so recommendations cover the whole recording
+rather than only the end that fits in the rolling context window.
+
+Results go to one JSON file per recording under the output directory,
+mirroring the input layout (`a/b.wav` -> `a/b.wav.json`). A manifest in the output directory records
+every finished recording (with its size and modification time), so an
+interrupted run picks up where it stopped; failed recordings are retried.
+
+Usage: python -m app.bulk_transcribe RECORDINGS_DIR [--output transcripts]
+       [--processes N] [--concurrency 4] [--no-recommendations] [--force]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.audio_codecs import CODEC_MIME_TYPES, FILE_MIME_TYPES, CodecError, encode_audio
+from app.audio_protocol import CODEC_PCM_S16LE, build_wav
+from app.audio_segmenter import iter_audio_segments
+from app.transcription_cache import TranscriptionCache
+
+MANIFEST_NAME = "manifest.json"
+
+
+def find_recordings(root: str) -> List[str]:
+    """Paths of the recordings under `root`, relative to it, in a stable order"""
+    recordings = []
+    for directory, subdirectories, filenames in os.walk(root):
+        subdirectories.sort()
+        for filename in sorted(filenames):
+            if os.path.splitext(filename)[1].lower() in FILE_MIME_TYPES:
+                recordings.append(os.path.relpath(os.path.join(directory, filename), root))
+    return recordings
+
+
+def prepare_recording(path: str, spool_dir: str, max_segment_seconds: float, sample_rate: int, channels: int,
+                      codec: int, model_name: str, prompt: str) -> Dict:
+    """Process-pool job: normalize, segment and encode one recording into the existing `spool_dir`.
+
+    Returns the recording's duration and, per segment, its time range, cache
+    key and the spooled model payload.
+    """
+    segments = []
+    duration = 0.0
+    for index, window in enumerate(iter_audio_segments(path, max_segment_seconds,
+                                                       sample_rate=sample_rate, channels=channels)):
+        pcm = window.pcm.tobytes()
+        try:
+            payload, mime_type = encode_audio(pcm, sample_rate, channels, codec), CODEC_MIME_TYPES[codec]
+        except CodecError:
+            payload, mime_type = build_wav(pcm, sample_rate, channels), CODEC_MIME_TYPES[CODEC_PCM_S16LE]
+        payload_path = os.path.join(spool_dir, f"{index:05d}")
+        with open(payload_path, "wb") as f:
+            f.write(payload)
+        segments.append({
+            "index": index,
+            "start": round(window.start_time, 3),
+            "end": round(window.end_time, 3),
+            "cache_key": TranscriptionCache.key(pcm, sample_rate, channels, model_name, prompt),
+            "path": payload_path,
+            "mime_type": mime_type,
+        })
+        duration = window.end_time
+    return {"duration": duration, "segments": segments}
+
+
+def stored_segments(meeting_store, meeting_id: str) -> Set[Tuple]:
+    """(start, end, text) of the transcription events already in the meeting's history"""
+    stored, cursor = set(), 0
+    while True:
+        events, next_cursor = meeting_store.read(meeting_id, since=cursor, kind="transcription")
+        stored.update((event.get("window_start"), event.get("window_end"), event.get("transcription"))
+                      for event in events)
+        if next_cursor == cursor:
+            return stored
+        cursor = next_cursor
+
+
+class Manifest:
+    """Progress of a bulk run, saved atomically after every recording"""
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.files = json.load(f)["files"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            self.files = {}
+
+    @staticmethod
+    def _signature(path: str) -> Dict:
+        stat = os.stat(path)
+        return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+    def is_done(self, name: str, path: str) -> bool:
+        entry = self.files.get(name)
+        return entry is not None and entry["status"] == "done" and \
+            {"size": entry["size"], "mtime": entry["mtime"]} == self._signature(path)
+
+    def record(self, name: str, path: str, **details):
+        self.files[name] = {**self._signature(path), **details}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"files": self.files}, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+class BulkTranscriber:
+    def __init__(self, input_dir: str, output_dir: str, processes: int, concurrency: int,
+                 recommendations: bool = True, force: bool = False):
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.processes = processes
+        self.concurrency = concurrency
+        self.recommendations = recommendations
+        self.force = force
+        self.manifest = Manifest(os.path.join(output_dir, MANIFEST_NAME))
+        self.summary = {"recordings": 0, "skipped": 0, "transcribed": 0, "failed": 0,
+                        "segments": 0, "audio_seconds": 0.0}
+
+    def output_path(self, name: str) -> str:
+        # The extension is kept, so a.wav and a.flac don't overwrite each other
+        return os.path.join(self.output_dir, name + ".json")
+
+    @staticmethod
+    def meeting_id(name: str) -> str:
+        # Meeting ids end up in URL paths (/meetings/{meeting_id}/events), so they carry no slashes
+        return name.replace(os.sep, "-")
+
+    async def run(self) -> Dict:
+        # The server's pipeline is imported here, not at module level, so pool processes stay light
+        from app import main
+
+        started = time.perf_counter()
+        recordings = find_recordings(self.input_dir)
+        owners = {}
+        for name in recordings:
+            other = owners.setdefault(self.meeting_id(name), name)
+            if other != name:
+                raise ValueError(f"{other} and {name} would share meeting id {self.meeting_id(name)}; rename one")
+        self.summary["recordings"] = len(recordings)
+        pending = []
+        for name in recordings:
+            if not self.force and self.manifest.is_done(name, os.path.join(self.input_dir, name)):
+                self.summary["skipped"] += 1
+            else:
+                pending.append(name)
+
+        model_slots = asyncio.Semaphore(self.concurrency)
+        # At most two recordings per process are spooled ahead of transcription
+        spool_slots = asyncio.Semaphore(2 * self.processes)
+        spool_root = tempfile.mkdtemp(prefix="bulk-", dir=self.output_dir)
+        pool = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            await asyncio.gather(*(self._transcribe_recording(main, pool, name, spool_root, model_slots, spool_slots)
+                                   for name in pending))
+        finally:
+            pool.shutdown(cancel_futures=True)
+            shutil.rmtree(spool_root, ignore_errors=True)
+
+        elapsed = time.perf_counter() - started
+        audio_seconds = self.summary["audio_seconds"]
+        self.summary["audio_seconds"] = round(audio_seconds, 1)
+        self.summary["elapsed_seconds"] = round(elapsed, 1)
+        self.summary["audio_hours_per_hour"] = round(audio_seconds / elapsed, 2) if elapsed else 0.0
+        self.summary["providers"] = {"gemini": main.transcription_policy.stats()}
+        return self.summary
+
+    async def _transcribe_recording(self, main, pool, name: str, spool_root: str,
+                                    model_slots: asyncio.Semaphore, spool_slots: asyncio.Semaphore):
+        path = os.path.join(self.input_dir, name)
+        meeting_id = self.meeting_id(name)
+        async with spool_slots:
+            spool_dir = tempfile.mkdtemp(dir=spool_root)
+            try:
+                prepared = await asyncio.get_running_loop().run_in_executor(
+                    pool, prepare_recording, path, spool_dir, main.SEGMENT_MAX_SECONDS, main.AUDIO_SAMPLE_RATE,
+                    main.AUDIO_CHANNELS, main.MODEL_AUDIO_CODEC, main.TRANSCRIPTION_MODEL_NAME,
+                    main.TRANSCRIPTION_PROMPT)
+            except Exception as e:
+                print(f"Could not read {name}: {e}")
+                self.summary["failed"] += 1
+                self.manifest.record(name, path, status="failed", error=str(e))
+                return
+
+            async def transcribe(segment: Dict) -> Optional[str]:
+                async with model_slots:
+                    with open(segment["path"], "rb") as f:
+                        payload = f.read()
+                    try:
+                        return await main.generate_transcription(payload, segment["cache_key"], segment["mime_type"],
+                                                                 segment["end"] - segment["start"])
+                    except Exception as e:
+                        print(f"Error transcribing {name} at {segment['start']}s: {e}")
+                        return None
+
+            segments = prepared["segments"]
+            transcriptions = await asyncio.gather(*(transcribe(segment) for segment in segments))
+            shutil.rmtree(spool_dir, ignore_errors=True)
+
+        results = [main.TranscriptSegment(index=segment["index"], start=segment["start"], end=segment["end"],
+                                          transcription=transcription)
+                   for segment, transcription in zip(segments, transcriptions)]
+        # A rerun (--force, or after a partial failure) only adds segments the history doesn't have yet
+        stored = await asyncio.to_thread(stored_segments, main.meeting_store, meeting_id)
+        for segment in results:
+            if (segment.start, segment.end, segment.transcription) not in stored:
+                main.store_segment(meeting_id, segment)
+        transcription = main.stitch_segments(results)
+        failed = sum(1 for segment in results if segment.transcription is None)
+
+        recommendations = []
+        if self.recommendations and transcription and not failed:
+            for segment in results:
+                if not segment.transcription:
+                    continue
+                try:
+                    recommendation = await main.recommendation_service.process_transcription({
+                        "meeting_id": meeting_id,
+                        "transcription": segment.transcription,
+                        "timestamp": datetime.now().isoformat()
+                    })
+                except Exception as e:
+                    print(f"Error recommending for {name} at {segment.start}s: {e}")
+                    break
+                # Segments on the same topic get the cached recommendation back; list each one once
+                if recommendation and (not recommendations or recommendations[-1]["recommendation"] != recommendation):
+                    recommendations.append({"start": segment.start, "end": segment.end,
+                                            "recommendation": recommendation})
+
+        output_path = self.output_path(name)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, "w") as f:
+            json.dump({
+                "meeting_id": meeting_id,
+                "source": name,
+                "duration": round(prepared["duration"], 3),
+                "status": "success" if not failed else "partial",
+                "transcription": transcription,
+                "recommendations": recommendations,
+                "segments": [segment.dict() for segment in results],
+                "timestamp": datetime.now().isoformat()
+            }, f, indent=2)
+
+        self.summary["segments"] += len(results)
+        self.summary["audio_seconds"] += prepared["duration"]
+        if failed:
+            # Finished segments are in the transcription cache, so a rerun only pays for the rest
+            self.summary["failed"] += 1
+            self.manifest.record(name, path, status="failed", error=f"{failed} of {len(results)} segments failed",
+                                 output=output_path)
+        else:
+            self.summary["transcribed"] += 1
+            self.manifest.record(name, path, status="done", duration=round(prepared["duration"], 3),
+                                 segments=len(results), output=output_path)
+        print(f"{name}: {prepared['duration']:.0f}s, {len(results)} segments, "
+              f"{'done' if not failed else f'{failed} segments failed'}")
+
+
+async def bulk_transcribe(args) -> Dict:
+    from app.main import meeting_store, recommendation_service, transcription_cache, transcription_executor
+
+    os.makedirs(args.output, exist_ok=True)
+    transcriber = BulkTranscriber(args.input_dir, args.output, args.processes, args.concurrency,
+                                  recommendations=not args.no_recommendations, force=args.force)
+    try:
+        return await transcriber.run()
+    finally:
+        await recommendation_service.stop()
+        meeting_store.close()
+        transcription_executor.shutdown(wait=False)
+        transcription_cache.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe a directory of recorded meetings")
+    parser.add_argument("input_dir", help="Directory of WAV, FLAC and Ogg/Opus recordings (searched recursively)")
+    parser.add_argument("--output", default="transcripts", help="Directory for per-recording JSON and the manifest")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                        help="Processes normalizing and segmenting audio")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("TRANSCRIPTION_CONCURRENCY", "4")),
+                        help="Segments being transcribed at once")
+    parser.add_argument("--no-recommendations", action="store_true", help="Skip the recommendation step")
+    parser.add_argument("--force", action="store_true", help="Redo recordings the manifest marks as done")
+    args = parser.parse_args()
+
+    summary = asyncio.run(bulk_transcribe(args))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
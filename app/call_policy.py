@@ -0,0 +1,304 @@
+"""Deadlines, hedging, retries and circuit breaking for model provider calls.
+
+A CallPolicy wraps every request to one provider (Gemini, Groq):
+
+- deadline: the call as a whole, retries included, gives up after
+  `deadline_seconds`. Each attempt gets its own timeout, a share of the
+  deadline (`deadline_seconds / max_attempts`, or the recent p99 latency if
+  that is longer), so one stalled request can't use up the whole budget;
+  the attempt is told its timeout, so the SDK's own request timeout can be
+  set to match.
+- hedging: once an attempt has taken longer than the `hedge_quantile` of
+  recent latencies, a duplicate is sent and whichever answers first wins.
+  At most `max_hedge_ratio` of calls are hedged, so a slow provider isn't
+  sent twice the load.
+- retries: transient failures (timeouts, connection errors, 408/409/429/5xx)
+  are retried with jittered exponential backoff, within the deadline.
+  Anything else, including programming errors, fails the call at once and
+  doesn't count towards the circuit breaker.
+- circuit breaker: after `breaker_failures` transient failures in a row,
+  calls fail at once with CircuitOpenError for `breaker_open_seconds`;
+  then a single probe call decides whether the circuit closes again.
+"""
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional
+
+import numpy as np
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+
+class CallPolicyError(Exception):
+    pass
+
+
+class CircuitOpenError(CallPolicyError):
+    """The provider is failing; the call was refused without being sent"""
+
+
+class DeadlineExceededError(CallPolicyError, asyncio.TimeoutError):
+    """No attempt finished before the call's deadline"""
+
+
+class AttemptTimeoutError(CallPolicyError, asyncio.TimeoutError):
+    """One attempt ran past its share of the deadline; the call may still retry"""
+
+
+# Connection and timeout errors of the provider SDKs (Groq/OpenAI, httpx, Google API core),
+# matched by class name so none of those packages has to be importable here
+_TRANSIENT_ERROR_NAMES = frozenset({
+    "APIConnectionError", "APITimeoutError", "TransportError", "TimeoutException", "NetworkError",
+    "RemoteProtocolError", "ServerDisconnectedError", "RetryError", "ServiceUnavailable", "DeadlineExceeded",
+})
+
+
+def is_transient(error: BaseException) -> bool:
+    """Worth retrying: timeouts, connection errors and 408/409/429/5xx responses"""
+    if isinstance(error, CircuitOpenError):
+        return False
+    # Groq/OpenAI errors carry `status_code`, Google API errors an HTTP `code`
+    status = getattr(error, "status_code", None)
+    if not isinstance(status, int):
+        status = getattr(error, "code", None)
+    if isinstance(status, int) and 100 <= status < 600:
+        return status in (408, 409, 429) or status >= 500
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    return any(cls.__name__ in _TRANSIENT_ERROR_NAMES for cls in type(error).__mro__)
+
+
+class LatencyWindow:
+    """Latencies of the most recent successful calls"""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+
+    def observe(self, seconds: float):
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def quantile(self, q: float) -> float:
+        if not self._samples:
+            return 0.0
+        return float(np.quantile(np.fromiter(self._samples, dtype=np.float64), q))
+
+
+class CircuitBreaker:
+    def __init__(self, failures: int = 5, open_seconds: float = 30.0):
+        self.failure_threshold = failures
+        self.open_seconds = open_seconds
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probing = False
+
+    def allow(self) -> bool:
+        """Whether a call may be sent now (in half-open state, only one probe at a time)"""
+        if self.state == BREAKER_OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                return False
+            self.state = BREAKER_HALF_OPEN
+        if self.state == BREAKER_HALF_OPEN:
+            if self._probing:
+                return False
+            self._probing = True
+        return True
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.state = BREAKER_CLOSED
+        self._probing = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._probing = False
+        if self.state == BREAKER_HALF_OPEN or (
+                self.failure_threshold and self.consecutive_failures >= self.failure_threshold):
+            if self.state != BREAKER_OPEN:
+                self.times_opened += 1
+            self.state = BREAKER_OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """A probe ended without a verdict (e.g. a non-transient error); let another one through"""
+        self._probing = False
+
+
+class CallPolicy:
+    """Deadline, hedging, retry and circuit-breaker policy for one provider.
+
+    `call(attempt)` takes a coroutine function `attempt(timeout)` that sends
+    one request, given the seconds it may take.
+    """
+
+    def __init__(self, name: str, deadline_seconds: float = 30.0, max_attempts: int = 3,
+                 backoff_seconds: float = 0.5, max_backoff_seconds: float = 5.0,
+                 hedge_quantile: float = 0.95, min_hedge_seconds: float = 0.5, max_hedge_ratio: float = 0.1,
+                 min_samples: int = 20, breaker_failures: int = 5, breaker_open_seconds: float = 30.0,
+                 is_retryable: Callable[[BaseException], bool] = is_transient):
+        self.name = name
+        self.deadline_seconds = deadline_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge_seconds = min_hedge_seconds
+        self.max_hedge_ratio = max_hedge_ratio
+        self.min_samples = min_samples
+        self.is_retryable = is_retryable
+        self.breaker = CircuitBreaker(breaker_failures, breaker_open_seconds)
+        self.latency = LatencyWindow()
+
+        # Stats
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.attempts = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.short_circuited = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """How long to wait before hedging, or None if this call must not be hedged"""
+        if not self.hedge_quantile or len(self.latency) < self.min_samples:
+            return None
+        if self.breaker.state != BREAKER_CLOSED or self.hedges >= self.max_hedge_ratio * self.calls:
+            return None
+        return max(self.min_hedge_seconds, self.latency.quantile(self.hedge_quantile))
+
+    def attempt_timeout(self, remaining: float) -> float:
+        """Seconds one attempt may take: its share of the deadline, or the recent p99 if longer"""
+        timeout = self.deadline_seconds / self.max_attempts
+        if len(self.latency) >= self.min_samples:
+            timeout = max(timeout, self.latency.quantile(0.99))
+        return min(remaining, timeout)
+
+    def _backoff(self, retry: int) -> float:
+        # Full jitter: uniform over [0, base * 2^retry], capped
+        return random.uniform(0, min(self.max_backoff_seconds, self.backoff_seconds * 2 ** retry))
+
+    async def call(self, attempt: Callable[[float], Awaitable]):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline_seconds
+        self.calls += 1
+        last_error = None
+        for attempt_number in range(self.max_attempts):
+            if not self.breaker.allow():
+                self.short_circuited += 1
+                self.failures += 1
+                raise last_error or CircuitOpenError(f"{self.name} circuit is open after repeated failures")
+            if attempt_number:
+                self.retries += 1
+            try:
+                result = await self._hedged(attempt, deadline)
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                if not self.is_retryable(e):
+                    self.breaker.release()
+                    self.failures += 1
+                    raise
+                if isinstance(e, (DeadlineExceededError, AttemptTimeoutError)):
+                    self.timeouts += 1
+                self.breaker.record_failure()
+                last_error = e
+                delay = self._backoff(attempt_number)
+                if isinstance(e, DeadlineExceededError) or loop.time() + delay >= deadline:
+                    break
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            self.successes += 1
+            return result
+        self.failures += 1
+        raise last_error
+
+    async def _hedged(self, attempt: Callable[[float], Awaitable], deadline: float):
+        """One attempt, plus a duplicate if it runs past the hedge delay; the first success wins"""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        attempt_deadline = started + self.attempt_timeout(deadline - started)
+        self.attempts += 1
+        primary = asyncio.ensure_future(attempt(attempt_deadline - started))
+        tasks = {primary}
+        hedge_delay = self.hedge_delay()
+        error = None
+        try:
+            while tasks:
+                remaining = attempt_deadline - loop.time()
+                if remaining <= 0:
+                    if attempt_deadline < deadline:
+                        raise AttemptTimeoutError(f"{self.name} attempt took longer than "
+                                                  f"{attempt_deadline - started:.2f}s")
+                    raise DeadlineExceededError(f"{self.name} call exceeded its {self.deadline_seconds:g}s deadline")
+                wait = remaining
+                if hedge_delay is not None:
+                    wait = min(wait, max(0.0, started + hedge_delay - loop.time()))
+                done, tasks = await asyncio.wait(tasks, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                if not done and hedge_delay is not None:
+                    # The attempt is slower than usual: race a duplicate against it
+                    hedge_delay = None
+                    self.hedges += 1
+                    self.attempts += 1
+                    tasks.add(asyncio.ensure_future(attempt(attempt_deadline - loop.time())))
+                    continue
+                winner = None
+                for task in done:
+                    if task.exception() is None:
+                        winner = winner or task
+                    else:
+                        error = task.exception()
+                if winner is not None:
+                    if winner is not primary:
+                        self.hedge_wins += 1
+                    self.latency.observe(loop.time() - started)
+                    return winner.result()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "successes": self.successes,
+            "failures": self.failures,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "short_circuited": self.short_circuited,
+            "breaker": self.breaker.state,
+            "breaker_opened": self.breaker.times_opened,
+            "latency_ms": {
+                "p50": round(self.latency.quantile(0.5) * 1000, 1),
+                "p95": round(self.latency.quantile(0.95) * 1000, 1),
+                "p99": round(self.latency.quantile(0.99) * 1000, 1),
+            },
+        }
+
+
+def policy_from_env(name: str, prefix: str, deadline_seconds: float) -> CallPolicy:
+    """CallPolicy configured from `<prefix>_DEADLINE_SECONDS`, `<prefix>_MAX_ATTEMPTS`, etc."""
+    return CallPolicy(
+        name,
+        deadline_seconds=float(os.getenv(f"{prefix}_DEADLINE_SECONDS", str(deadline_seconds))),
+        max_attempts=int(os.getenv(f"{prefix}_MAX_ATTEMPTS", "3")),
+        hedge_quantile=float(os.getenv(f"{prefix}_HEDGE_QUANTILE", "0.95")),
+        max_hedge_ratio=float(os.getenv(f"{prefix}_HEDGE_MAX_RATIO", "0.1")),
+        breaker_failures=int(os.getenv(f"{prefix}_BREAKER_FAILURES", "5")),
+        breaker_open_seconds=float(os.getenv(f"{prefix}_BREAKER_OPEN_SECONDS", "30"))
+    )
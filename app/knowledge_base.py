@@ -0,0 +1,48 @@
+import os
+import threading
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+CHROMA_PATH = os.getenv("CHROMA_PATH", "./chroma_db")
+COLLECTION_NAME = "services_knowledge"
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# ChromaDB and the SentenceTransformer model are loaded on first use
+_embedding_function = None
+_collection = None
+_lock = threading.Lock()
+
+def get_embedding_function():
+    global _embedding_function
+    with _lock:
+        if _embedding_function is None:
+            from chromadb.utils import embedding_functions
+            _embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
+                model_name=EMBEDDING_MODEL_NAME
+            )
+    return _embedding_function
+
+def get_collection():
+    """Get or create the services_knowledge collection"""
+    global _collection
+    if _collection is not None:
+        return _collection
+    
+    embedding_function = get_embedding_function()
+    with _lock:
+        if _collection is None:
+            import chromadb
+            chroma_client = chromadb.PersistentClient(path=CHROMA_PATH)
+            try:
+                _collection = chroma_client.get_collection(
+                    name=COLLECTION_NAME,
+                    embedding_function=embedding_function
+                )
+            except:
+                _collection = chroma_client.create_collection(
+                    name=COLLECTION_NAME,
+                    embedding_function=embedding_function
+                )
+    return _collection
@@ -0,0 +1,239 @@
+"""Incremental indexer for the Data/ knowledge base.
+
+Loads Data/*.txt into the services_knowledge collection. Each file is split
+into paragraph chunks with a token cap, repeated lines and paragraphs
+(navigation text in scraped pages) are dropped, and chunks are identified by a content hash so
+only new or changed chunks are embedded. A manifest records each file's hash
+and chunk ids; unchanged files are skipped without being re-chunked. A chunk
+found in several files is stored once and removed from the collection only
+when no file contains it any more.
+
+Usage: python -m app.knowledge_indexer [--data-dir Data] [--full]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from collections import Counter
+from typing import Dict, List
+
+DATA_DIR = os.getenv("KNOWLEDGE_DATA_DIR", "Data")
+MAX_CHUNK_TOKENS = 180  # all-MiniLM-L6-v2 truncates at 256 word pieces
+MIN_PARAGRAPH_CHARS = 20  # shorter fragments are navigation/menu items
+BOILERPLATE_MIN_REPEATS = 3  # lines repeated this often in one file are page chrome
+EMBED_BATCH_SIZE = 64
+MANIFEST_VERSION = 2  # chunk ids are listed under every file that contains them
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _content_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=12).hexdigest()
+
+
+def strip_boilerplate(text: str) -> str:
+    """Remove lines that repeat throughout a file (menus, headers and footers of scraped pages)"""
+    lines = text.replace("\r\n", "\n").split("\n")
+    counts = Counter(line.strip().lower() for line in lines if line.strip())
+    return "\n".join(
+        line for line in lines
+        if not line.strip() or counts[line.strip().lower()] < BOILERPLATE_MIN_REPEATS
+    )
+
+
+def split_paragraphs(text: str) -> List[str]:
+    paragraphs = []
+    for block in _PARAGRAPH_BREAK.split(text.replace("\r\n", "\n")):
+        block = block.strip()
+        if block:
+            paragraphs.append(block)
+    return paragraphs
+
+
+def chunk_document(text: str, max_tokens: int = MAX_CHUNK_TOKENS) -> List[str]:
+    """Split a document into de-duplicated paragraph chunks of at most `max_tokens` words.
+
+    Short neighbouring paragraphs are merged up to the cap; long ones are
+    split on word boundaries.
+    """
+    seen = set()
+    pieces = []
+    for paragraph in split_paragraphs(strip_boilerplate(text)):
+        normalized = _WHITESPACE.sub(" ", paragraph).strip()
+        key = normalized.lower()
+        if len(normalized) < MIN_PARAGRAPH_CHARS or key in seen:
+            continue
+        seen.add(key)
+
+        words = normalized.split(" ")
+        for start in range(0, len(words), max_tokens):
+            pieces.append(words[start:start + max_tokens])
+
+    chunks = []
+    current = []
+    for words in pieces:
+        if current and len(current) + len(words) > max_tokens:
+            chunks.append(" ".join(current))
+            current = []
+        current.extend(words)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def document_metadata(filename: str, text: str) -> Dict[str, str]:
+    """Service name and short description, as read by the recommendation query path.
+
+    Files are expected to start with a one-line service name followed by a
+    description paragraph; otherwise the name is derived from the filename.
+    """
+    paragraphs = split_paragraphs(strip_boilerplate(text))
+    stem = os.path.splitext(filename)[0]
+    name = re.sub(r"(?<=[a-z])(?=[A-Z])|_", " ", stem).strip().title()
+    if paragraphs and "\n" not in paragraphs[0] and len(paragraphs[0].split()) <= 8:
+        name = paragraphs[0]
+        paragraphs = paragraphs[1:]
+
+    description = next((p for p in paragraphs if len(p.split()) >= 8), "")
+    description = _WHITESPACE.sub(" ", description)[:500]
+    return {"name": name, "description": description, "source": filename}
+
+
+class KnowledgeIndexer:
+    def __init__(self, collection, data_dir: str = DATA_DIR, manifest_path: str = None):
+        self.collection = collection
+        self.data_dir = data_dir
+        self.manifest_path = manifest_path or os.path.join(
+            os.getenv("CHROMA_PATH", "./chroma_db"), "knowledge_manifest.json"
+        )
+
+    def _load_manifest(self) -> Dict:
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"files": {}}
+
+    def _save_manifest(self, manifest: Dict):
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    def index(self, full: bool = False) -> Dict:
+        """Bring the collection in line with the data directory; returns a summary"""
+        started = time.perf_counter()
+        manifest = {"files": {}} if full else self._load_manifest()
+        old_files = manifest["files"]
+        # Manifests from before chunk ids were reference-counted may be missing shared chunks:
+        # re-chunk every file once (only chunks not already in the collection are embedded)
+        rechunk = manifest.get("version") != MANIFEST_VERSION
+        new_files = {}
+        summary = {"files_unchanged": 0, "files_indexed": 0, "files_removed": 0,
+                   "chunks_added": 0, "chunks_deleted": 0, "chunks_kept": 0}
+
+        if full:
+            existing = self.collection.get(include=[])["ids"]
+            if existing:
+                self.collection.delete(ids=existing)
+
+        filenames = sorted(f for f in os.listdir(self.data_dir) if f.endswith(".txt"))
+        documents = {}  # chunk id -> text, for chunks of files read this run
+        for filename in filenames:
+            with open(os.path.join(self.data_dir, filename), "rb") as f:
+                raw = f.read()
+            file_hash = hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+            previous = old_files.get(filename)
+            if previous and previous["hash"] == file_hash and not rechunk:
+                new_files[filename] = previous
+                summary["files_unchanged"] += 1
+                continue
+
+            text = raw.decode("utf-8", errors="replace")
+            chunk_ids = []
+            for chunk in chunk_document(text):
+                chunk_id = _content_hash(chunk)
+                if chunk_id not in documents:
+                    documents[chunk_id] = chunk
+                if chunk_id not in chunk_ids:
+                    chunk_ids.append(chunk_id)
+            new_files[filename] = {"hash": file_hash, "chunk_ids": chunk_ids,
+                                   "metadata": document_metadata(filename, text)}
+            summary["files_indexed"] += 1
+        summary["files_removed"] = len(set(old_files) - set(new_files))
+
+        # A chunk shared by several files is stored once and stays in the collection while any
+        # file references it; its metadata comes from the first of those files
+        old_owners = self._chunk_owners(old_files)
+        new_owners = self._chunk_owners(new_files)
+
+        removed = sorted(set(old_owners) - set(new_owners))
+        if removed:
+            self.collection.delete(ids=removed)
+        summary["chunks_deleted"] = len(removed)
+
+        refreshed = {}  # source file -> ids whose metadata now comes from it
+        for chunk_id, owner in new_owners.items():
+            old_owner = old_owners.get(chunk_id)
+            if old_owner is not None and old_files[old_owner].get("metadata") != new_files[owner]["metadata"]:
+                refreshed.setdefault(owner, []).append(chunk_id)
+        for owner, ids in refreshed.items():
+            # Name/description changed: refresh metadata without re-embedding
+            self.collection.update(ids=ids, metadatas=[new_files[owner]["metadata"]] * len(ids))
+        summary["chunks_kept"] = len(new_owners) - len(set(new_owners) - set(old_owners))
+
+        # Embed only what is new, in batches
+        to_add = [(chunk_id, documents[chunk_id], new_files[owner]["metadata"])
+                  for chunk_id, owner in new_owners.items() if chunk_id not in old_owners]
+        for start in range(0, len(to_add), EMBED_BATCH_SIZE):
+            batch = to_add[start:start + EMBED_BATCH_SIZE]
+            self.collection.upsert(
+                ids=[item[0] for item in batch],
+                documents=[item[1] for item in batch],
+                metadatas=[item[2] for item in batch]
+            )
+        summary["chunks_added"] = len(to_add)
+
+        if full or rechunk or new_files != old_files:
+            self._save_manifest({"version": MANIFEST_VERSION, "files": new_files})
+        summary["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return summary
+
+    @staticmethod
+    def _chunk_owners(files: Dict) -> Dict[str, str]:
+        """Chunk id -> first file (by name) that references it"""
+        owners = {}
+        for filename in sorted(files):
+            for chunk_id in files[filename]["chunk_ids"]:
+                owners.setdefault(chunk_id, filename)
+        return owners
+
+def main():
+    parser = argparse.ArgumentParser(description="Index Data/*.txt into the services_knowledge collection")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--manifest", default=None, help="Manifest path (default: <CHROMA_PATH>/knowledge_manifest.json)")
+    parser.add_argument("--full", action="store_true", help="Drop everything and re-embed from scratch")
+    args = parser.parse_args()
+
+    from app.knowledge_base import get_collection
+    from app.vector_index import MmapVectorIndex, RETRIEVAL_BACKEND
+    collection = get_collection()
+    indexer = KnowledgeIndexer(collection, args.data_dir, args.manifest)
+    summary = indexer.index(full=args.full)
+    print(json.dumps(summary, indent=2))
+
+    # Keep the memory-mapped retrieval index in step with the collection
+    index = MmapVectorIndex()
+    changed = summary["chunks_added"] or summary["chunks_deleted"] or summary["files_indexed"]
+    if (RETRIEVAL_BACKEND == "mmap" or index.exists()) and (changed or not index.exists()):
+        index.build_from_collection(collection)
+        print(f"Rebuilt vector index at {index.vectors_path}")
+
+
+if __name__ == "__main__":
+    main()
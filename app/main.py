@@ -1,28 +1,71 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 import os
 import tempfile
-import google.generativeai as genai
 from dotenv import load_dotenv
 import asyncio
-import queue
 import threading
-from typing import Optional
+import time
+from typing import List, Optional
 import json
 from datetime import datetime
-import soundcard as sc
 import numpy as np
 import wave
 import io
 import base64
+from app.audio_protocol import parse_frame, build_wav, FrameError, CODEC_PCM_S16LE, CODEC_FLAC, CODEC_OGG_OPUS
+from app.audio_codecs import CodecError, CODEC_MIME_TYPES, FILE_MIME_TYPES, decode_audio, encode_audio, audio_file_info
+from app.transcription_executor import TranscriptionExecutor, OrderedResults
+from app.vad import VADConfig, VADStats, VoiceActivityGate
+from app.admission import AdmissionController, CLOSE_TRY_AGAIN_LATER
+from app.call_policy import policy_from_env
+from app.transcription_batcher import TranscriptionBatcher, BATCH_GENERATION_CONFIG
+from app.audio_buffer import AudioStream
+from app.audio_capture import AudioCapture
+from app.audio_segmenter import iter_audio_segments
+from app.audio_normalize import AudioNormalizer
+from app.transcription_cache import TranscriptionCache, wav_cache_payload
+from app.transcript_overlap import trim_overlap
+from app.zoom_integration import zoom_client
+from app.zoom_outbox import ZoomOutbox
+from app.recommendation_service import recommendation_service
+from app.meeting_store import meeting_store
+from app.metrics import MeetingTracker, stage_metrics, monitor_event_loop, render_prometheus
+from app.worker_pool import SERVING_WORKERS, WorkerPool
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini API and pre-load model
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-transcription_model = genai.GenerativeModel("gemini-2.0-flash-001")
+# Gemini is configured on first use (or by the startup warm-up), not at import
+TRANSCRIPTION_MODEL_NAME = "gemini-2.0-flash-001"
+TRANSCRIPTION_PROMPT = "Transcribe the following audio precisely. Just return the transcription text with no additional commentary."
+_transcription_model = None
+_transcription_model_lock = threading.Lock()
+
+def get_transcription_model():
+    """Import the Gemini SDK and build the model once, thread-safely"""
+    global _transcription_model
+    if _transcription_model is None:
+        with _transcription_model_lock:
+            if _transcription_model is None:
+                import google.generativeai as genai
+                endpoint = os.getenv("GEMINI_API_ENDPOINT")
+                if endpoint:
+                    # Alternate endpoint (e.g. the load-test stand-in); only the REST transport accepts http://
+                    genai.configure(api_key=os.getenv("GEMINI_API_KEY"), transport="rest",
+                                    client_options={"api_endpoint": endpoint})
+                else:
+                    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+                _transcription_model = genai.GenerativeModel(TRANSCRIPTION_MODEL_NAME)
+    return _transcription_model
+
+def generate_content(content, timeout: Optional[float] = None, generation_config: Optional[dict] = None):
+    """Blocking Gemini call; runs on the transcription executor"""
+    request_options = {"timeout": timeout} if timeout else None
+    return get_transcription_model().generate_content(content, generation_config=generation_config,
+                                                      request_options=request_options)
 
 app = FastAPI(title="Zoom Transcription API",
              description="API for transcribing Zoom meetings and generating recommendations",
@@ -37,12 +80,71 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global queues for processing
-transcription_queue = queue.Queue()
-recommendation_queue = queue.Queue()
+# Blocking Gemini calls run here so they never stall the event loop
+TRANSCRIPTION_CONCURRENCY = int(os.getenv("TRANSCRIPTION_CONCURRENCY", "4"))
+transcription_executor = TranscriptionExecutor(max_workers=TRANSCRIPTION_CONCURRENCY)
+
+# Optional cross-meeting micro-batching of short segments (0 = one request per segment)
+TRANSCRIPTION_BATCH_WINDOW_MS = float(os.getenv("TRANSCRIPTION_BATCH_WINDOW_MS", "0"))
+TRANSCRIPTION_BATCH_MAX_SEGMENTS = int(os.getenv("TRANSCRIPTION_BATCH_MAX_SEGMENTS", "8"))
+TRANSCRIPTION_BATCH_MAX_SEGMENT_SECONDS = float(os.getenv("TRANSCRIPTION_BATCH_MAX_SEGMENT_SECONDS", "15"))
+TRANSCRIPTION_BATCH_MAX_SECONDS = float(os.getenv("TRANSCRIPTION_BATCH_MAX_SECONDS", "60"))
+
+# Deadline, hedging, retries and circuit breaking for Gemini calls
+transcription_policy = policy_from_env("gemini", "GEMINI", deadline_seconds=30.0)
+
+# Bounded in-flight work per meeting and overall; overload degrades the busiest meetings first
+admission = AdmissionController(
+    max_meetings=int(os.getenv("MAX_MEETINGS", "0")),
+    max_in_flight=int(os.getenv("MAX_TRANSCRIPTIONS_IN_FLIGHT", str(2 * TRANSCRIPTION_CONCURRENCY))),
+    meeting_in_flight=int(os.getenv("MEETING_TRANSCRIPTIONS_IN_FLIGHT", "2")),
+    meeting_queue=int(os.getenv("MEETING_QUEUE_LIMIT", "4")),
+    policy=os.getenv("OVERLOAD_POLICY", "merge"),
+    merge_max_seconds=float(os.getenv("OVERLOAD_MERGE_MAX_SECONDS", "30")),
+    min_chunk_ms=int(os.getenv("FLOW_CONTROL_MIN_CHUNK_MS", "1000"))
+)
+
+# Voice-activity gating: silent audio never reaches Gemini
+VAD_ENABLED = os.getenv("VAD_ENABLED", "true").lower() == "true"
+
+# Per-meeting pipeline state for /status and /metrics
+meeting_tracker = MeetingTracker()
+
+# Long uploads are streamed to disk and transcribed as silence-bounded segments
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+SEGMENT_MAX_SECONDS = float(os.getenv("SEGMENT_MAX_SECONDS", "30"))
+SEGMENT_CONCURRENCY = int(os.getenv("SEGMENT_CONCURRENCY", "4"))
+
+# Words repeated where overlapping windows meet are dropped, at most this many per second of overlap (0 keeps them)
+OVERLAP_WORDS_PER_SECOND = float(os.getenv("TRANSCRIPT_OVERLAP_WORDS_PER_SECOND", "3"))
+
+# Container for audio sent to Gemini: flac (lossless, about half the bytes of wav), opus or wav
+MODEL_AUDIO_CODEC = {"wav": CODEC_PCM_S16LE, "flac": CODEC_FLAC, "opus": CODEC_OGG_OPUS}[
+    os.getenv("MODEL_AUDIO_FORMAT", "flac").lower()
+]
+
+# Identical audio (client retries, reprocessed meetings) is only transcribed once
+transcription_cache = TranscriptionCache(
+    max_entries=int(os.getenv("TRANSCRIPTION_CACHE_SIZE", "1024")),
+    disk_path=os.getenv("TRANSCRIPTION_CACHE_DB") or None,
+    disk_max_bytes=int(os.getenv("TRANSCRIPTION_CACHE_MAX_MB", "256")) * 1024 * 1024,
+    max_age_seconds=float(os.getenv("TRANSCRIPTION_CACHE_MAX_AGE_HOURS", "168")) * 3600
+)
+
+# Zoom chat delivery runs off the request path, coalesced and rate limited
+ZOOM_CHANNEL_NAME = os.getenv("ZOOM_CHANNEL_NAME", "Meeting Recommendations")
+zoom_outbox = ZoomOutbox(
+    zoom_client,
+    window_seconds=float(os.getenv("ZOOM_OUTBOX_WINDOW_SECONDS", "3")),
+    max_chars=int(os.getenv("ZOOM_OUTBOX_MAX_CHARS", "3000")),
+    rate=float(os.getenv("ZOOM_OUTBOX_RATE", "5")),
+    burst=float(os.getenv("ZOOM_OUTBOX_BURST", "10")),
+    workers=int(os.getenv("ZOOM_OUTBOX_WORKERS", "4")),
+    max_retries=int(os.getenv("ZOOM_OUTBOX_MAX_RETRIES", "5"))
+)
 
 # Add audio capture configuration
-AUDIO_CHUNK_SIZE = 1024
+AUDIO_CHUNK_SIZE = 1600  # frames per capture block: 100 ms at 16 kHz
 AUDIO_SAMPLE_RATE = 16000
 AUDIO_CHANNELS = 1
 AUDIO_FORMAT = np.int16
@@ -53,102 +155,216 @@ class TranscriptionRequest(BaseModel):
     auto_send_to_zoom: bool = False
     audio_data: Optional[bytes] = None  # Base64 encoded audio data
 
+class TranscriptSegment(BaseModel):
+    index: int
+    start: float
+    end: float
+    transcription: Optional[str] = None
+
 class TranscriptionResponse(BaseModel):
     meeting_id: str
     transcription: str
     timestamp: str
     status: str
+    segments: Optional[List[TranscriptSegment]] = None
 
-# Initialize audio capture with lazy loading
-class AudioCapture:
-    def __init__(self):
-        self.is_running = False
-        self.recording_thread = None
-        self.audio_queue = queue.Queue()
-        self.current_meeting_id = None
-        self._speaker = None
-        
-    def _get_speaker(self):
-        if self._speaker is None:
-            self._speaker = sc.default_speaker()
-        return self._speaker
-        
-    def start_capture(self, meeting_id: str):
-        if self.is_running:
-            return False
-            
-        self.is_running = True
-        self.current_meeting_id = meeting_id
-        self.recording_thread = threading.Thread(target=self._capture_audio)
-        self.recording_thread.start()
-        return True
+# Initialize audio capture
+audio_capture = AudioCapture(AUDIO_SAMPLE_RATE, AUDIO_CHANNELS, AUDIO_CHUNK_SIZE)
+capture_session = None
+capture_tasks = set()  # sessions being closed after the recorder failed
+
+async def call_gemini(content, generation_config: Optional[dict] = None) -> str:
+    """One Gemini request under the call policy, on the transcription executor; returns the text"""
+    async def attempt(timeout: float):
+        submitted = time.perf_counter()
         
-    def stop_capture(self):
-        self.is_running = False
-        if self.recording_thread:
-            self.recording_thread.join()
-        self.current_meeting_id = None
+        def timed_generate_content():
+            # Time spent waiting for a free executor thread vs. in the Gemini call itself
+            waited = time.perf_counter() - submitted
+            stage_metrics.observe("model_queue", waited)
+            with stage_metrics.time("model_call"):
+                # The SDK gives up when the policy does, so a stuck request frees its thread
+                return generate_content(content, max(timeout - waited, 0.001), generation_config)
         
-    def _capture_audio(self):
-        try:
-            speaker = self._get_speaker()
-            
-            # Create a recorder
-            with speaker.recorder(samplerate=AUDIO_SAMPLE_RATE, 
-                                channels=AUDIO_CHANNELS) as recorder:
-                while self.is_running:
-                    # Record a chunk of audio
-                    audio_data = recorder.record(numframes=AUDIO_CHUNK_SIZE)
-                    
-                    # Convert to bytes
-                    audio_bytes = (audio_data * 32767).astype(np.int16).tobytes()
-                    
-                    # Add to queue for processing
-                    self.audio_queue.put({
-                        "meeting_id": self.current_meeting_id,
-                        "audio_data": audio_bytes,
-                        "timestamp": datetime.now().isoformat()
-                    })
-                    
-        except Exception as e:
-            print(f"Error in audio capture: {e}")
-            self.is_running = False
+        return await transcription_executor.run(timed_generate_content)
+    
+    response = await transcription_policy.call(attempt)
+    return response.text.strip()
 
-# Initialize audio capture
-audio_capture = AudioCapture()
+async def transcribe_payload(audio_data: bytes, mime_type: str = "audio/wav") -> str:
+    content = [
+        {"text": TRANSCRIPTION_PROMPT},
+        {
+            "inline_data": {
+                "mime_type": mime_type,
+                "data": audio_data
+            }
+        }
+    ]
+    return await call_gemini(content)
+
+async def generate_batch(content) -> str:
+    return await call_gemini(content, BATCH_GENERATION_CONFIG)
+
+transcription_batcher = None
+if TRANSCRIPTION_BATCH_WINDOW_MS > 0:
+    transcription_batcher = TranscriptionBatcher(generate_batch, transcribe_payload,
+                                                 window_seconds=TRANSCRIPTION_BATCH_WINDOW_MS / 1000,
+                                                 max_segments=TRANSCRIPTION_BATCH_MAX_SEGMENTS,
+                                                 max_batch_seconds=TRANSCRIPTION_BATCH_MAX_SECONDS)
+
+async def generate_transcription(audio_data: bytes, cache_key: str, mime_type: str = "audio/wav",
+                                 seconds: Optional[float] = None):
+    """Transcribe audio with Gemini, consulting the transcription cache first.
+    
+    Segments of known length up to TRANSCRIPTION_BATCH_MAX_SEGMENT_SECONDS go
+    through the micro-batcher when it is enabled.
+    """
+    cached = await transcription_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    return await transcribe_uncached(audio_data, cache_key, mime_type, seconds)
+
+async def transcribe_uncached(audio_data: bytes, cache_key: str, mime_type: str = "audio/wav",
+                              seconds: Optional[float] = None):
+    """Transcribe audio known to miss the cache, and cache the result"""
+    if transcription_batcher is not None and seconds is not None and seconds <= TRANSCRIPTION_BATCH_MAX_SEGMENT_SECONDS:
+        transcription = await transcription_batcher.transcribe(audio_data, mime_type, seconds)
+    else:
+        transcription = await transcribe_payload(audio_data, mime_type)
+    transcription_cache.put(cache_key, transcription)
+    return transcription
+
+async def save_upload(file: UploadFile, suffix: str = '.wav') -> str:
+    """Stream an upload to a temporary file in bounded chunks; returns its path"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            temp_file.write(chunk)
+        return temp_file.name
+
+async def transcribe_whole_file(audio_file_path: str, mime_type: str = "audio/wav"):
+    """Send the file in one request: short FLAC/Ogg uploads, and WAV variants the segmenter can't read"""
+    with open(audio_file_path, "rb") as f:
+        audio_data = f.read()
+    
+    pcm, sample_rate, channels, sample_width = wav_cache_payload(audio_data)
+    cache_key = transcription_cache.key(pcm, sample_rate, channels, TRANSCRIPTION_MODEL_NAME,
+                                        TRANSCRIPTION_PROMPT, sample_width)
+    transcription = await generate_transcription(audio_data, cache_key, mime_type)
+    return TranscriptSegment(index=0, start=0.0, end=0.0, transcription=transcription)
+
+async def transcribe_segments(audio_file_path: str, meeting_id: str):
+    """Yield TranscriptSegments as they finish (not necessarily in order).
+    
+    Segments are read lazily, so at most SEGMENT_CONCURRENCY of them are in
+    memory or in flight at any time.
+    """
+    mime_type = FILE_MIME_TYPES[os.path.splitext(audio_file_path)[1]]
+    whole_file = False
+    try:
+        if mime_type != "audio/wav":
+            # Gemini takes FLAC and Ogg as they are; only files too long for one request are decoded and cut
+            duration, _, _ = await asyncio.to_thread(audio_file_info, audio_file_path)
+            whole_file = duration <= SEGMENT_MAX_SECONDS
+        if not whole_file:
+            segments = iter_audio_segments(audio_file_path, SEGMENT_MAX_SECONDS,
+                                           sample_rate=AUDIO_SAMPLE_RATE, channels=AUDIO_CHANNELS)
+            first = await asyncio.to_thread(next, segments, None)
+    except (ValueError, EOFError, wave.Error) as e:
+        print(f"Segmenting not possible ({e}); transcribing the file in one request")
+        whole_file = True
+    
+    if whole_file:
+        segment = await transcribe_whole_file(audio_file_path, mime_type)
+        store_segment(meeting_id, segment)
+        yield segment
+        return
+    
+    async def transcribe_segment(index, window):
+        transcription = await process_audio_chunk(window.pcm.tobytes(), meeting_id,
+                                                  window.sample_rate, window.channels)
+        return TranscriptSegment(index=index, start=round(window.start_time, 3),
+                                 end=round(window.end_time, 3), transcription=transcription)
+    
+    pending = set()
+    index = 0
+    window = first
+    while window is not None or pending:
+        while window is not None and len(pending) < SEGMENT_CONCURRENCY:
+            pending.add(asyncio.create_task(transcribe_segment(index, window)))
+            index += 1
+            window = await asyncio.to_thread(next, segments, None)
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            segment = task.result()
+            store_segment(meeting_id, segment)
+            yield segment
+
+def store_segment(meeting_id: Optional[str], segment: TranscriptSegment):
+    if meeting_id and segment.transcription:
+        meeting_store.append(meeting_id, "transcription", {
+            "transcription": segment.transcription,
+            "window_start": segment.start,
+            "window_end": segment.end,
+            "source": "upload"
+        })
+
+def stitch_segments(segments: List[TranscriptSegment]) -> str:
+    parts = []
+    previous = None
+    for seg in sorted(segments, key=lambda seg: seg.index):
+        if not seg.transcription:
+            continue
+        text = seg.transcription
+        if previous is not None and seg.start < previous.end:
+            text = trim_overlap(previous.transcription, text, previous.end - seg.start, OVERLAP_WORDS_PER_SECOND)
+        parts.append(text)
+        previous = seg
+    return "\n".join(parts)
 
 # Background task for processing transcriptions
-async def process_transcription(audio_file_path: str, meeting_id: str):
+async def process_transcription(audio_file_path: str, meeting_id: str, auto_send_to_zoom: bool = False):
+    """Transcribe an audio file segment by segment; returns the segments in order"""
+    segments = [segment async for segment in transcribe_segments(audio_file_path, meeting_id)]
+    segments.sort(key=lambda seg: seg.index)
+    transcription = stitch_segments(segments)
+    
+    # Hand off to the in-process recommendation engine
+    recommendation_service.submit({
+        "meeting_id": meeting_id,
+        "transcription": transcription,
+        "timestamp": datetime.now().isoformat(),
+        "auto_send_to_zoom": auto_send_to_zoom
+    })
+    
+    return segments
+
+async def stream_transcription_events(audio_file_path: str, meeting_id: str, auto_send_to_zoom: bool):
+    """Server-sent events: one `segment` event per finished segment, then `done`"""
+    segments = []
     try:
-        # Transcribe using Gemini
-        with open(audio_file_path, "rb") as f:
-            audio_data = f.read()
-            
-        content = [
-            {"text": "Transcribe the following audio precisely. Just return the transcription text with no additional commentary."},
-            {
-                "inline_data": {
-                    "mime_type": "audio/wav",
-                    "data": audio_data
-                }
-            }
-        ]
+        async for segment in transcribe_segments(audio_file_path, meeting_id):
+            segments.append(segment)
+            yield f"event: segment\ndata: {segment.json()}\n\n"
         
-        response = transcription_model.generate_content(content)
-        transcription = response.text.strip()
-        
-        # Add to recommendation queue
-        recommendation_queue.put({
+        transcription = stitch_segments(segments)
+        recommendation_service.submit({
             "meeting_id": meeting_id,
             "transcription": transcription,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now().isoformat(),
+            "auto_send_to_zoom": auto_send_to_zoom
         })
-        
-        return transcription
-        
+        done = {"meeting_id": meeting_id, "transcription": transcription,
+                "segments": len(segments), "failed": sum(1 for seg in segments if seg.transcription is None)}
+        yield f"event: done\ndata: {json.dumps(done)}\n\n"
     except Exception as e:
         print(f"Error in transcription: {e}")
-        return None
+        yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+    finally:
+        os.unlink(audio_file_path)
 
 @app.post("/transcribe", response_model=TranscriptionResponse)
 async def transcribe_audio(
@@ -156,147 +372,607 @@ async def transcribe_audio(
     file: UploadFile = File(...),
     meeting_id: str = None,
     user_id: str = None,
-    auto_send_to_zoom: bool = False
+    auto_send_to_zoom: bool = False,
+    stream: bool = False
 ):
-    if not file.filename.endswith('.wav'):
-        raise HTTPException(status_code=400, detail="Only WAV files are supported")
+    extension = os.path.splitext(file.filename.lower())[1]
+    if extension not in FILE_MIME_TYPES:
+        raise HTTPException(status_code=400, detail="Only WAV, FLAC and Ogg/Opus files are supported")
+    
+    # Stream the upload to disk instead of holding it in memory
+    temp_file_path = await save_upload(file, extension)
+    
+    if stream:
+        # Partial results are sent as server-sent events as segments finish
+        return StreamingResponse(
+            stream_transcription_events(temp_file_path, meeting_id, auto_send_to_zoom),
+            media_type="text/event-stream"
+        )
     
     try:
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_file_path = temp_file.name
-            
-        # Process transcription in background
-        transcription = await process_transcription(temp_file_path, meeting_id)
-        
+        segments = await process_transcription(temp_file_path, meeting_id, auto_send_to_zoom)
+    except Exception as e:
+        print(f"Error in transcription: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
         # Clean up
         os.unlink(temp_file_path)
+    
+    failed = sum(1 for seg in segments if seg.transcription is None)
+    if not segments or failed == len(segments):
+        raise HTTPException(status_code=500, detail="Transcription failed")
         
-        if not transcription:
-            raise HTTPException(status_code=500, detail="Transcription failed")
-            
-        return TranscriptionResponse(
-            meeting_id=meeting_id,
-            transcription=transcription,
-            timestamp=datetime.now().isoformat(),
-            status="success"
-        )
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return TranscriptionResponse(
+        meeting_id=meeting_id,
+        transcription=stitch_segments(segments),
+        timestamp=datetime.now().isoformat(),
+        status="success" if not failed else "partial",
+        segments=segments
+    )
 
 @app.get("/status/{meeting_id}")
 async def get_transcription_status(meeting_id: str):
-    # TODO: Implement status tracking
-    return {"status": "processing", "meeting_id": meeting_id}
+    if worker_pool is not None:
+        # The meeting's pipeline state lives in the worker that owns it
+        return await worker_pool.status(meeting_id)
+    state = meeting_tracker.get(meeting_id)
+    if state is None:
+        return {"status": "unknown", "meeting_id": meeting_id}
+    status = {"meeting_id": meeting_id, **state.to_dict()}
+    if state.vad_stats is not None:
+        status["vad"] = state.vad_stats.to_dict()
+    buffer_usage = audio_stream.memory_usage(meeting_id)
+    if buffer_usage:
+        status["buffer"] = buffer_usage
+    admission_state = admission.meeting_stats(meeting_id)
+    if admission_state:
+        status["admission"] = admission_state
+    status["stages"] = stage_metrics.to_dict()
+    return status
+
+@app.get("/meetings/{meeting_id}/events")
+async def get_meeting_events(meeting_id: str, since: int = 0, limit: int = 500, kind: Optional[str] = None):
+    """Transcriptions and recommendations of a meeting, oldest first.
+    
+    Poll with `since` set to the returned `next_cursor` to get only new events.
+    """
+    limit = max(1, min(limit, 5000))
+    events, next_cursor = await asyncio.to_thread(meeting_store.read, meeting_id, since, limit, kind)
+    return {"meeting_id": meeting_id, "events": events, "next_cursor": next_cursor}
+
+@app.get("/metrics")
+async def get_metrics():
+    cache = transcription_cache.stats()
+    zoom = zoom_outbox.stats()
+    recommendations = recommendation_service.stats()
+    store = meeting_store.stats()
+    load = admission.stats()
+    gauges = [
+        ("transcription_cache_hits_total", "counter", "Transcription cache hits", cache["hits"]),
+        ("transcription_cache_misses_total", "counter", "Transcription cache misses", cache["misses"]),
+        ("zoom_queue_depth", "gauge", "Transcriptions waiting in the Zoom outbox", zoom["queue_depth"]),
+        ("zoom_messages_sent_total", "counter", "Transcriptions delivered to Zoom", zoom["messages_sent"]),
+        ("zoom_messages_failed_total", "counter", "Transcriptions dropped after retries", zoom["failed"]),
+        ("recommendations_pending_meetings", "gauge", "Meetings waiting out the recommendation debounce",
+         recommendations["pending_meetings"]),
+        ("recommendations_total", "counter", "Recommendations generated", recommendations["recommendations"]),
+        ("recommendations_reused_total", "counter", "Recommendations reused from the semantic cache",
+         recommendations["reused"]),
+        ("recommendation_errors_total", "counter", "Recommendation failures", recommendations["errors"]),
+        ("meeting_store_pending", "gauge", "Meeting events waiting to be written", store["pending"]),
+        ("meeting_store_errors_total", "counter", "Meeting events that failed to be written", store["errors"]),
+        ("admission_running", "gauge", "Transcriptions holding a model slot", load["running"]),
+        ("admission_queued", "gauge", "Speech segments waiting for a model slot", load["queued"]),
+        ("admission_throttled_meetings", "gauge", "Meetings told to slow down", load["throttled_meetings"]),
+        ("admission_merged_total", "counter", "Segments merged into a queued one under overload", load["merged"]),
+        ("admission_dropped_total", "counter", "Segments dropped under overload", load["dropped"]),
+        ("admission_rejected_meetings_total", "counter", "Meetings refused at connect", load["rejected_meetings"]),
+    ]
+    for provider, policy in (("gemini", transcription_policy), ("groq", recommendation_service.call_policy)):
+        calls = policy.stats()
+        gauges += [
+            (f"{provider}_calls_total", "counter", f"{provider} calls", calls["calls"]),
+            (f"{provider}_call_failures_total", "counter", f"{provider} calls that failed after retries", calls["failures"]),
+            (f"{provider}_retries_total", "counter", f"{provider} attempts retried", calls["retries"]),
+            (f"{provider}_hedges_total", "counter", f"{provider} hedged duplicate requests", calls["hedges"]),
+            (f"{provider}_short_circuited_total", "counter", f"{provider} calls refused by the open circuit",
+             calls["short_circuited"]),
+            (f"{provider}_circuit_open", "gauge", f"1 while the {provider} circuit breaker is not closed",
+             int(calls["breaker"] != "closed")),
+        ]
+    if transcription_batcher is not None:
+        batching = transcription_batcher.stats()
+        gauges += [
+            ("transcription_batches_total", "counter", "Batched Gemini requests", batching["batches"]),
+            ("transcription_batched_segments_total", "counter", "Segments sent in batched requests",
+             batching["batched_segments"]),
+            ("transcription_batch_fallbacks_total", "counter", "Batched segments retried one by one",
+             batching["fallbacks"]),
+        ]
+    if worker_pool is not None:
+        pool = worker_pool.stats()
+        gauges += [
+            ("workers_alive", "gauge", "Live worker processes", pool["alive"]),
+            ("worker_meetings", "gauge", "Meetings relayed to worker processes", pool["meetings"]),
+            ("worker_ring_used_bytes", "gauge", "Audio waiting in worker shared-memory rings", sum(pool["ring_used_bytes"])),
+            ("worker_dropped_chunks_total", "counter", "Chunks dropped because a worker fell behind", pool["dropped_chunks"]),
+            ("worker_restarts_total", "counter", "Worker processes restarted after dying", pool["restarts"]),
+        ]
+    return PlainTextResponse(render_prometheus(meeting_tracker, gauges),
+                             media_type="text/plain; version=0.0.4")
 
 @app.get("/health")
 async def health_check():
+    # Liveness only: answers as soon as the process is up, before models load
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
-class AudioStream:
-    def __init__(self):
-        self.streams = {}  # meeting_id -> audio buffer
-        
-    def add_audio_chunk(self, meeting_id: str, audio_data: bytes):
-        if meeting_id not in self.streams:
-            self.streams[meeting_id] = []
-        self.streams[meeting_id].append(audio_data)
-        
-    def get_audio_chunk(self, meeting_id: str):
-        if meeting_id in self.streams and self.streams[meeting_id]:
-            return self.streams[meeting_id].pop(0)
-        return None
+@app.get("/ready")
+async def readiness_check():
+    if worker_pool is None:
+        return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+    ready = readiness["ready"] and worker_pool.ready
+    body = {**readiness, "ready": ready, "workers": worker_pool.stats()}
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    return transcription_cache.stats()
+
+@app.get("/zoom/stats")
+async def get_zoom_stats():
+    return zoom_outbox.stats()
+
+@app.get("/providers/stats")
+async def get_provider_stats():
+    stats = {"gemini": transcription_policy.stats(), "groq": recommendation_service.call_policy.stats()}
+    if transcription_batcher is not None:
+        stats["gemini"]["batching"] = transcription_batcher.stats()
+    return stats
+
+@app.get("/admission/stats")
+async def get_admission_stats():
+    return admission.stats()
+
+@app.get("/recommendations/stats")
+async def get_recommendation_stats():
+    return recommendation_service.stats()
+
+# Readiness is reported separately from liveness while models warm up
+WARM_UP_ON_STARTUP = os.getenv("WARM_UP_ON_STARTUP", "true").lower() == "true"
+readiness = {"ready": False, "components": {}}
+warm_up_task = None
+event_loop_monitor = None
+
+# With SERVING_WORKERS > 0, websocket meetings are transcribed in worker processes
+worker_pool = None
+
+async def warm_up():
+    """Preload heavy dependencies in the background so the first request doesn't pay for them"""
+    components = [
+        ("transcription_model", get_transcription_model),
+        ("recommendations", recommendation_service.warm_up)
+    ]
+    for name, loader in components:
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(loader)
+            readiness["components"][name] = {"status": "loaded", "seconds": round(time.perf_counter() - started, 3)}
+        except Exception as e:
+            print(f"Warm-up of {name} failed: {e}")
+            readiness["components"][name] = {"status": "error", "error": str(e)}
+    # Transcription is the core path; recommendations failing to load degrade but don't block
+    readiness["ready"] = readiness["components"]["transcription_model"]["status"] == "loaded"
+
+@app.on_event("startup")
+async def start_background_services():
+    global warm_up_task, event_loop_monitor, worker_pool
+    event_loop_monitor = asyncio.create_task(monitor_event_loop())
+    if SERVING_WORKERS > 0:
+        worker_pool = WorkerPool(SERVING_WORKERS)
+        worker_pool.start()
+    await zoom_outbox.start()
+    await recommendation_service.start()
+    if WARM_UP_ON_STARTUP:
+        warm_up_task = asyncio.create_task(warm_up())
+    else:
+        readiness["ready"] = True
+
+@app.on_event("shutdown")
+async def shutdown_transcription_executor():
+    if event_loop_monitor is not None:
+        event_loop_monitor.cancel()
+    if capture_session is not None:
+        await stop_server_capture()
+    if worker_pool is not None:
+        await asyncio.to_thread(worker_pool.stop)
+    await recommendation_service.stop()
+    await zoom_outbox.stop()
+    meeting_store.close()
+    transcription_executor.shutdown(wait=False)
+    transcription_cache.close()
+    await zoom_client.aclose()
+
+# Initialize audio stream manager: bounded per-meeting ring buffers,
+# transcribed as overlapping windows rather than client-sized chunks
+audio_stream = AudioStream(
+    buffer_seconds=float(os.getenv("AUDIO_BUFFER_SECONDS", "60")),
+    window_seconds=float(os.getenv("AUDIO_WINDOW_SECONDS", "10")),
+    overlap_seconds=float(os.getenv("AUDIO_WINDOW_OVERLAP_SECONDS", "1"))
+)
+
+async def decode_audio_message(message):
+    """(audio, sample_rate, channels, seq) from a websocket message, or None if it has no audio.
+    
+    Binary frames carry a fixed header plus raw PCM or a FLAC/Ogg file, which
+    is decoded on a worker thread; text frames are the legacy base64-in-JSON
+    format. Raises FrameError or CodecError for malformed frames.
+    """
+    decode_started = time.perf_counter()
+    if message.get("bytes") is not None:
+        frame = parse_frame(message["bytes"])
+        decoded = (frame.payload, frame.sample_rate, frame.channels, frame.seq)
+    else:
+        data = json.loads(message["text"])
+        if "audio_data" not in data:
+            return None
+        decoded = (base64.b64decode(data["audio_data"]), AUDIO_SAMPLE_RATE, AUDIO_CHANNELS, None)
+    stage_metrics.observe("decode", time.perf_counter() - decode_started)
+    
+    if message.get("bytes") is not None and frame.codec != CODEC_PCM_S16LE:
+        decode_started = time.perf_counter()
+        pcm, sample_rate, channels = await asyncio.to_thread(decode_audio, frame.payload)
+        stage_metrics.observe("audio_decode", time.perf_counter() - decode_started)
+        decoded = (pcm, sample_rate, channels, frame.seq)
+    return decoded
+
+class MeetingSession:
+    """Transcription pipeline of one connected meeting.
+    
+    Audio in any other rate or channel layout is first normalized to
+    AUDIO_SAMPLE_RATE mono, then buffered into overlapping windows, gated
+    through VAD and transcribed concurrently; transcriptions reach `send` (the client, if
+    any), Zoom and the recommendation engine in chunk order. Used by the
+    websocket handler, worker processes and server-side capture.
+    """
+    
+    def __init__(self, meeting_id: str, vad_config: VADConfig, send=None, source: str = "websocket"):
+        self.meeting_id = meeting_id
+        # VAD counters live on the tracker entry: kept across reconnects, evicted with it
+        state = meeting_tracker.connected(meeting_id)
+        if state.vad_stats is None:
+            state.vad_stats = VADStats()
+        self.vad_gate = VoiceActivityGate(vad_config, state.vad_stats)
         
-    def clear_stream(self, meeting_id: str):
-        if meeting_id in self.streams:
-            del self.streams[meeting_id]
+        # Chunks are transcribed concurrently; results are delivered in chunk order
+        self.results = OrderedResults()
+        self._delivery = asyncio.create_task(deliver_transcriptions(send, meeting_id, self.results, source))
+        self._normalizer = None
+        self._send = send
+        self._flow_messages = set()
+        admission.attach(meeting_id, self._notify if send is not None else None)
+    
+    def _notify(self, message):
+        """Flow-control message to the client; sent right away, not behind queued transcriptions"""
+        task = asyncio.ensure_future(self._send_flow_control({"meeting_id": self.meeting_id, **message}))
+        self._flow_messages.add(task)
+        task.add_done_callback(self._flow_messages.discard)
+    
+    async def _send_flow_control(self, message):
+        try:
+            await self._send(message)
+        except Exception:
+            pass  # the client is gone; the receive loop will notice
+    
+    def add_audio(self, audio_data, sample_rate: int, channels: int, seq=None):
+        """Add audio chunk to stream, then transcribe every window that is ready"""
+        meeting_tracker.chunk_received(self.meeting_id, getattr(audio_data, "nbytes", len(audio_data)))
+        if (sample_rate, channels) != (AUDIO_SAMPLE_RATE, AUDIO_CHANNELS):
+            audio_data = self._normalize(audio_data, sample_rate, channels)
+            sample_rate, channels = AUDIO_SAMPLE_RATE, AUDIO_CHANNELS
+        self._buffer_audio(audio_data, seq)
+    
+    def _normalize(self, audio_data, sample_rate: int, channels: int):
+        # The resampler keeps state between chunks, so there is one per meeting and input format
+        if self._normalizer is None or self._normalizer.source != (sample_rate, channels):
+            self._normalizer = AudioNormalizer(sample_rate, channels, AUDIO_SAMPLE_RATE, AUDIO_CHANNELS)
+        with stage_metrics.time("normalize"):
+            return self._normalizer.process(np.frombuffer(audio_data, dtype=np.int16))
+    
+    def _buffer_audio(self, audio_data, seq=None):
+        audio_stream.add_audio_chunk(self.meeting_id, audio_data, AUDIO_SAMPLE_RATE, AUDIO_CHANNELS)
+        while True:
+            window = audio_stream.get_audio_chunk(self.meeting_id)
+            if window is None:
+                break
+            submit_window(self.results, self.vad_gate, window, self.meeting_id, seq)
+    
+    async def close(self):
+        """Flush buffered audio and wait for every transcription to be delivered"""
+        # Let in-flight chunks finish so their transcriptions still reach Zoom
+        if self._normalizer is not None:
+            self._buffer_audio(self._normalizer.flush())
+        window = audio_stream.flush_stream(self.meeting_id)
+        if window is not None:
+            submit_window(self.results, self.vad_gate, window, self.meeting_id)
+        speech = self.vad_gate.flush()
+        if speech:
+            queue_speech(self.results, self.meeting_id, {}, speech)
+        self.results.close()
+        try:
+            await self._delivery
+        finally:
+            # Even if the connection task is cancelled, the meeting's slot is given back
+            admission.release(self.meeting_id)
+        audio_stream.clear_stream(self.meeting_id)
+        meeting_tracker.connected(self.meeting_id, False)
+
+@app.post("/capture/{meeting_id}/start")
+async def start_server_capture(meeting_id: str):
+    """Record the server's speaker loopback and transcribe it as meeting `meeting_id`"""
+    global capture_session
+    if audio_capture.is_running or capture_session is not None:
+        raise HTTPException(status_code=409, detail=f"Already capturing meeting {audio_capture.current_meeting_id}")
+    
+    session = MeetingSession(meeting_id, VADConfig(enabled=VAD_ENABLED), source="capture")
+    
+    next_frame = 0
+    
+    def feed(pcm, start_frame):
+        # Runs on the event loop; add_audio copies the block into the meeting's ring buffer
+        nonlocal next_frame
+        if start_frame > next_frame:
+            # Blocks the recorder dropped: fill in silence so window times stay on the capture clock
+            gap = np.zeros((start_frame - next_frame) * AUDIO_CHANNELS, dtype=np.int16)
+            session.add_audio(gap, AUDIO_SAMPLE_RATE, AUDIO_CHANNELS, next_frame // AUDIO_CHUNK_SIZE)
+        next_frame = start_frame + len(pcm) // AUDIO_CHANNELS
+        session.add_audio(pcm, AUDIO_SAMPLE_RATE, AUDIO_CHANNELS, start_frame // AUDIO_CHUNK_SIZE)
+    
+    def failed(error):
+        # The recorder died (e.g. no loopback device): end the meeting so capture can be started again;
+        # /capture/status keeps reporting the error
+        global capture_session
+        if capture_session is session:
+            capture_session = None
+            task = asyncio.ensure_future(session.close())
+            capture_tasks.add(task)
+            task.add_done_callback(capture_tasks.discard)
+    
+    capture_session = session
+    audio_capture.start_capture(meeting_id, feed, on_error=failed)
+    return audio_capture.stats()
+
+@app.post("/capture/stop")
+async def stop_server_capture():
+    global capture_session
+    if capture_session is None:
+        raise HTTPException(status_code=409, detail="No capture is running")
+    session, capture_session = capture_session, None
+    await asyncio.to_thread(audio_capture.stop_capture)
+    await session.close()
+    return {**audio_capture.stats(), "meeting_id": session.meeting_id}
 
-# Initialize audio stream manager
-audio_stream = AudioStream()
+@app.get("/capture/status")
+async def get_capture_status():
+    return audio_capture.stats()
 
 @app.websocket("/ws/transcribe/{meeting_id}")
 async def websocket_transcribe(websocket: WebSocket, meeting_id: str):
     await websocket.accept()
     
+    # Per-meeting VAD thresholds can be passed as query parameters,
+    # e.g. /ws/transcribe/abc?energy_threshold_db=-40&hangover_ms=500
+    try:
+        vad_config = VADConfig(**{"enabled": VAD_ENABLED, **websocket.query_params})
+    except Exception as e:
+        await websocket.close(code=1008, reason=f"Invalid VAD config: {e}")
+        return
+    
+    refused = admission.admit(meeting_id)
+    if refused:
+        await websocket.close(code=CLOSE_TRY_AGAIN_LATER, reason=refused)
+        return
+    
+    if worker_pool is not None:
+        # Workers apply the in-flight budgets; here only the meeting limit counts
+        try:
+            await relay_to_worker(websocket, meeting_id, vad_config)
+        finally:
+            admission.release(meeting_id)
+        return
+    
+    session = MeetingSession(meeting_id, vad_config, websocket.send_json)
     try:
         while True:
-            # Receive audio data from client
-            data = await websocket.receive_json()
-            
-            if "audio_data" in data:
-                # Add audio chunk to stream
-                audio_data = base64.b64decode(data["audio_data"])
-                audio_stream.add_audio_chunk(meeting_id, audio_data)
-                
-                # Process audio chunk
-                transcription = await process_audio_chunk(audio_data, meeting_id)
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            try:
+                decoded = await decode_audio_message(message)
+            except (FrameError, CodecError) as e:
+                await websocket.send_json({"meeting_id": meeting_id, "error": str(e)})
+                continue
+            if decoded is not None:
+                session.add_audio(*decoded)
                 
-                if transcription:
-                    # Send transcription to client
-                    await websocket.send_json({
-                        "meeting_id": meeting_id,
-                        "transcription": transcription,
-                        "timestamp": datetime.now().isoformat()
-                    })
-                    
-                    # Send transcription to Zoom chat
+    except Exception as e:
+        print(f"WebSocket error: {e}")
+    finally:
+        await session.close()
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+async def relay_to_worker(websocket: WebSocket, meeting_id: str, vad_config: VADConfig):
+    """Worker mode: decode frames here, transcribe in the worker that owns the meeting"""
+    results = worker_pool.open(meeting_id, vad_config.dict())
+    if results is None:
+        await websocket.close(code=CLOSE_TRY_AGAIN_LATER, reason="Meeting is already connected")
+        return
+    closing = False
+    
+    async def forward_results():
+        client_connected = True
+        while True:
+            response = await results.get()
+            if response is None:
+                if not closing and client_connected:
+                    # The worker died: nothing more will come, so end the connection
                     try:
-                        channel_id = get_zoom_channel_id(os.getenv("ZOOM_CHANNEL_NAME", "Meeting Recommendations"))
-                        if channel_id:
-                            timestamp = datetime.now().strftime("%H:%M:%S")
-                            zoom_message = f"[{timestamp}] Transcription:\n{transcription}"
-                            send_zoom_message(channel_id, zoom_message)
-                    except Exception as e:
-                        print(f"Error sending to Zoom: {e}")
+                        await websocket.close(code=1011)
+                    except Exception:
+                        pass
+                return
+            if client_connected:
+                try:
+                    await websocket.send_json(response)
+                except Exception:
+                    client_connected = False
+    
+    forwarder = asyncio.create_task(forward_results())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            try:
+                decoded = await decode_audio_message(message)
+            except (FrameError, CodecError) as e:
+                await websocket.send_json({"meeting_id": meeting_id, "error": str(e)})
+                continue
+            if decoded is not None and not await worker_pool.feed(meeting_id, *decoded):
+                await websocket.send_json({"meeting_id": meeting_id, "error": "Worker overloaded; audio dropped"})
                 
     except Exception as e:
         print(f"WebSocket error: {e}")
     finally:
-        audio_stream.clear_stream(meeting_id)
-        await websocket.close()
+        closing = True
+        worker_pool.close(meeting_id, results)
+        await forwarder
+        try:
+            await websocket.close()
+        except Exception:
+            pass
 
-# Optimize process_audio_chunk to use pre-loaded model
-async def process_audio_chunk(audio_data: bytes, meeting_id: str):
+def submit_window(results: OrderedResults, vad_gate: VoiceActivityGate, window, meeting_id: str, seq=None):
+    """Gate a buffered window through VAD and queue it for transcription"""
+    # Drop silence; short speech windows may be merged before sending
+    speech = vad_gate.process(window.pcm.tobytes(), window.sample_rate, window.channels)
+    if speech is None:
+        return
+    
+    # Extra fields returned to the client alongside the transcription
+    tag = {"window_start": round(window.start_time, 3), "window_end": round(window.end_time, 3)}
+    if seq is not None:
+        tag["seq"] = seq
+    
+    # Process audio without blocking the receive loop
+    queue_speech(results, meeting_id, tag, speech)
+
+def queue_speech(results: OrderedResults, meeting_id: str, tag, speech):
+    """Queue speech under the meeting's admission budget; results keep submit order"""
+    job = admission.submit(meeting_id, tag, speech)
+    if job is not None:
+        results.submit(job.tag, transcribe_admitted(meeting_id, job))
+
+async def transcribe_admitted(meeting_id: str, job):
     try:
-        # Create temporary WAV file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-            # Write WAV header
-            with wave.open(temp_file, 'wb') as wav_file:
-                wav_file.setnchannels(AUDIO_CHANNELS)
-                wav_file.setsampwidth(2)  # 16-bit audio
-                wav_file.setframerate(AUDIO_SAMPLE_RATE)
-                wav_file.writeframes(audio_data)
-            
-            temp_file_path = temp_file.name
-            
-        # Use pre-loaded model for transcription
-        with open(temp_file_path, "rb") as f:
-            audio_data = f.read()
-            
-        content = [
-            {"text": "Transcribe the following audio precisely. Just return the transcription text with no additional commentary."},
-            {
-                "inline_data": {
-                    "mime_type": "audio/wav",
-                    "data": audio_data
-                }
+        if not await job.granted:
+            return None  # dropped by the overload policy
+    except asyncio.CancelledError:
+        admission.withdraw(meeting_id, job)
+        raise
+    try:
+        # Read the segment only now: queued speech may have been merged into it
+        segment = job.segment
+        return await process_audio_chunk(segment.pcm, meeting_id, segment.sample_rate, segment.channels)
+    finally:
+        admission.finished(meeting_id)
+
+async def deliver_transcriptions(send, meeting_id: str, results: OrderedResults, source: str = "websocket"):
+    """Send finished transcriptions to the client (`send`) and Zoom, in chunk order"""
+    client_connected = True
+    previous, previous_end = None, None
+    async for tag, transcription in results.results():
+        if not transcription:
+            continue
+        
+        # A window that overlaps the one before repeats its last words; pass on only what's new
+        start = tag.get("window_start")
+        if previous is not None and start is not None and previous_end is not None and start < previous_end:
+            previous, transcription = transcription, trim_overlap(previous, transcription, previous_end - start,
+                                                                  OVERLAP_WORDS_PER_SECOND)
+        else:
+            previous = transcription
+        previous_end = tag.get("window_end")
+        
+        # Send transcription to client
+        if client_connected and send is not None:
+            response = {
+                "meeting_id": meeting_id,
+                "transcription": transcription,
+                "timestamp": datetime.now().isoformat()
             }
-        ]
+            response.update(tag)
+            try:
+                await send(response)
+            except Exception:
+                client_connected = False
         
-        response = transcription_model.generate_content(content)
-        transcription = response.text.strip()
+        # Keep the meeting's transcript; the store batches writes on its own thread
+        meeting_store.append(meeting_id, "transcription",
+                             {"transcription": transcription, "source": source, **tag})
         
-        # Clean up
-        os.unlink(temp_file_path)
+        # Hand the transcription to the Zoom outbox; delivery happens in the background
+        zoom_outbox.enqueue(meeting_id, ZOOM_CHANNEL_NAME, transcription)
         
+        # Feed the recommendation engine, which debounces bursts per meeting
+        recommendation_service.submit({
+            "meeting_id": meeting_id,
+            "transcription": transcription,
+            "timestamp": datetime.now().isoformat()
+        })
+
+async def encode_model_audio(audio_data, sample_rate: int, channels: int):
+    """(payload, mime_type) for Gemini in MODEL_AUDIO_FORMAT, or WAV when that can't be encoded"""
+    if MODEL_AUDIO_CODEC != CODEC_PCM_S16LE:
+        encode_started = time.perf_counter()
+        try:
+            # Compression costs a few ms of CPU per window, so it runs off the event loop
+            payload = await asyncio.to_thread(encode_audio, audio_data, sample_rate, channels, MODEL_AUDIO_CODEC)
+            stage_metrics.observe("audio_encode", time.perf_counter() - encode_started)
+            return payload, CODEC_MIME_TYPES[MODEL_AUDIO_CODEC]
+        except CodecError as e:
+            print(f"Sending WAV instead: {e}")
+    
+    # Build the WAV container in memory; no temp file round-trip
+    with stage_metrics.time("wav_framing"):
+        return build_wav(audio_data, sample_rate, channels), "audio/wav"
+
+# Optimize process_audio_chunk to use pre-loaded model
+async def process_audio_chunk(audio_data, meeting_id: str,
+                              sample_rate: int = AUDIO_SAMPLE_RATE,
+                              channels: int = AUDIO_CHANNELS):
+    started = meeting_tracker.job_started(meeting_id)
+    transcription = None
+    try:
+        cache_key = transcription_cache.key(audio_data, sample_rate, channels,
+                                            TRANSCRIPTION_MODEL_NAME, TRANSCRIPTION_PROMPT)
+        
+        # The cache key is over the PCM, so a hit needs no encoding at all
+        transcription = await transcription_cache.get(cache_key)
+        if transcription is not None:
+            return transcription
+        payload, mime_type = await encode_model_audio(audio_data, sample_rate, channels)
+        seconds = len(audio_data) / (2 * channels * sample_rate)
+        transcription = await transcribe_uncached(payload, cache_key, mime_type, seconds)
         return transcription
         
     except Exception as e:
         print(f"Error processing audio chunk: {e}")
         return None
+    finally:
+        meeting_tracker.job_finished(meeting_id, started, transcription is not None)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,147 @@
+"""Append-only store of meeting events (transcription segments and recommendations).
+
+Events are kept in SQLite in WAL mode, one row each, and are never updated
+or deleted. `append` only queues the event; a writer thread commits queued
+events in batches, so the event loop never waits on the disk. Row ids
+increase monotonically and double as read cursors: `read(meeting_id,
+since=cursor)` returns only events appended after `cursor`, so dashboards
+can poll incrementally.
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+MEETING_STORE_PATH = os.getenv("MEETING_STORE_PATH", "meetings.db")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS events ("
+    "id INTEGER PRIMARY KEY AUTOINCREMENT, meeting_id TEXT NOT NULL, kind TEXT NOT NULL, "
+    "timestamp TEXT NOT NULL, data TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_events_meeting ON events(meeting_id, id)",
+)
+
+
+class MeetingStore:
+    def __init__(self, path: str = MEETING_STORE_PATH, batch_size: int = 256, flush_interval: float = 0.2):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._writer = None
+        self._reader = None
+        self._start_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self.appended = 0
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            db.execute(statement)
+        db.commit()
+        return db
+
+    def _ensure_writer(self):
+        if self._writer is None:
+            with self._start_lock:
+                if self._writer is None:
+                    # Created on first use so importing the module stays cheap
+                    db = self._connect()
+                    self._writer = threading.Thread(target=self._write_loop, args=(db,),
+                                                    name="meeting-store", daemon=True)
+                    self._writer.start()
+
+    def append(self, meeting_id: str, kind: str, data: Dict, timestamp: Optional[str] = None):
+        """Queue an event for writing; never blocks on the database"""
+        self._ensure_writer()
+        self._queue.put((meeting_id, kind, timestamp or datetime.now().isoformat(), json.dumps(data)))
+        self.appended += 1
+
+    def _write_loop(self, db: sqlite3.Connection):
+        closing = False
+        while not closing:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            if None in batch:
+                # close(): write what came before the sentinel, then stop
+                closing = True
+                batch = batch[:batch.index(None)]
+            if batch:
+                try:
+                    with db:
+                        db.executemany(
+                            "INSERT INTO events (meeting_id, kind, timestamp, data) VALUES (?, ?, ?, ?)", batch
+                        )
+                    self.written += len(batch)
+                    self.batches += 1
+                except sqlite3.Error as e:
+                    self.errors += len(batch)
+                    print(f"Error writing meeting events: {e}")
+        db.close()
+
+    def read(self, meeting_id: str, since: int = 0, limit: int = 500,
+             kind: Optional[str] = None) -> Tuple[List[Dict], int]:
+        """Events of a meeting after cursor `since`, oldest first, and the cursor to poll with next.
+
+        Blocking; call from a worker thread. Events still queued for writing
+        are not visible yet.
+        """
+        if self._reader is None and not os.path.exists(self.path):
+            return [], since
+        query = "SELECT id, kind, timestamp, data FROM events WHERE meeting_id = ? AND id > ?"
+        params = [meeting_id, since]
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        query += " ORDER BY id LIMIT ?"
+        params.append(limit)
+
+        with self._read_lock:
+            if self._reader is None:
+                self._reader = self._connect()
+            rows = self._reader.execute(query, params).fetchall()
+        events = [{"cursor": row[0], "kind": row[1], "timestamp": row[2], **json.loads(row[3])} for row in rows]
+        return events, rows[-1][0] if rows else since
+
+    def stats(self) -> Dict:
+        return {
+            "appended": self.appended,
+            "written": self.written,
+            "pending": self._queue.qsize(),
+            "batches": self.batches,
+            "errors": self.errors,
+        }
+
+    def close(self, timeout: float = 10.0):
+        """Write everything queued so far, then stop the writer"""
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join(timeout)
+            self._writer = None
+        with self._read_lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+
+# Shared by the transcription endpoints and the recommendation engine
+meeting_store = MeetingStore()
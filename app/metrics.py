@@ -0,0 +1,249 @@
+"""Pipeline metrics: per-meeting state and per-stage latency histograms.
+
+Histograms use fixed buckets, so an observation is a bisect plus two
+additions under a lock; they are safe to update from the transcription
+threads as well as the event loop. Per-meeting state is reported by
+/status/{meeting_id}; /metrics renders the stage histograms and pipeline
+totals in the Prometheus text format (meeting ids are not used as labels,
+to keep cardinality bounded).
+"""
+import asyncio
+import bisect
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+# Seconds; wide enough for sub-millisecond framing and multi-second model calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Stages of the pipeline, in order
+STAGES = ("decode", "audio_decode", "normalize", "audio_encode", "wav_framing", "model_queue",
+          "model_call", "zoom_send", "retrieval", "llm_recommendation", "event_loop_lag")
+
+METRIC_PREFIX = "zoomtx"
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram"""
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation"""
+        counts, _, count = self.snapshot()
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def to_dict(self) -> Dict:
+        _, total, count = self.snapshot()
+        return {
+            "count": count,
+            "avg_ms": round(total / count * 1000, 2) if count else 0.0,
+            "p50_ms": round(self.quantile(0.5) * 1000, 2),
+            "p95_ms": round(self.quantile(0.95) * 1000, 2),
+            "p99_ms": round(self.quantile(0.99) * 1000, 2),
+        }
+
+
+class StageMetrics:
+    """One latency histogram per pipeline stage"""
+
+    def __init__(self, stages: Iterable[str] = STAGES):
+        self.histograms = {stage: Histogram() for stage in stages}
+
+    def observe(self, stage: str, seconds: float):
+        self.histograms[stage].observe(seconds)
+
+    @contextmanager
+    def time(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histograms[stage].observe(time.perf_counter() - started)
+
+    def to_dict(self) -> Dict:
+        return {stage: histogram.to_dict() for stage, histogram in self.histograms.items()}
+
+
+class MeetingState:
+    """Counters and end-to-end chunk latency for one meeting"""
+
+    def __init__(self, meeting_id: str):
+        self.meeting_id = meeting_id
+        self.connected = False
+        self.chunks_received = 0
+        self.bytes_received = 0
+        self.in_flight = 0
+        self.transcribed = 0
+        self.failed = 0
+        self.first_activity = datetime.now()
+        self.last_activity = self.first_activity
+        self.latency = Histogram()
+        self.vad_stats = None  # set by the meeting's VAD gate, if it has one
+
+    @property
+    def status(self) -> str:
+        if self.in_flight:
+            return "processing"
+        return "connected" if self.connected else "idle"
+
+    def to_dict(self) -> Dict:
+        return {
+            "status": self.status,
+            "connected": self.connected,
+            "chunks_received": self.chunks_received,
+            "bytes_received": self.bytes_received,
+            "in_flight": self.in_flight,
+            "transcribed": self.transcribed,
+            "failed": self.failed,
+            "first_activity": self.first_activity.isoformat(),
+            "last_activity": self.last_activity.isoformat(),
+            "chunk_latency": self.latency.to_dict(),
+        }
+
+
+class MeetingTracker:
+    """Per-meeting pipeline state plus totals across all meetings.
+
+    Updated from the event loop only. Disconnected meetings are kept for
+    /status until `max_meetings` is exceeded, oldest first.
+    """
+
+    def __init__(self, max_meetings: int = 1000):
+        self.max_meetings = max_meetings
+        self._meetings = OrderedDict()
+        self.totals = {"chunks_received": 0, "bytes_received": 0, "transcribed": 0, "failed": 0}
+
+    def get(self, meeting_id: str) -> MeetingState:
+        return self._meetings.get(meeting_id)
+
+    def _touch(self, meeting_id: str) -> MeetingState:
+        state = self._meetings.get(meeting_id)
+        if state is None:
+            state = self._meetings[meeting_id] = MeetingState(meeting_id)
+            self._evict()
+        else:
+            self._meetings.move_to_end(meeting_id)
+        state.last_activity = datetime.now()
+        return state
+
+    def _evict(self):
+        if len(self._meetings) <= self.max_meetings:
+            return
+        for meeting_id, state in list(self._meetings.items()):
+            if not state.connected and not state.in_flight:
+                del self._meetings[meeting_id]
+                if len(self._meetings) <= self.max_meetings:
+                    return
+
+    def connected(self, meeting_id: str, connected: bool = True) -> MeetingState:
+        state = self._touch(meeting_id)
+        state.connected = connected
+        return state
+
+    def chunk_received(self, meeting_id: str, nbytes: int):
+        state = self._touch(meeting_id)
+        state.chunks_received += 1
+        state.bytes_received += nbytes
+        self.totals["chunks_received"] += 1
+        self.totals["bytes_received"] += nbytes
+
+    def job_started(self, meeting_id: str) -> float:
+        self._touch(meeting_id).in_flight += 1
+        return time.perf_counter()
+
+    def job_finished(self, meeting_id: str, started: float, ok: bool):
+        state = self._touch(meeting_id)
+        state.in_flight -= 1
+        state.latency.observe(time.perf_counter() - started)
+        key = "transcribed" if ok else "failed"
+        setattr(state, key, getattr(state, key) + 1)
+        self.totals[key] += 1
+
+    @property
+    def active_meetings(self) -> int:
+        return sum(1 for state in self._meetings.values() if state.connected)
+
+    @property
+    def in_flight(self) -> int:
+        return sum(state.in_flight for state in self._meetings.values())
+
+
+async def monitor_event_loop(interval: float = 0.5):
+    """Record how late the event loop wakes up; high values mean blocking code on the loop"""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        stage_metrics.observe("event_loop_lag", max(0.0, time.perf_counter() - started - interval))
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(tracker: MeetingTracker, gauges: Iterable[Tuple[str, str, str, float]] = ()) -> str:
+    """Prometheus text exposition of stage latencies, pipeline totals and extra gauges.
+
+    `gauges` are (name, type, help, value) tuples contributed by other
+    components (cache, Zoom outbox, recommendation engine).
+    """
+    name = f"{METRIC_PREFIX}_stage_latency_seconds"
+    lines = [f"# HELP {name} Latency of each pipeline stage",
+             f"# TYPE {name} histogram"]
+    for stage, histogram in stage_metrics.histograms.items():
+        counts, total, count = histogram.snapshot()
+        cumulative = 0
+        for bound, bucket_count in zip(histogram.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{stage="{stage}",le="{_format_value(bound)}"}} {cumulative}')
+        lines.append(f'{name}_sum{{stage="{stage}"}} {_format_value(total)}')
+        lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+
+    metrics = [
+        ("chunks_received_total", "counter", "Audio chunks received over websockets", tracker.totals["chunks_received"]),
+        ("audio_bytes_received_total", "counter", "Audio bytes received over websockets", tracker.totals["bytes_received"]),
+        ("chunks_transcribed_total", "counter", "Audio chunks transcribed", tracker.totals["transcribed"]),
+        ("chunks_failed_total", "counter", "Audio chunks whose transcription failed", tracker.totals["failed"]),
+        ("chunks_in_flight", "gauge", "Audio chunks currently being transcribed", tracker.in_flight),
+        ("active_meetings", "gauge", "Meetings with an open websocket", tracker.active_meetings),
+    ]
+    for metric, metric_type, help_text, value in list(metrics) + list(gauges):
+        full_name = f"{METRIC_PREFIX}_{metric}"
+        lines.append(f"# HELP {full_name} {help_text}")
+        lines.append(f"# TYPE {full_name} {metric_type}")
+        lines.append(f"{full_name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# Shared by every module that records a stage
+stage_metrics = StageMetrics()
@@ -0,0 +1,160 @@
+"""Rolling transcript context and a semantic cache for recommendations.
+
+Each meeting keeps a rolling window of its recent transcript. A
+recommendation is cached under the embedding of the window it was made
+for and the ids of the services retrieved for it. A later window whose
+embedding is within `similarity_threshold` (cosine) of a cached one, and
+whose retrieved services overlap enough, reuses that recommendation
+instead of calling the LLM again. Entries expire after `ttl_seconds`.
+
+Entries are scoped to their meeting, so text generated for one client's
+conversation is never shown in another meeting.
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class MeetingContext:
+    """Most recent transcript text of one meeting, at most `max_chars` long"""
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self._parts = deque()
+        self._chars = 0
+        self.last_seen = time.monotonic()
+        self.last_served = None  # the CachedRecommendation the meeting was last shown
+
+    def add(self, text: str) -> str:
+        """Append text and return the current window"""
+        self._parts.append(text)
+        self._chars += len(text) + 1
+        while len(self._parts) > 1 and self._chars - len(self._parts[0]) - 1 >= self.max_chars:
+            self._chars -= len(self._parts.popleft()) + 1
+        self.last_seen = time.monotonic()
+        return self.window()
+
+    def window(self) -> str:
+        return "\n".join(self._parts)[-self.max_chars:]
+
+
+class CachedRecommendation:
+    def __init__(self, embedding: np.ndarray, service_ids: List[str], recommendation: str, now: float):
+        self.embedding = embedding
+        self.service_ids = frozenset(service_ids)
+        self.recommendation = recommendation
+        self.created = now
+
+
+class RecommendationCache:
+    """Per-meeting rolling contexts plus TTL-evicted, similarity-matched recommendations"""
+
+    def __init__(self, context_chars: int = 4000, similarity_threshold: float = 0.9,
+                 min_service_overlap: float = 0.5, ttl_seconds: float = 600.0, max_entries_per_meeting: int = 32):
+        self.context_chars = context_chars
+        self.similarity_threshold = similarity_threshold
+        self.min_service_overlap = min_service_overlap
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_meeting = max_entries_per_meeting
+        self._contexts = {}  # meeting_id -> MeetingContext
+        self._entries = {}  # meeting_id -> [CachedRecommendation], oldest first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def add_transcript(self, meeting_id: str, text: str) -> str:
+        """Extend the meeting's rolling context and return the window to recommend on"""
+        with self._lock:
+            context = self._contexts.get(meeting_id)
+            if context is None:
+                context = self._contexts[meeting_id] = MeetingContext(self.context_chars)
+            return context.add(text)
+
+    @staticmethod
+    def _overlap(a: frozenset, b: frozenset) -> float:
+        if not a and not b:
+            return 1.0
+        return len(a & b) / len(a | b)
+
+    def lookup(self, meeting_id: str, embedding: np.ndarray, service_ids: List[str]) -> Optional[CachedRecommendation]:
+        """Most similar live entry that still matches the topic and the services, if any"""
+        now = time.monotonic()
+        service_ids = frozenset(service_ids)
+        with self._lock:
+            entries = self._evict_expired(meeting_id, now)
+            best, best_similarity = None, self.similarity_threshold
+            for entry in entries:
+                if self._overlap(entry.service_ids, service_ids) < self.min_service_overlap:
+                    continue
+                similarity = float(np.dot(entry.embedding, embedding))  # embeddings are unit length
+                if similarity >= best_similarity:
+                    best, best_similarity = entry, similarity
+            if best is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return best
+
+    def put(self, meeting_id: str, embedding: np.ndarray, service_ids: List[str],
+            recommendation: str) -> CachedRecommendation:
+        entry = CachedRecommendation(embedding, service_ids, recommendation, time.monotonic())
+        with self._lock:
+            entries = self._entries.setdefault(meeting_id, [])
+            entries.append(entry)
+            if len(entries) > self.max_entries_per_meeting:
+                del entries[0]
+                self.evictions += 1
+        self.mark_served(meeting_id, entry)
+        return entry
+
+    def mark_served(self, meeting_id: str, entry: CachedRecommendation) -> bool:
+        """Record `entry` as the meeting's current recommendation; False if it already was"""
+        with self._lock:
+            context = self._contexts.get(meeting_id)
+            if context is None:
+                return True
+            if context.last_served is entry:
+                return False
+            context.last_served = entry
+            return True
+
+    def current(self, meeting_id: str) -> Optional[CachedRecommendation]:
+        """The recommendation the meeting was last shown, if any"""
+        with self._lock:
+            context = self._contexts.get(meeting_id)
+            return context.last_served if context is not None else None
+
+    def _evict_expired(self, meeting_id: str, now: float) -> List[CachedRecommendation]:
+        entries = self._entries.get(meeting_id, [])
+        live = [entry for entry in entries if now - entry.created < self.ttl_seconds]
+        self.evictions += len(entries) - len(live)
+        if live:
+            self._entries[meeting_id] = live
+        else:
+            self._entries.pop(meeting_id, None)
+        return live
+
+    def sweep(self):
+        """Drop expired entries, and contexts of meetings idle for longer than the TTL"""
+        now = time.monotonic()
+        with self._lock:
+            for meeting_id in list(self._entries):
+                self._evict_expired(meeting_id, now)
+            for meeting_id, context in list(self._contexts.items()):
+                if now - context.last_seen >= self.ttl_seconds:
+                    del self._contexts[meeting_id]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "contexts": len(self._contexts),
+                "entries": sum(len(entries) for entries in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / (self.hits + self.misses), 3) if self.hits + self.misses else 0.0,
+            }
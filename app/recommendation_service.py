@@ -1,79 +1,235 @@
 import os
-import chromadb
-from chromadb.utils import embedding_functions
-import groq
-from typing import List, Dict
-import json
+from typing import List, Dict, Optional
+import time
 from datetime import datetime
-import queue
-import threading
 import asyncio
+import threading
 from dotenv import load_dotenv
+from app.call_policy import CallPolicy, policy_from_env
+from app.meeting_store import meeting_store
+from app.metrics import stage_metrics
+from app.recommendation_cache import RecommendationCache
+from app.vector_index import create_retriever
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Groq client
-groq_client = groq.Groq(api_key=os.getenv("GROQ_API_KEY"))
+# The Groq client and the retriever (embedding model, vector store) are loaded
+# on first use or by warm_up(), so importing this module stays cheap
+_groq_client = None
+_retriever = None
+_load_lock = threading.Lock()
 
-# Initialize ChromaDB
-chroma_client = chromadb.PersistentClient(path="./chroma_db")
-embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-    model_name="all-MiniLM-L6-v2"
-)
+def get_groq_client():
+    global _groq_client
+    with _load_lock:
+        if _groq_client is None:
+            import groq
+            # Retries are left to the call policy, so they aren't multiplied by the SDK's own
+            _groq_client = groq.AsyncGroq(api_key=os.getenv("GROQ_API_KEY"), max_retries=0)
+    return _groq_client
+
+def get_retriever():
+    """Knowledge-base retrieval: Chroma or the memory-mapped index (RETRIEVAL_BACKEND)"""
+    global _retriever
+    with _load_lock:
+        if _retriever is None:
+            _retriever = create_retriever()
+    return _retriever
+
+RECOMMENDATION_MODEL = "llama3-70b-8192"
+SYSTEM_PROMPT = """You are a professional consultation assistant. Your role is to:
+1. Analyze consultation transcripts and identify client needs
+2. Provide brief, actionable service recommendations
+3. Keep responses concise and to-the-point
+4. Focus on immediate, practical solutions
+5. Maintain a professional, consultative tone"""
 
-# Get or create collection
-try:
-    collection = chroma_client.get_collection(
-        name="services_knowledge",
-        embedding_function=embedding_function
-    )
-except:
-    collection = chroma_client.create_collection(
-        name="services_knowledge",
-        embedding_function=embedding_function
-    )
+class PendingMeeting:
+    """Transcriptions of one meeting waiting out the debounce window"""
+    
+    def __init__(self, item: Dict, now: float):
+        self.meeting_id = item["meeting_id"]
+        self.transcriptions = []
+        self.timestamp = item["timestamp"]
+        self.auto_send_to_zoom = False
+        self.first_seen = now
+        self.last_seen = now
+    
+    def add(self, item: Dict, now: float):
+        self.transcriptions.append(item["transcription"])
+        self.timestamp = item["timestamp"]
+        self.auto_send_to_zoom = self.auto_send_to_zoom or item.get("auto_send_to_zoom", False)
+        self.last_seen = now
+    
+    def to_item(self, max_chars: int) -> Dict:
+        # Keep the most recent text if a long burst exceeds the prompt budget
+        transcription = "\n".join(self.transcriptions)[-max_chars:]
+        return {
+            "meeting_id": self.meeting_id,
+            "transcription": transcription,
+            "timestamp": self.timestamp,
+            "auto_send_to_zoom": self.auto_send_to_zoom
+        }
 
 class RecommendationService:
-    def __init__(self):
+    """Long-lived async recommendation engine fed in-process by the transcription pipeline.
+    
+    `submit` is non-blocking. Transcriptions are debounced per meeting, so a
+    burst of chunks yields one recommendation: a meeting becomes due
+    `debounce_seconds` after its last chunk, or `max_wait_seconds` after its
+    first. Due meetings are retrieved together in one retriever query
+    call and their LLM completions run concurrently, up to `llm_concurrency`.
+    
+    Retrieval and the prompt use each meeting's rolling transcript window,
+    not just the latest burst. While the conversation stays on a topic
+    (similar window embedding, mostly the same services retrieved) the last
+    recommendation is reused from `cache` rather than asking the LLM again.
+    LLM calls go through `call_policy` (deadline, hedging, retries, breaker).
+    """
+    
+    def __init__(self, debounce_seconds: float = 2.0, max_wait_seconds: float = 10.0,
+                 max_batch_size: int = 16, llm_concurrency: int = 4, max_transcript_chars: int = 4000,
+                 cache: RecommendationCache = None, call_policy: CallPolicy = None):
+        self.debounce_seconds = debounce_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self.max_batch_size = max_batch_size
+        self.llm_concurrency = llm_concurrency
+        self.max_transcript_chars = max_transcript_chars
+        self.cache = cache or RecommendationCache(context_chars=max_transcript_chars)
+        self.call_policy = call_policy or CallPolicy("groq")
+        self.is_running = False
+        self._pending = {}  # meeting_id -> PendingMeeting
+        self._wakeup = None
+        self._llm_slots = None
+        self._task = None
+        self._llm_tasks = set()
+        
+        # Stats
+        self.submitted = 0
+        self.batches = 0
+        self.recommendations = 0
+        self.reused = 0
+        self.errors = 0
+    
+    async def start(self):
+        if self._task is not None:
+            return
         self.is_running = True
-        self.processing_thread = threading.Thread(target=self._process_queue, daemon=True)
-        self.processing_thread.start()
+        self._wakeup = asyncio.Event()
+        self._llm_slots = asyncio.Semaphore(self.llm_concurrency)
+        self._task = asyncio.create_task(self._run())
     
-    def _process_queue(self):
-        """Process items from the recommendation queue"""
+    def submit(self, item: Dict):
+        """Queue a transcription for recommendation; never blocks"""
+        if not item.get("transcription"):
+            return
+        now = time.monotonic()
+        pending = self._pending.get(item["meeting_id"])
+        if pending is None:
+            pending = self._pending[item["meeting_id"]] = PendingMeeting(item, now)
+        pending.add(item, now)
+        self.submitted += 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+    
+    def _due_at(self, pending: PendingMeeting) -> float:
+        return min(pending.last_seen + self.debounce_seconds, pending.first_seen + self.max_wait_seconds)
+    
+    async def _run(self):
         while self.is_running:
+            now = time.monotonic()
+            due = [p for p in self._pending.values() if self._due_at(p) <= now]
+            due.sort(key=self._due_at)
+            due = due[:self.max_batch_size]
+            for pending in due:
+                del self._pending[pending.meeting_id]
+            
+            if due:
+                try:
+                    await self._process_batch([p.to_item(self.max_transcript_chars) for p in due])
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Error processing recommendation batch: {e}")
+                continue
+            
+            self._wakeup.clear()
+            timeout = None
+            if self._pending:
+                timeout = max(0.0, min(self._due_at(p) for p in self._pending.values()) - now)
             try:
-                # Get item from queue with timeout
-                item = recommendation_queue.get(timeout=1)
-                if item:
-                    asyncio.run(self.process_transcription(item))
-            except queue.Empty:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+    
+    @staticmethod
+    def _retrieve(windows: List[str]):
+        """Blocking: retrieval results and unit-length embeddings of the windows"""
+        retriever = get_retriever()
+        results = retriever.query(query_texts=windows, n_results=3)
+        # The query has just embedded these windows, so this is answered from the embedding cache
+        embedding_cache = getattr(retriever, "embedding_cache", None)
+        embeddings = embedding_cache.embed(windows) if embedding_cache is not None else None
+        return results, embeddings
+    
+    async def _process_batch(self, items: List[Dict]):
+        """One vector query for the whole batch, then concurrent LLM calls for topics not cached"""
+        self.batches += 1
+        self.cache.sweep()
+        windows = [self.cache.add_transcript(item["meeting_id"], item["transcription"]) for item in items]
+        with stage_metrics.time("retrieval"):
+            results, embeddings = await asyncio.to_thread(self._retrieve, windows)
+        
+        tasks = []
+        for i, item in enumerate(items):
+            documents = results["documents"][i] if results["documents"] else []
+            if not documents:
                 continue
-            except Exception as e:
-                print(f"Error processing recommendation: {e}")
+            item = {**item, "transcription": windows[i]}
+            metadatas = results["metadatas"][i]
+            service_ids = results["ids"][i]
+            embedding = embeddings[i] if embeddings is not None else None
+            if embedding is not None:
+                cached = self.cache.lookup(item["meeting_id"], embedding, service_ids)
+                if cached is not None:
+                    await self._reuse(item, cached)
+                    continue
+            task = asyncio.create_task(self._recommend(item, metadatas, embedding, service_ids))
+            self._llm_tasks.add(task)
+            task.add_done_callback(self._llm_tasks.discard)
+            tasks.append(task)
+        return tasks
+    
+    async def process_transcription(self, item: Dict) -> Optional[str]:
+        """Process a single transcription immediately, bypassing the debounce; returns the recommendation"""
+        if self._llm_slots is None:
+            self._llm_slots = asyncio.Semaphore(self.llm_concurrency)
+        tasks = await self._process_batch([item])
+        recommendations = await asyncio.gather(*tasks)
+        if recommendations:
+            return recommendations[0]
+        # Reused from the cache, or nothing relevant was retrieved
+        served = self.cache.current(item["meeting_id"])
+        return served.recommendation if served is not None else None
     
-    async def process_transcription(self, item: Dict):
-        """Process a transcription and generate recommendations"""
+    async def _reuse(self, item: Dict, cached):
+        """Same topic as a cached recommendation: show it again only if it isn't the current one"""
+        self.reused += 1
+        if not self.cache.mark_served(item["meeting_id"], cached):
+            return
+        meeting_store.append(item["meeting_id"], "recommendation",
+                             {"recommendation": cached.recommendation, "cached": True}, item["timestamp"])
+        if item.get("auto_send_to_zoom", False):
+            await self._send_to_zoom(item["meeting_id"], cached.recommendation)
+    
+    async def _recommend(self, item: Dict, metadatas: List[Dict], embedding=None, service_ids: List[str] = ()):
+        """Generate, store and optionally send a recommendation for one meeting"""
         try:
             meeting_id = item["meeting_id"]
             transcription = item["transcription"]
             timestamp = item["timestamp"]
             
-            # Query the vector database
-            results = collection.query(
-                query_texts=[transcription],
-                n_results=3
-            )
-            
-            if not results['documents'] or not results['documents'][0]:
-                return
-            
-            # Prepare context from retrieved documents
-            context = "\n\n".join(results['documents'][0])
-            
             # Get metadata for more detailed context
-            metadatas = results['metadatas'][0]
             metadata_context = "\n\n".join([
                 f"Service: {meta.get('name', 'N/A')}\nDescription: {meta.get('description', 'N/A')}"
                 for meta in metadatas
@@ -82,12 +238,7 @@ class RecommendationService:
             # Generate recommendations using Groq
             system_message = {
                 "role": "system",
-                "content": """You are a professional consultation assistant. Your role is to:
-1. Analyze consultation transcripts and identify client needs
-2. Provide brief, actionable service recommendations
-3. Keep responses concise and to-the-point
-4. Focus on immediate, practical solutions
-5. Maintain a professional, consultative tone"""
+                "content": SYSTEM_PROMPT
             }
             
             user_message = {
@@ -101,13 +252,22 @@ Available services:
 Provide brief, specific recommendations based on this consultation."""
             }
             
-            chat_completion = groq_client.chat.completions.create(
-                messages=[system_message, user_message],
-                model="llama3-70b-8192",
-                temperature=0.1
-            )
+            async def attempt(timeout: float):
+                with stage_metrics.time("llm_recommendation"):
+                    return await get_groq_client().chat.completions.create(
+                        messages=[system_message, user_message],
+                        model=RECOMMENDATION_MODEL,
+                        temperature=0.1,
+                        timeout=timeout
+                    )
+            
+            async with self._llm_slots:
+                chat_completion = await self.call_policy.call(attempt)
             
             recommendation = chat_completion.choices[0].message.content
+            self.recommendations += 1
+            if embedding is not None:
+                self.cache.put(meeting_id, embedding, service_ids, recommendation)
             
             # Store recommendation
             self._store_recommendation(meeting_id, recommendation, timestamp)
@@ -115,38 +275,71 @@ Provide brief, specific recommendations based on this consultation."""
             # If auto-send is enabled, send to Zoom
             if item.get("auto_send_to_zoom", False):
                 await self._send_to_zoom(meeting_id, recommendation)
+            return recommendation
                 
         except Exception as e:
+            self.errors += 1
             print(f"Error in recommendation processing: {e}")
     
+    def warm_up(self):
+        """Load the Groq client, embedding model and vector store (blocking)"""
+        get_groq_client()
+        # A throwaway query pulls model weights and index pages into memory
+        get_retriever().query(["warm up"], n_results=1)
+    
+    def stats(self) -> Dict:
+        return {
+            "pending_meetings": len(self._pending),
+            "llm_in_flight": len(self._llm_tasks),
+            "submitted": self.submitted,
+            "batches": self.batches,
+            "recommendations": self.recommendations,
+            "reused": self.reused,
+            "errors": self.errors,
+            "transcriptions_per_recommendation": round(self.submitted / self.recommendations, 2) if self.recommendations else 0.0,
+            "cache": self.cache.stats(),
+            "llm": self.call_policy.stats()
+        }
+    
     def _store_recommendation(self, meeting_id: str, recommendation: str, timestamp: str):
-        """Store recommendation in a file"""
-        try:
-            os.makedirs("recommendations", exist_ok=True)
-            filename = f"recommendations/{meeting_id}.json"
-            
-            data = {
-                "meeting_id": meeting_id,
-                "recommendation": recommendation,
-                "timestamp": timestamp
-            }
-            
-            with open(filename, "w") as f:
-                json.dump(data, f)
-                
-        except Exception as e:
-            print(f"Error storing recommendation: {e}")
+        """Append the recommendation to the meeting's history; the write happens off the event loop"""
+        meeting_store.append(meeting_id, "recommendation", {"recommendation": recommendation}, timestamp)
     
     async def _send_to_zoom(self, meeting_id: str, recommendation: str):
         """Send recommendation to Zoom"""
         # TODO: Implement Zoom integration
         pass
     
-    def stop(self):
-        """Stop the recommendation service"""
+    async def stop(self):
+        """Stop the recommendation service, finishing recommendations already started"""
         self.is_running = False
-        if self.processing_thread.is_alive():
-            self.processing_thread.join()
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        
+        # Don't lose transcriptions still inside their debounce window
+        pending = [p.to_item(self.max_transcript_chars) for p in self._pending.values()]
+        self._pending.clear()
+        for start in range(0, len(pending), self.max_batch_size):
+            try:
+                await self._process_batch(pending[start:start + self.max_batch_size])
+            except Exception as e:
+                print(f"Error processing recommendation batch: {e}")
+        if self._llm_tasks:
+            await asyncio.gather(*self._llm_tasks, return_exceptions=True)
 
 # Initialize recommendation service
-recommendation_service = RecommendationService() 
\ No newline at end of file
+recommendation_service = RecommendationService(
+    debounce_seconds=float(os.getenv("RECOMMENDATION_DEBOUNCE_SECONDS", "2")),
+    max_wait_seconds=float(os.getenv("RECOMMENDATION_MAX_WAIT_SECONDS", "10")),
+    max_batch_size=int(os.getenv("RECOMMENDATION_BATCH_SIZE", "16")),
+    llm_concurrency=int(os.getenv("RECOMMENDATION_LLM_CONCURRENCY", "4")),
+    cache=RecommendationCache(
+        context_chars=int(os.getenv("RECOMMENDATION_CONTEXT_CHARS", "1500")),
+        similarity_threshold=float(os.getenv("RECOMMENDATION_SIMILARITY_THRESHOLD", "0.9")),
+        min_service_overlap=float(os.getenv("RECOMMENDATION_MIN_SERVICE_OVERLAP", "0.5")),
+        ttl_seconds=float(os.getenv("RECOMMENDATION_CACHE_TTL_SECONDS", "600"))
+    ),
+    call_policy=policy_from_env("groq", "GROQ", deadline_seconds=20.0)
+)
@@ -0,0 +1,70 @@
+"""Key-value cache shared by the processes of one host.
+
+Backed by SQLite in WAL mode (on /dev/shm when available), so worker
+processes share Zoom tokens and channel ids without a broker. Leases give
+cross-process single-flight: the process that takes a key's lease fetches the
+value; the others wait for it to appear in the cache.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Optional
+
+
+def default_path(name: str) -> str:
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, name)
+
+
+class SharedCache:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=OFF")  # a lost entry is just refetched
+        self._db.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT, expires REAL)")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM entries WHERE key = ? AND expires > ?",
+                                   (key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str, ttl: float):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO entries (key, value, expires) VALUES (?, ?, ?)",
+                             (key, value, time.time() + ttl))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def try_lease(self, key: str, ttl: float) -> bool:
+        """Take `key`'s lease unless another process holds an unexpired one"""
+        lease = f"lease:{key}"
+        now = time.time()
+        with self._lock:
+            self._db.execute("DELETE FROM entries WHERE key = ? AND expires <= ?", (lease, now))
+            cursor = self._db.execute("INSERT OR IGNORE INTO entries (key, value, expires) VALUES (?, ?, ?)",
+                                      (lease, str(os.getpid()), now + ttl))
+            return cursor.rowcount == 1
+
+    def release(self, key: str):
+        with self._lock:
+            self._db.execute("DELETE FROM entries WHERE key = ? AND value = ?", (f"lease:{key}", str(os.getpid())))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def unlink(self):
+        """Remove the database files (called by the process that created the cache)"""
+        self.close()
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(self.path + suffix)
+            except FileNotFoundError:
+                pass
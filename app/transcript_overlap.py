@@ -0,0 +1,43 @@
+"""Removing words repeated where consecutive transcriptions overlap.
+
+Live audio is transcribed in windows that share AUDIO_WINDOW_OVERLAP_SECONDS
+of audio with the window before, so the words spoken in that stretch come
+back at the end of one transcription and again at the start of the next.
+The longest run of words that ends the previous text and starts the new
+one (compared case- and punctuation-insensitively) is dropped from the new
+text before it is delivered or stitched.
+
+Only as many words as could have been spoken in the overlap are considered
+(`words_per_second` per second of it), a run must be at least `min_words`
+long, and a transcription is never trimmed to nothing, so a short reply
+that happens to echo the previous words ("yes" after "... yes") is kept.
+"""
+import math
+import re
+
+_WORD = re.compile(r"\S+")
+_NOT_WORD = re.compile(r"[^\w']")
+
+
+def _key(word: str) -> str:
+    return _NOT_WORD.sub("", word.lower())
+
+
+def trim_overlap(previous: str, text: str, overlap_seconds: float, words_per_second: float = 3.0,
+                 min_words: int = 2) -> str:
+    """`text` without the leading words that repeat the end of `previous`.
+
+    `overlap_seconds` is how much audio the two transcriptions share; with
+    none, `text` is returned as is.
+    """
+    max_words = math.ceil(overlap_seconds * words_per_second) if overlap_seconds > 0 else 0
+    if not previous or not text or max_words < min_words:
+        return text
+    tail = [_key(word) for word in previous.split()[-max_words:]]
+    words = [match for _, match in zip(range(max_words), _WORD.finditer(text))]
+    head = [_key(match.group()) for match in words]
+    for size in range(min(len(tail), len(head)), min_words - 1, -1):
+        if tail[-size:] == head[:size]:
+            rest = text[words[size - 1].end():].lstrip()
+            return rest or text
+    return text
@@ -0,0 +1,155 @@
+"""Cross-meeting micro-batching of short transcription requests.
+
+Short segments arriving within `window_seconds` of each other, from any
+meeting, are sent to Gemini as one request: a structured-output prompt,
+then each segment's audio preceded by a text part holding its label. The
+model answers with a JSON object mapping labels to transcriptions, which
+are handed back to each caller, so every meeting's ordered result stream
+is unaffected. Segments whose label is missing from the answer, or all of
+them if it isn't valid JSON, are transcribed one by one instead.
+"""
+import asyncio
+import json
+import re
+from typing import Awaitable, Callable, Dict, List
+
+BATCH_TRANSCRIPTION_PROMPT = (
+    "Each audio part below is a separate recording, preceded by its label. "
+    "Transcribe every recording precisely. Return only a JSON object that maps each label to the "
+    "transcription text of its recording, with no additional commentary. "
+    "Use an empty string for a recording with no speech."
+)
+
+# Ask Gemini for JSON directly rather than prose that has to be cleaned up
+BATCH_GENERATION_CONFIG = {"response_mime_type": "application/json"}
+
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+class BatchParseError(ValueError):
+    pass
+
+
+class PendingSegment:
+    def __init__(self, label: str, payload: bytes, mime_type: str, seconds: float):
+        self.label = label
+        self.payload = payload
+        self.mime_type = mime_type
+        self.seconds = seconds
+        self.result = asyncio.get_running_loop().create_future()
+
+
+def build_batch_content(segments: List[PendingSegment]) -> List[Dict]:
+    content = [{"text": BATCH_TRANSCRIPTION_PROMPT}]
+    for segment in segments:
+        content.append({"text": f"Label: {segment.label}"})
+        content.append({"inline_data": {"mime_type": segment.mime_type, "data": segment.payload}})
+    return content
+
+
+def parse_batch_response(text: str) -> Dict[str, str]:
+    """Label -> transcription from the model's JSON answer"""
+    try:
+        parsed = json.loads(_CODE_FENCE.sub("", text.strip()))
+    except json.JSONDecodeError as e:
+        raise BatchParseError(f"Batch response is not JSON: {e}") from None
+    if not isinstance(parsed, dict):
+        raise BatchParseError("Batch response is not a JSON object")
+    return {str(label): value.strip() for label, value in parsed.items() if isinstance(value, str)}
+
+
+class TranscriptionBatcher:
+    """Collects segments for up to `window_seconds` and sends them as one request.
+
+    `generate(content)` sends a batch request and returns the response text;
+    `transcribe_one(payload, mime_type)` is the single-segment fallback. A
+    batch is sent early once it holds `max_segments` segments or
+    `max_batch_seconds` of audio.
+    """
+
+    def __init__(self, generate: Callable[[List[Dict]], Awaitable[str]],
+                 transcribe_one: Callable[[bytes, str], Awaitable[str]],
+                 window_seconds: float = 0.2, max_segments: int = 8, max_batch_seconds: float = 60.0):
+        self.generate = generate
+        self.transcribe_one = transcribe_one
+        self.window_seconds = window_seconds
+        self.max_segments = max_segments
+        self.max_batch_seconds = max_batch_seconds
+        self._open = []  # segments waiting for the window to close
+        self._open_seconds = 0.0
+        self._timer = None
+        self._tasks = set()
+        self._next_label = 0
+
+        # Stats
+        self.segments = 0
+        self.batches = 0
+        self.batched_segments = 0
+        self.fallbacks = 0
+
+    async def transcribe(self, payload: bytes, mime_type: str, seconds: float) -> str:
+        if self._open and self._open_seconds + seconds > self.max_batch_seconds:
+            self._flush()
+        self._next_label += 1
+        segment = PendingSegment(f"S{self._next_label}", payload, mime_type, seconds)
+        self._open.append(segment)
+        self._open_seconds += seconds
+        self.segments += 1
+        if len(self._open) >= self.max_segments:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window_seconds, self._flush)
+        return await segment.result
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        segments, self._open, self._open_seconds = self._open, [], 0.0
+        if segments:
+            task = asyncio.ensure_future(self._send(segments))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, segments: List[PendingSegment]):
+        if len(segments) == 1:
+            await self._send_one(segments[0])
+            return
+        self.batches += 1
+        self.batched_segments += len(segments)
+        try:
+            transcriptions = parse_batch_response(await self.generate(build_batch_content(segments)))
+        except BatchParseError as e:
+            print(f"Batched transcription unusable ({e}); transcribing {len(segments)} segments one by one")
+            transcriptions = {}
+        except Exception as e:
+            for segment in segments:
+                if not segment.result.done():
+                    segment.result.set_exception(e)
+            return
+        missing = [segment for segment in segments if segment.label not in transcriptions]
+        for segment in segments:
+            if segment.label in transcriptions and not segment.result.done():
+                segment.result.set_result(transcriptions[segment.label])
+        self.fallbacks += len(missing)
+        await asyncio.gather(*(self._send_one(segment) for segment in missing))
+
+    async def _send_one(self, segment: PendingSegment):
+        try:
+            result = await self.transcribe_one(segment.payload, segment.mime_type)
+        except Exception as e:
+            if not segment.result.done():
+                segment.result.set_exception(e)
+        else:
+            if not segment.result.done():
+                segment.result.set_result(result)
+
+    def stats(self) -> Dict:
+        return {
+            "window_ms": round(self.window_seconds * 1000),
+            "segments": self.segments,
+            "batches": self.batches,
+            "batched_segments": self.batched_segments,
+            "mean_batch_size": round(self.batched_segments / self.batches, 2) if self.batches else 0.0,
+            "fallbacks": self.fallbacks,
+        }
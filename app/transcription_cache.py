@@ -0,0 +1,222 @@
+import asyncio
+import hashlib
+import io
+import math
+import queue
+import sqlite3
+import threading
+import time
+import wave
+from collections import OrderedDict
+from typing import Optional
+
+
+def wav_cache_payload(wav_bytes: bytes):
+    """Return (pcm, sample_rate, channels, sample_width) for hashing a WAV file.
+
+    Hashing the PCM instead of the file means re-encoded headers or extra
+    metadata chunks still hit the cache. Non-PCM files fall back to the raw bytes.
+    """
+    try:
+        with wave.open(io.BytesIO(wav_bytes), "rb") as wav_file:
+            return (wav_file.readframes(wav_file.getnframes()), wav_file.getframerate(),
+                    wav_file.getnchannels(), wav_file.getsampwidth())
+    except (wave.Error, EOFError):
+        return wav_bytes, 0, 0, 0
+
+
+class TranscriptionCache:
+    """Content-addressed transcription cache: in-memory LRU plus optional SQLite tier.
+
+    Keys are a hash of the PCM samples, their format, the model name and the
+    prompt, so any change to the request that could change the answer misses.
+    The disk tier evicts entries older than `max_age_seconds` and, when it
+    grows past `disk_max_bytes`, the least recently used ones.
+
+    The event loop never touches SQLite: disk lookups run on a worker thread
+    (`get` is a coroutine), and inserts, access-time updates and eviction are
+    queued for a writer thread that commits them in batches.
+    """
+
+    def __init__(self, max_entries: int = 1024, disk_path: Optional[str] = None,
+                 disk_max_bytes: int = 256 * 1024 * 1024, max_age_seconds: float = 7 * 24 * 3600,
+                 batch_size: int = 256, flush_interval: float = 0.2, evict_every: int = 100):
+        self.max_entries = max_entries
+        self.disk_path = disk_path
+        self.disk_max_bytes = disk_max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.evict_every = evict_every
+        self._memory = OrderedDict()  # key -> (text, created)
+        self._lock = threading.Lock()
+        self._reader = None
+        self._read_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_errors = 0
+
+        if disk_path:
+            self._reader = self._connect()
+            self._writer = threading.Thread(target=self._write_loop, args=(self._connect(),),
+                                            name="transcription-cache", daemon=True)
+            self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.disk_path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS transcriptions ("
+            "key TEXT PRIMARY KEY, text TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON transcriptions(accessed)")
+        db.commit()
+        return db
+
+    @staticmethod
+    def key(pcm, sample_rate: int, channels: int, model_name: str, prompt: str,
+            sample_width: int = 2) -> str:
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{model_name}\0{prompt}\0{sample_rate}:{channels}:{sample_width}\0".encode())
+        digest.update(pcm)
+        return digest.hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[1] <= self.max_age_seconds:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        if self._reader is not None:
+            row = await asyncio.to_thread(self._disk_get, key, now)
+            if row:
+                # The access time is written with the next batch, not committed per read
+                self._queue.put(("touch", key, now))
+                with self._lock:
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                return row[0]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _disk_get(self, key: str, now: float):
+        with self._read_lock:
+            if self._reader is None:
+                return None
+            return self._reader.execute(
+                "SELECT text, created FROM transcriptions WHERE key = ? AND created >= ?",
+                (key, now - self.max_age_seconds)
+            ).fetchone()
+
+    def put(self, key: str, text: str):
+        """Cache a transcription; the disk write is queued, never waited for"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, text, now)
+        if self._writer is not None:
+            self._queue.put(("put", key, text, now))
+
+    def _remember(self, key: str, text: str, created: float):
+        self._memory[key] = (text, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _write_loop(self, db: sqlite3.Connection):
+        closing = False
+        puts_since_evict = 0
+        while not closing:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            if None in batch:
+                # close(): write what came before the sentinel, then stop
+                closing = True
+                batch = batch[:batch.index(None)]
+            puts, touches = [], []
+            for item in batch:
+                if item[0] == "put":
+                    _, key, text, now = item
+                    puts.append((key, text, len(text.encode()), now, now))
+                else:
+                    _, key, now = item
+                    touches.append((now, key))
+            try:
+                with db:
+                    if puts:
+                        db.executemany("INSERT OR REPLACE INTO transcriptions (key, text, size, created, accessed) "
+                                       "VALUES (?, ?, ?, ?, ?)", puts)
+                    if touches:
+                        db.executemany("UPDATE transcriptions SET accessed = MAX(accessed, ?) WHERE key = ?", touches)
+                puts_since_evict += len(puts)
+                if puts_since_evict >= self.evict_every:
+                    puts_since_evict = 0
+                    self._evict_disk(db, time.time())
+            except sqlite3.Error as e:
+                self.disk_errors += len(batch)
+                print(f"Error writing transcription cache: {e}")
+        db.close()
+
+    def _evict_disk(self, db: sqlite3.Connection, now: float):
+        """Writer thread: drop expired rows, then least recently used ones until under 90% of the cap"""
+        with db:
+            db.execute("DELETE FROM transcriptions WHERE created < ?", (now - self.max_age_seconds,))
+        count, total = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcriptions").fetchone()
+        if total <= self.disk_max_bytes:
+            return
+        target = int(self.disk_max_bytes * 0.9)
+        while count and total > target:
+            # Rows to drop, estimated from the average row size; another round covers any shortfall
+            rows = max(1, math.ceil((total - target) * count / total))
+            with db:
+                db.execute("DELETE FROM transcriptions WHERE key IN "
+                           "(SELECT key FROM transcriptions ORDER BY accessed LIMIT ?)", (rows,))
+            count, total = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcriptions").fetchone()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        stats = {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+        if self._reader is not None:
+            with self._read_lock:
+                stats["disk_entries"], stats["disk_bytes"] = self._reader.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcriptions"
+                ).fetchone()
+            stats["disk_pending_writes"] = self._queue.qsize()
+            stats["disk_errors"] = self.disk_errors
+        return stats
+
+    def close(self, timeout: float = 10.0):
+        """Write everything queued so far, then stop the writer"""
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join(timeout)
+            self._writer = None
+        with self._read_lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
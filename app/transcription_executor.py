@@ -0,0 +1,59 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TranscriptionExecutor:
+    """Thread pool for blocking model calls, so they never run on the event loop"""
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers,
+                                        thread_name_prefix="transcription")
+
+    async def run(self, fn, *args, **kwargs):
+        """Run a blocking callable in the pool and await its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+
+class OrderedResults:
+    """Per-meeting sequencer: jobs run concurrently, results come back in submit order.
+
+    Each websocket connection owns one instance. `submit` schedules a coroutine
+    immediately and returns, so the receive loop keeps reading audio while
+    earlier chunks are still being transcribed. `results()` yields
+    `(tag, result)` pairs strictly in the order they were submitted.
+    """
+
+    _CLOSED = object()
+
+    def __init__(self):
+        self._pending = asyncio.Queue()
+
+    def submit(self, tag, coro):
+        self._pending.put_nowait((tag, asyncio.ensure_future(coro)))
+
+    def close(self):
+        """Stop accepting jobs; `results()` ends after the pending ones finish"""
+        self._pending.put_nowait(self._CLOSED)
+
+    @property
+    def in_flight(self) -> int:
+        return self._pending.qsize()
+
+    async def results(self):
+        while True:
+            item = await self._pending.get()
+            if item is self._CLOSED:
+                return
+            tag, task = item
+            try:
+                result = await task
+            except Exception as e:
+                print(f"Error in transcription job: {e}")
+                result = None
+            yield tag, result
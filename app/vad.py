@@ -0,0 +1,151 @@
+import numpy as np
+from pydantic import BaseModel
+from typing import NamedTuple, Optional
+
+
+class VADConfig(BaseModel):
+    """Voice-activity thresholds; can be overridden per meeting"""
+    enabled: bool = True
+    frame_ms: int = 30
+    energy_threshold_db: float = -45.0  # frame RMS in dBFS below this is silence
+    zcr_threshold: float = 0.35  # quiet frames crossing zero this often are noise
+    noise_margin_db: float = 10.0  # how far above the threshold high-ZCR frames still count
+    hangover_ms: int = 300  # keep this much audio after the last speech frame
+    min_speech_ms: int = 90  # chunks with less speech than this are dropped
+    min_send_seconds: float = 0.0  # merge short speech chunks until this long
+
+
+class SpeechSegment(NamedTuple):
+    pcm: bytes
+    sample_rate: int
+    channels: int
+
+
+class VADStats:
+    def __init__(self):
+        self.chunks_sent = 0
+        self.chunks_skipped = 0
+        self.sent_seconds = 0.0
+        self.skipped_seconds = 0.0
+
+    def to_dict(self):
+        total = self.sent_seconds + self.skipped_seconds
+        return {
+            "chunks_sent": self.chunks_sent,
+            "chunks_skipped": self.chunks_skipped,
+            "sent_seconds": round(self.sent_seconds, 3),
+            "skipped_seconds": round(self.skipped_seconds, 3),
+            "skipped_ratio": round(self.skipped_seconds / total, 3) if total else 0.0,
+        }
+
+
+class VoiceActivityGate:
+    """Drops silent chunks and trims silence before audio reaches the model.
+
+    Frames are classified with vectorized energy and zero-crossing-rate
+    tests, then smoothed with a hangover so word endings and short pauses
+    are kept. Hangover state carries across chunks of the same meeting.
+    """
+
+    def __init__(self, config: Optional[VADConfig] = None, stats: Optional[VADStats] = None):
+        self.config = config or VADConfig()
+        self.stats = stats or VADStats()
+        self._hangover_left = 0  # frames of hangover carried into the next chunk
+        self._pending = []  # speech chunks waiting to be merged
+        self._pending_format = None
+        self._pending_seconds = 0.0
+
+    def _frame_len(self, sample_rate: int) -> int:
+        return max(1, sample_rate * self.config.frame_ms // 1000)
+
+    def speech_frames(self, samples: np.ndarray, sample_rate: int) -> np.ndarray:
+        """Return a boolean speech mask, one entry per frame of mono `samples`"""
+        config = self.config
+        frame_len = self._frame_len(sample_rate)
+        num_frames = -(-len(samples) // frame_len)
+        if num_frames == 0:
+            return np.zeros(0, dtype=bool)
+
+        frames = np.zeros(num_frames * frame_len, dtype=np.float32)
+        frames[:len(samples)] = samples
+        frames *= 1.0 / 32768.0
+        frames = frames.reshape(num_frames, frame_len)
+
+        energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frame_len
+
+        loud = energy_db >= config.energy_threshold_db
+        noisy = (zcr > config.zcr_threshold) & (energy_db < config.energy_threshold_db + config.noise_margin_db)
+        speech = loud & ~noisy
+
+        if np.count_nonzero(speech) * config.frame_ms < config.min_speech_ms:
+            # Isolated clicks aren't speech; let any carried hangover run out
+            self._hangover_left = max(0, self._hangover_left - num_frames)
+            return np.zeros(num_frames, dtype=bool)
+
+        # Hangover: every speech frame keeps the following N frames open
+        hangover = max(0, config.hangover_ms // config.frame_ms)
+        if hangover:
+            last = np.flatnonzero(speech)[-1]
+            speech = np.convolve(speech.astype(np.int8), np.ones(hangover + 1, dtype=np.int8))[:num_frames] > 0
+            speech[:self._hangover_left] = True
+            self._hangover_left = max(0, hangover - (num_frames - 1 - last))
+        return speech
+
+    def process(self, pcm, sample_rate: int, channels: int = 1) -> Optional[SpeechSegment]:
+        """Gate one chunk of int16 PCM.
+
+        Returns the audio that should be transcribed now (possibly merged
+        with earlier chunks), or None when nothing should be sent yet.
+        """
+        duration = len(pcm) / (2 * channels * sample_rate)
+        if not self.config.enabled:
+            self.stats.chunks_sent += 1
+            self.stats.sent_seconds += duration
+            return SpeechSegment(bytes(pcm), sample_rate, channels)
+
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        mono = samples.reshape(-1, channels).mean(axis=1) if channels > 1 else samples
+        speech = self.speech_frames(mono, sample_rate)
+
+        frame_len = self._frame_len(sample_rate)
+        speech_idx = np.flatnonzero(speech)
+        if not len(speech_idx):
+            self.stats.chunks_skipped += 1
+            self.stats.skipped_seconds += duration
+            # A silent chunk ends the utterance, so send whatever was merged
+            return self.flush()
+
+        # Trim leading and trailing silence (hangover already padded the end)
+        start = max(0, speech_idx[0] - 1) * frame_len * channels
+        end = min(len(samples), (speech_idx[-1] + 1) * frame_len * channels)
+        trimmed = samples[start:end]
+        kept = len(trimmed) / (channels * sample_rate)
+        self.stats.skipped_seconds += duration - kept
+
+        if self._pending_format not in (None, (sample_rate, channels)):
+            flushed = self.flush()
+            self._pending.append(trimmed.tobytes())
+            self._pending_format = (sample_rate, channels)
+            self._pending_seconds = kept
+            return flushed
+
+        self._pending.append(trimmed.tobytes())
+        self._pending_format = (sample_rate, channels)
+        self._pending_seconds += kept
+        if self._pending_seconds >= self.config.min_send_seconds:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[SpeechSegment]:
+        """Return any merged speech that has not been sent yet"""
+        if not self._pending:
+            return None
+        segment = SpeechSegment(b"".join(self._pending), *self._pending_format)
+        self.stats.chunks_sent += 1
+        self.stats.sent_seconds += self._pending_seconds
+        self._pending = []
+        self._pending_format = None
+        self._pending_seconds = 0.0
+        return segment
@@ -0,0 +1,196 @@
+"""Retrieval backends for the recommendation service.
+
+`ChromaRetriever` queries the persistent Chroma collection. `MmapVectorIndex`
+keeps the same embeddings as normalized float32 rows in a memory-mapped
+`.npy` file with a JSON sidecar for ids, documents and metadata, and answers
+queries with a vectorized dot product plus argpartition. For a knowledge base
+of a few thousand chunks this is exact and avoids Chroma's per-query overhead.
+Both backends share an LRU cache of query embeddings and return results in
+Chroma's `{"ids", "documents", "metadatas", "distances"}` layout.
+
+Build or refresh the memory-mapped index from the Chroma collection with:
+
+    python -m app.vector_index build
+"""
+import argparse
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+import numpy as np
+
+MMAP_INDEX_PATH = os.getenv("MMAP_INDEX_PATH", os.path.join(os.getenv("CHROMA_PATH", "./chroma_db"), "services_index"))
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "chroma")  # chroma | mmap
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class QueryEmbeddingCache:
+    """LRU cache of normalized query embeddings; only cache misses are embedded"""
+
+    def __init__(self, embed_fn, max_entries: int = 2048):
+        self.embed_fn = embed_fn
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        results = [None] * len(texts)
+        missing = []
+        with self._lock:
+            for i, text in enumerate(texts):
+                vector = self._cache.get(text)
+                if vector is None:
+                    missing.append(i)
+                else:
+                    self._cache.move_to_end(text)
+                    results[i] = vector
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            # Duplicate texts in one batch are embedded once
+            unique = list(dict.fromkeys(texts[i] for i in missing))
+            vectors = dict(zip(unique, _normalize(self.embed_fn(unique))))
+            with self._lock:
+                for text, vector in vectors.items():
+                    self._cache[text] = vector
+                    self._cache.move_to_end(text)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+            for i in missing:
+                results[i] = vectors[texts[i]]
+
+        return np.stack(results) if results else np.zeros((0, 0), dtype=np.float32)
+
+
+class ChromaRetriever:
+    def __init__(self, collection, embedding_cache: QueryEmbeddingCache = None):
+        self.collection = collection
+        self.embedding_cache = embedding_cache
+
+    def query(self, query_texts: List[str], n_results: int = 3) -> Dict:
+        if self.embedding_cache is None:
+            return self.collection.query(query_texts=query_texts, n_results=n_results)
+        embeddings = self.embedding_cache.embed(query_texts)
+        return self.collection.query(query_embeddings=embeddings.tolist(), n_results=n_results)
+
+
+class MmapVectorIndex:
+    """Exact top-k search over memory-mapped, L2-normalized float32 embeddings"""
+
+    def __init__(self, path: str = MMAP_INDEX_PATH, embedding_cache: QueryEmbeddingCache = None):
+        self.path = path
+        self.embedding_cache = embedding_cache
+        self.vectors = None
+        self.ids = []
+        self.documents = []
+        self.metadatas = []
+
+    @property
+    def vectors_path(self) -> str:
+        return self.path + ".npy"
+
+    @property
+    def meta_path(self) -> str:
+        return self.path + ".meta.json"
+
+    def exists(self) -> bool:
+        return os.path.exists(self.vectors_path) and os.path.exists(self.meta_path)
+
+    def load(self):
+        with open(self.meta_path) as f:
+            meta = json.load(f)
+        vectors = np.load(self.vectors_path, mmap_mode="r")
+        if len(vectors) != len(meta["ids"]):
+            raise ValueError(f"Index {self.path} is inconsistent: {len(vectors)} vectors, {len(meta['ids'])} ids")
+        self.vectors = vectors
+        self.ids = meta["ids"]
+        self.documents = meta["documents"]
+        self.metadatas = meta["metadatas"]
+        return self
+
+    def build(self, ids: List[str], documents: List[str], metadatas: List[Dict], embeddings):
+        """Write the index files atomically, then map them"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        vectors = _normalize(embeddings) if len(ids) else np.zeros((0, 0), dtype=np.float32)
+
+        tmp_vectors = self.path + ".tmp.npy"
+        np.save(tmp_vectors, vectors)
+        tmp_meta = self.meta_path + ".tmp"
+        with open(tmp_meta, "w") as f:
+            json.dump({"ids": list(ids), "documents": list(documents), "metadatas": list(metadatas)}, f)
+        os.replace(tmp_vectors, self.vectors_path)
+        os.replace(tmp_meta, self.meta_path)
+        return self.load()
+
+    def build_from_collection(self, collection):
+        """Export the Chroma collection's stored embeddings; nothing is re-embedded"""
+        data = collection.get(include=["embeddings", "documents", "metadatas"])
+        return self.build(data["ids"], data["documents"], data["metadatas"], data["embeddings"])
+
+    def search(self, query_vectors: np.ndarray, n_results: int = 3):
+        """Return (indices, scores), each of shape (num_queries, k), best first"""
+        if self.vectors is None:
+            self.load()
+        k = min(n_results, len(self.ids))
+        if k == 0:
+            empty = np.zeros((len(query_vectors), 0))
+            return empty.astype(np.int64), empty
+
+        scores = query_vectors @ self.vectors.T  # (num_queries, num_chunks)
+        if k < scores.shape[1]:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape).copy()
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+    def query(self, query_texts: List[str], n_results: int = 3) -> Dict:
+        indices, scores = self.search(self.embedding_cache.embed(query_texts), n_results)
+        return {
+            "ids": [[self.ids[i] for i in row] for row in indices],
+            "documents": [[self.documents[i] for i in row] for row in indices],
+            "metadatas": [[self.metadatas[i] for i in row] for row in indices],
+            # Squared L2 distance between unit vectors, comparable to Chroma's default
+            "distances": [[float(2 - 2 * s) for s in row] for row in scores],
+        }
+
+
+def create_retriever(backend: str = RETRIEVAL_BACKEND):
+    """Retriever for the configured backend; falls back to Chroma if no mmap index is built"""
+    from app.knowledge_base import get_collection, get_embedding_function
+
+    embedding_cache = QueryEmbeddingCache(get_embedding_function(),
+                                          int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2048")))
+    if backend == "mmap":
+        index = MmapVectorIndex(MMAP_INDEX_PATH, embedding_cache)
+        if index.exists():
+            return index.load()
+        print(f"No vector index at {MMAP_INDEX_PATH}; run `python -m app.vector_index build`. Using Chroma.")
+    return ChromaRetriever(get_collection(), embedding_cache)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the memory-mapped retrieval index")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--path", default=MMAP_INDEX_PATH)
+    args = parser.parse_args()
+
+    from app.knowledge_base import get_collection
+    index = MmapVectorIndex(args.path).build_from_collection(get_collection())
+    print(f"Wrote {len(index.ids)} vectors to {index.vectors_path}")
+
+
+if __name__ == "__main__":
+    main()
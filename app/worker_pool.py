@@ -0,0 +1,366 @@
+"""Multi-process serving: meetings are sharded over worker processes.
+
+The uvicorn process (the acceptor) keeps the websocket connections and
+decodes frames; each worker process runs the full transcription pipeline
+(buffering, VAD, Gemini, Zoom, recommendations) for the meetings hashed to
+it. A meeting always maps to the same worker (rendezvous hashing), so its
+state never has to move between processes.
+
+Audio goes from the acceptor to a worker through a shared-memory ring, one
+per worker, with a single producer and a single consumer; only small
+control messages travel over multiprocessing queues. Results come back
+through one shared queue. Workers share Zoom tokens and channel ids through
+a SharedCache on the same host. No external broker is involved.
+
+A watchdog restarts any worker that dies; the meetings it owned end with an
+error (their connections close) rather than waiting for results forever.
+
+Enable with SERVING_WORKERS=<n>; n=0 (the default) keeps everything in the
+uvicorn process.
+"""
+import asyncio
+import hashlib
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Dict, Optional
+
+import numpy as np
+
+from app.shared_cache import SharedCache, default_path
+
+SERVING_WORKERS = int(os.getenv("SERVING_WORKERS", "0"))
+WORKER_RING_MB = float(os.getenv("WORKER_RING_MB", "8"))
+
+
+def shard_for(meeting_id: str, workers: int) -> int:
+    """Rendezvous hash: stable per meeting, and only 1/n of meetings move if n changes"""
+    def weight(worker):
+        return hashlib.blake2b(f"{worker}:{meeting_id}".encode(), digest_size=8).digest()
+    return max(range(workers), key=weight)
+
+
+class SharedRing:
+    """Byte ring in shared memory with one writer process and one reader process.
+
+    Positions are monotonically increasing byte counts. The writer keeps its
+    position locally and tells the reader where each chunk starts via the
+    control queue; the reader publishes how far it has consumed in the
+    shared header, which is all the writer needs to know how much is free.
+    """
+
+    HEADER_BYTES = 64
+
+    def __init__(self, capacity: int, name: Optional[str] = None):
+        self.capacity = capacity
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=self.HEADER_BYTES + capacity)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self.name = self._shm.name
+        self._read_position = np.ndarray((1,), dtype=np.uint64, buffer=self._shm.buf)
+        self._data = np.ndarray((capacity,), dtype=np.uint8, buffer=self._shm.buf, offset=self.HEADER_BYTES)
+        self._write_position = 0
+
+    @property
+    def used(self) -> int:
+        return self._write_position - int(self._read_position[0])
+
+    def write(self, data) -> Optional[int]:
+        """Copy `data` in and return its position, or None if the reader is too far behind"""
+        chunk = np.frombuffer(data, dtype=np.uint8)
+        length = len(chunk)
+        if length > self.capacity - self.used:
+            return None
+        position = self._write_position
+        start = position % self.capacity
+        first = min(length, self.capacity - start)
+        self._data[start:start + first] = chunk[:first]
+        if first < length:
+            self._data[:length - first] = chunk[first:]
+        self._write_position = position + length
+        return position
+
+    def read(self, position: int, length: int) -> bytes:
+        """Copy a chunk out and release its space to the writer"""
+        start = position % self.capacity
+        first = min(length, self.capacity - start)
+        data = self._data[start:start + first].tobytes()
+        if first < length:
+            data += self._data[:length - first].tobytes()
+        self._read_position[0] = position + length
+        return data
+
+    def close(self, unlink: bool = False):
+        # Views must go before the mapping can be closed
+        self._read_position = None
+        self._data = None
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+
+
+def worker_main(index: int, ring_name: str, ring_capacity: int, inbox, outbox, env: Dict[str, str]):
+    """Entry point of a worker process"""
+    global SERVING_WORKERS
+    os.environ.update(env)
+    SERVING_WORKERS = 0  # read by app.main on import; workers never start pools of their own
+    asyncio.run(_serve(index, ring_name, ring_capacity, inbox, outbox))
+
+
+async def _serve(index: int, ring_name: str, ring_capacity: int, inbox, outbox):
+    # Imported here: the worker builds its own copy of the pipeline state
+    from app import main
+
+    ring = SharedRing(ring_capacity, ring_name)
+    loop = asyncio.get_running_loop()
+    sessions = {}  # meeting_id -> (connection id, MeetingSession)
+    closing = set()
+
+    async def send(meeting_id, connection, message):
+        outbox.put(("result", (meeting_id, connection), message))
+
+    async def close_session(meeting_id, connection):
+        # The acceptor waits for "closed" to end the connection, so it is sent even if flushing fails
+        try:
+            if meeting_id in sessions and sessions[meeting_id][0] == connection:
+                await sessions.pop(meeting_id)[1].close()
+        finally:
+            outbox.put(("closed", (meeting_id, connection), None))
+
+    await main.start_background_services()
+    if main.warm_up_task is not None:
+        await main.warm_up_task
+    outbox.put(("ready", index, main.readiness))
+
+    while True:
+        message = await loop.run_in_executor(None, inbox.get)
+        kind = message[0]
+        if kind == "audio":
+            _, meeting_id, position, length, sample_rate, channels, seq = message
+            audio_data = ring.read(position, length)
+            if meeting_id in sessions:
+                sessions[meeting_id][1].add_audio(audio_data, sample_rate, channels, seq)
+        elif kind == "open":
+            _, meeting_id, connection, vad_params = message
+            if meeting_id in sessions:
+                # Meeting state is keyed by meeting id, so the stale session must be gone first
+                await close_session(meeting_id, sessions[meeting_id][0])
+            sessions[meeting_id] = (connection, main.MeetingSession(
+                meeting_id, main.VADConfig(**vad_params),
+                lambda response, meeting_id=meeting_id, connection=connection: send(meeting_id, connection, response)
+            ))
+        elif kind == "close":
+            _, meeting_id, connection = message
+            task = asyncio.create_task(close_session(meeting_id, connection))
+            closing.add(task)
+            task.add_done_callback(closing.discard)
+        elif kind == "status":
+            _, request_id, meeting_id = message
+            outbox.put(("reply", request_id, await main.get_transcription_status(meeting_id)))
+        elif kind == "stop":
+            break
+
+    for meeting_id, (connection, _) in list(sessions.items()):
+        await close_session(meeting_id, connection)
+    if closing:
+        await asyncio.gather(*closing)
+    await main.shutdown_transcription_executor()
+    ring.close()
+
+
+class WorkerPool:
+    """Acceptor side: starts the workers, routes meetings to them and relays results back"""
+
+    def __init__(self, workers: int = SERVING_WORKERS, ring_bytes: int = int(WORKER_RING_MB * 1024 * 1024),
+                 feed_timeout: float = 2.0, watch_interval: float = 1.0):
+        self.workers = workers
+        self.ring_bytes = ring_bytes
+        self.feed_timeout = feed_timeout
+        self.watch_interval = watch_interval
+        self._context = multiprocessing.get_context("spawn")  # no forking a live event loop
+        self._processes = []
+        self._inboxes = []
+        self._rings = []
+        self._outbox = None
+        self._relay = None
+        self._watchdog = None
+        self._loop = None
+        self._env = {}
+        # meeting_id -> (connection id, asyncio.Queue of results); worker replies carry the connection
+        # id, so late replies for a connection that has already ended are ignored
+        self._meetings = {}
+        self._connection_ids = itertools.count()
+        self._replies = {}  # request id -> future
+        self._request_ids = itertools.count()
+        self._ready = {}  # worker index -> readiness
+        self.shared_cache = None
+        self.dropped_chunks = 0
+        self.restarts = 0
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self.shared_cache = SharedCache(default_path(f"zoomtx-{os.getpid()}-cache.db"))
+        self._env = {"SERVING_WORKERS": "0", "ZOOM_SHARED_CACHE_PATH": self.shared_cache.path}
+        self._outbox = self._context.Queue()
+        for index in range(self.workers):
+            self._rings.append(None)
+            self._inboxes.append(None)
+            self._processes.append(None)
+            self._start_worker(index)
+        self._relay = threading.Thread(target=self._relay_results, name="worker-results", daemon=True)
+        self._relay.start()
+        self._watchdog = self._loop.create_task(self._watch())
+
+    def _start_worker(self, index: int):
+        ring = SharedRing(self.ring_bytes)
+        inbox = self._context.Queue()
+        process = self._context.Process(
+            target=worker_main, name=f"transcription-worker-{index}", daemon=True,
+            args=(index, ring.name, self.ring_bytes, inbox, self._outbox, self._env)
+        )
+        process.start()
+        self._rings[index] = ring
+        self._inboxes[index] = inbox
+        self._processes[index] = process
+
+    async def _watch(self):
+        """Restart workers that have died"""
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            for index, process in enumerate(self._processes):
+                if not process.is_alive():
+                    self._restart(index, process.exitcode)
+
+    def _restart(self, index: int, exitcode):
+        print(f"Transcription worker {index} exited with code {exitcode}; restarting it")
+        self.restarts += 1
+        self._ready.pop(index, None)
+        # Its meetings are gone with it: end their result queues so the connections close
+        for meeting_id in [m for m in self._meetings if shard_for(m, self.workers) == index]:
+            _, results = self._meetings.pop(meeting_id)
+            results.put_nowait({"meeting_id": meeting_id, "error": "Transcription worker stopped; meeting ended"})
+            results.put_nowait(None)
+        self._rings[index].close(unlink=True)
+        self._inboxes[index].close()
+        self._start_worker(index)
+
+    def _relay_results(self):
+        """Runs on a thread: hand worker messages to the event loop"""
+        while True:
+            message = self._outbox.get()
+            if message is None:
+                return
+            self._loop.call_soon_threadsafe(self._dispatch, message)
+
+    def _dispatch(self, message):
+        kind, key, payload = message
+        if kind == "result":
+            meeting_id, connection = key
+            entry = self._meetings.get(meeting_id)
+            if entry is not None and entry[0] == connection:
+                entry[1].put_nowait(payload)
+        elif kind == "closed":
+            meeting_id, connection = key
+            entry = self._meetings.get(meeting_id)
+            if entry is not None and entry[0] == connection:
+                del self._meetings[meeting_id]
+                entry[1].put_nowait(None)
+        elif kind == "reply":
+            future = self._replies.pop(key, None)
+            if future is not None and not future.done():
+                future.set_result(payload)
+        elif kind == "ready":
+            self._ready[key] = payload
+
+    @property
+    def ready(self) -> bool:
+        return len(self._ready) == self.workers and all(r["ready"] for r in self._ready.values())
+
+    def open(self, meeting_id: str, vad_params: Dict) -> Optional[asyncio.Queue]:
+        """Start a meeting on its worker; results arrive on the returned queue, then None.
+
+        Returns None if the meeting is already open (or still closing).
+        """
+        if meeting_id in self._meetings:
+            return None
+        connection = next(self._connection_ids)
+        results = asyncio.Queue()
+        self._meetings[meeting_id] = (connection, results)
+        self._inboxes[shard_for(meeting_id, self.workers)].put(("open", meeting_id, connection, vad_params))
+        return results
+
+    async def feed(self, meeting_id: str, audio_data, sample_rate: int, channels: int, seq=None) -> bool:
+        """Copy a chunk into the worker's ring; waits briefly for room, then drops it"""
+        worker = shard_for(meeting_id, self.workers)
+        deadline = time.monotonic() + self.feed_timeout
+        position = self._rings[worker].write(audio_data)
+        while position is None:
+            if time.monotonic() > deadline:
+                self.dropped_chunks += 1
+                return False
+            await asyncio.sleep(0.005)
+            # Looked up again: the worker (and its ring) may have been restarted meanwhile
+            position = self._rings[worker].write(audio_data)
+        self._inboxes[worker].put(("audio", meeting_id, position, len(audio_data), sample_rate, channels, seq))
+        return True
+
+    def close(self, meeting_id: str, results: asyncio.Queue):
+        """Flush the meeting on its worker; `results` (the queue `open` returned) ends once it is done"""
+        entry = self._meetings.get(meeting_id)
+        if entry is None or entry[1] is not results:
+            return  # already ended, by a worker restart; a reconnect may own the meeting id now
+        self._inboxes[shard_for(meeting_id, self.workers)].put(("close", meeting_id, entry[0]))
+
+    async def status(self, meeting_id: str, timeout: float = 5.0) -> Dict:
+        request_id = next(self._request_ids)
+        future = self._replies[request_id] = self._loop.create_future()
+        self._inboxes[shard_for(meeting_id, self.workers)].put(("status", request_id, meeting_id))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._replies.pop(request_id, None)
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "alive": sum(1 for process in self._processes if process.is_alive()),
+            "ready": len(self._ready),
+            "meetings": len(self._meetings),
+            "ring_bytes": self.ring_bytes,
+            "ring_used_bytes": [ring.used for ring in self._rings],
+            "dropped_chunks": self.dropped_chunks,
+            "restarts": self.restarts,
+        }
+
+    def stop(self, timeout: float = 30.0):
+        """Ask every worker to flush its meetings and exit, then release shared memory"""
+        if self._watchdog is not None:
+            # Called off the event loop; workers exiting from here on are not restarted
+            self._loop.call_soon_threadsafe(self._watchdog.cancel)
+            self._watchdog = None
+        for inbox in self._inboxes:
+            inbox.put(("stop",))
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        if self._outbox is not None:
+            self._outbox.put(None)
+            self._relay.join(timeout)
+        # Drop the queues (and the processes holding them) so their semaphores are released now
+        for queue in self._inboxes + [self._outbox]:
+            if queue is not None:
+                queue.close()
+        self._inboxes.clear()
+        self._outbox = None
+        self._processes.clear()
+        for ring in self._rings:
+            ring.close(unlink=True)
+        self._rings.clear()
+        if self.shared_cache is not None:
+            self.shared_cache.unlink()
+            self.shared_cache = None
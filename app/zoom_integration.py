@@ -1,9 +1,14 @@
 import os
 import base64
 import requests
+import httpx
+import asyncio
+import threading
+import time
 import json
 from datetime import datetime
 from dotenv import load_dotenv
+from app.shared_cache import SharedCache
 
 # Load environment variables
 load_dotenv()
@@ -13,44 +18,87 @@ ZOOM_CLIENT_ID = os.getenv("ZOOM_CLIENT_ID")
 ZOOM_CLIENT_SECRET = os.getenv("ZOOM_CLIENT_SECRET")
 ZOOM_ACCOUNT_ID = os.getenv("ZOOM_ACCOUNT_ID")
 
+# Endpoints are configurable so tests and benchmarks can point at a local stand-in
+ZOOM_API_BASE_URL = os.getenv("ZOOM_API_BASE_URL", "https://api.zoom.us/v2")
+ZOOM_OAUTH_URL = os.getenv("ZOOM_OAUTH_URL", "https://zoom.us/oauth/token")
+ZOOM_CHANNEL_CACHE_TTL = float(os.getenv("ZOOM_CHANNEL_CACHE_TTL", "300"))
+# Set by the worker pool so all worker processes share one token and channel cache
+ZOOM_SHARED_CACHE_PATH = os.getenv("ZOOM_SHARED_CACHE_PATH")
+
 # Caching the token with expiration
 zoom_token_cache = {
     "token": None,
     "expiry": 0
 }
 
-def get_zoom_access_token():
-    """Get Zoom access token using Server-to-Server OAuth"""
-    global zoom_token_cache
+class ZoomAPIError(Exception):
+    """Non-success response from the Zoom API"""
     
-    # Check if we have a cached token that's still valid
-    current_time = datetime.now().timestamp()
-    if (zoom_token_cache["token"] and 
-        zoom_token_cache["expiry"] > current_time + 300):  # 5 min buffer
-        return zoom_token_cache["token"]
+    def __init__(self, message: str, status_code: int, retry_after: float = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+    
+    @property
+    def retryable(self):
+        return self.status_code == 429 or self.status_code >= 500
     
-    # Get a new token
-    url = f"https://zoom.us/oauth/token?grant_type=account_credentials&account_id={ZOOM_ACCOUNT_ID}"
+    @classmethod
+    def from_response(cls, action: str, response):
+        retry_after = response.headers.get("Retry-After")
+        try:
+            retry_after = float(retry_after) if retry_after else None
+        except ValueError:
+            retry_after = None
+        return cls(f"Failed to {action}: {response.status_code} {response.text}",
+                   response.status_code, retry_after)
+
+# Shared session so the synchronous helpers reuse connections too
+_session = requests.Session()
+_token_lock = threading.Lock()
+
+def _token_is_valid():
+    current_time = datetime.now().timestamp()
+    return (zoom_token_cache["token"] and
+            zoom_token_cache["expiry"] > current_time + 300)  # 5 min buffer
+
+def _token_request():
+    """URL and headers for a Server-to-Server OAuth token request"""
+    url = f"{ZOOM_OAUTH_URL}?grant_type=account_credentials&account_id={ZOOM_ACCOUNT_ID}"
     creds = f"{ZOOM_CLIENT_ID}:{ZOOM_CLIENT_SECRET}"
     b64_creds = base64.b64encode(creds.encode()).decode()
     headers = {
         "Authorization": f"Basic {b64_creds}",
         "Content-Type": "application/json"
     }
+    return url, headers
+
+def _cache_token(data: dict):
+    access_token = data["access_token"]
+    expires_in = data.get("expires_in", 3600)  # Default to 1 hour
     
-    response = requests.post(url, headers=headers)
-    if response.status_code == 200:
-        data = response.json()
-        access_token = data["access_token"]
-        expires_in = data.get("expires_in", 3600)  # Default to 1 hour
-        
-        # Cache the token and its expiry time
-        zoom_token_cache["token"] = access_token
-        zoom_token_cache["expiry"] = current_time + expires_in
+    # Cache the token and its expiry time
+    zoom_token_cache["token"] = access_token
+    zoom_token_cache["expiry"] = datetime.now().timestamp() + expires_in
+    return access_token
+
+def get_zoom_access_token():
+    """Get Zoom access token using Server-to-Server OAuth"""
+    # Check if we have a cached token that's still valid
+    if _token_is_valid():
+        return zoom_token_cache["token"]
+    
+    # Single-flight: only one thread refreshes, the rest reuse its token
+    with _token_lock:
+        if _token_is_valid():
+            return zoom_token_cache["token"]
         
-        return access_token
-    else:
-        raise Exception(f"Failed to get Zoom token: {response.status_code} {response.text}")
+        url, headers = _token_request()
+        response = _session.post(url, headers=headers)
+        if response.status_code == 200:
+            return _cache_token(response.json())
+        else:
+            raise Exception(f"Failed to get Zoom token: {response.status_code} {response.text}")
 
 def send_zoom_message(channel_id: str, message: str):
     """Send a message to a Zoom chat channel"""
@@ -58,7 +106,7 @@ def send_zoom_message(channel_id: str, message: str):
         raise ValueError("Channel ID is required")
     
     access_token = get_zoom_access_token()
-    url = "https://api.zoom.us/v2/chat/users/me/messages"
+    url = f"{ZOOM_API_BASE_URL}/chat/users/me/messages"
     
     payload = {
         "message": message,
@@ -70,7 +118,7 @@ def send_zoom_message(channel_id: str, message: str):
         "Content-Type": "application/json"
     }
     
-    response = requests.post(url, data=json.dumps(payload), headers=headers)
+    response = _session.post(url, data=json.dumps(payload), headers=headers)
     
     if response.status_code == 201:
         return response.json().get("id")
@@ -81,14 +129,14 @@ def get_zoom_channel_id(channel_name: str, create_if_missing: bool = True):
     """Get the channel ID for a given channel name"""
     try:
         access_token = get_zoom_access_token()
-        url = "https://api.zoom.us/v2/chat/users/me/channels"
+        url = f"{ZOOM_API_BASE_URL}/chat/users/me/channels"
         
         headers = {
             "Authorization": f"Bearer {access_token}",
             "Content-Type": "application/json"
         }
         
-        response = requests.get(url, headers=headers)
+        response = _session.get(url, headers=headers)
         
         if response.status_code == 200:
             channels = response.json().get("channels", [])
@@ -113,7 +161,7 @@ def get_zoom_channel_id(channel_name: str, create_if_missing: bool = True):
 def create_zoom_channel(channel_name: str):
     """Create a new Zoom chat channel"""
     access_token = get_zoom_access_token()
-    url = "https://api.zoom.us/v2/chat/users/me/channels"
+    url = f"{ZOOM_API_BASE_URL}/chat/users/me/channels"
     
     payload = {
         "name": channel_name,
@@ -125,7 +173,7 @@ def create_zoom_channel(channel_name: str):
         "Content-Type": "application/json"
     }
     
-    response = requests.post(url, data=json.dumps(payload), headers=headers)
+    response = _session.post(url, data=json.dumps(payload), headers=headers)
     
     if response.status_code == 201:
         return response.json().get("id")
@@ -136,10 +184,10 @@ def is_zoom_call_active():
     """Check if there is an active Zoom meeting"""
     try:
         access_token = get_zoom_access_token()
-        url = "https://api.zoom.us/v2/users/me/meetings?type=live"
+        url = f"{ZOOM_API_BASE_URL}/users/me/meetings?type=live"
         headers = {"Authorization": f"Bearer {access_token}"}
         
-        response = requests.get(url, headers=headers)
+        response = _session.get(url, headers=headers)
         
         if response.status_code == 200:
             data = response.json()
@@ -150,4 +198,195 @@ def is_zoom_call_active():
             return False
     except Exception as e:
         print(f"Error checking Zoom meeting status: {e}")
-        return False 
\ No newline at end of file
+        return False 
+
+class ZoomClient:
+    """Async Zoom chat client with keep-alive pooling and cached channel lookups.
+
+    Token refreshes and channel lookups are single-flight: concurrent callers
+    share one in-progress request instead of each hitting Zoom. With a warm
+    token and channel cache, `send_message` is a single HTTP request. Given a
+    `shared_cache`, tokens and channel ids are also shared with (and fetched
+    once across) the other processes using the same cache.
+    """
+    
+    def __init__(self, channel_ttl: float = ZOOM_CHANNEL_CACHE_TTL, shared_cache: SharedCache = None):
+        self.channel_ttl = channel_ttl
+        self.shared_cache = shared_cache
+        self._client = None
+        self._token_lock = None
+        self._channels = {}  # channel name -> (channel id, expiry)
+        self._channel_lookups = {}  # channel name -> in-flight lookup task
+    
+    def _http(self):
+        # Created lazily so the client binds to the running event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(10.0),
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20)
+            )
+            self._token_lock = asyncio.Lock()
+        return self._client
+    
+    async def _shared_fetch(self, key: str, fetch, wait: float = 10.0):
+        """Value of `key` from the shared cache, fetched by only one process at a time.
+        
+        `fetch` returns (value, ttl); a None value is not cached.
+        """
+        value = self.shared_cache.get(key)
+        if value is not None:
+            return value
+        
+        deadline = time.monotonic() + wait
+        leased = self.shared_cache.try_lease(key, wait)
+        while not leased and time.monotonic() < deadline:
+            # Another process is fetching; use its result once it lands
+            await asyncio.sleep(0.05)
+            value = self.shared_cache.get(key)
+            if value is not None:
+                return value
+            leased = self.shared_cache.try_lease(key, wait)
+        
+        try:
+            value, ttl = await fetch()
+            if value is not None:
+                self.shared_cache.set(key, value, ttl)
+            return value
+        finally:
+            if leased:
+                self.shared_cache.release(key)
+    
+    async def _fetch_token(self):
+        url, headers = _token_request()
+        response = await self._http().post(url, headers=headers)
+        if response.status_code == 200:
+            return response.json()
+        raise ZoomAPIError.from_response("get Zoom token", response)
+    
+    async def _fetch_shared_token(self):
+        data = await self._fetch_token()
+        expires_in = data.get("expires_in", 3600)
+        token = {"token": data["access_token"], "expiry": datetime.now().timestamp() + expires_in}
+        # Drop it from the shared cache when it enters the 5 min refresh buffer
+        return json.dumps(token), max(1, expires_in - 300)
+    
+    async def get_access_token(self):
+        """Get a cached token, refreshing it at most once across concurrent callers"""
+        if _token_is_valid():
+            return zoom_token_cache["token"]
+        
+        self._http()
+        async with self._token_lock:
+            if _token_is_valid():
+                return zoom_token_cache["token"]
+            
+            if self.shared_cache is not None:
+                zoom_token_cache.update(json.loads(await self._shared_fetch("zoom_token", self._fetch_shared_token)))
+                if _token_is_valid():
+                    return zoom_token_cache["token"]
+            return _cache_token(await self._fetch_token())
+    
+    def _invalidate_token(self):
+        zoom_token_cache["token"] = None
+        if self.shared_cache is not None:
+            self.shared_cache.delete("zoom_token")
+    
+    async def _request(self, method: str, path: str, **kwargs):
+        """Authenticated API request; retries once with a fresh token on 401"""
+        client = self._http()
+        for attempt in range(2):
+            access_token = await self.get_access_token()
+            headers = {"Authorization": f"Bearer {access_token}"}
+            response = await client.request(method, f"{ZOOM_API_BASE_URL}{path}", headers=headers, **kwargs)
+            if response.status_code != 401 or attempt:
+                return response
+            self._invalidate_token()
+        return response
+    
+    async def send_message(self, channel_id: str, message: str):
+        """Send a message to a Zoom chat channel"""
+        if not channel_id:
+            raise ValueError("Channel ID is required")
+        
+        response = await self._request("POST", "/chat/users/me/messages",
+                                       json={"message": message, "to_channel": channel_id})
+        if response.status_code == 201:
+            return response.json().get("id")
+        raise ZoomAPIError.from_response("send Zoom message", response)
+    
+    async def get_channel_id(self, channel_name: str, create_if_missing: bool = True):
+        """Get the channel ID for a given channel name, cached for `channel_ttl` seconds"""
+        cached = self._channels.get(channel_name)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+        
+        if self.shared_cache is not None:
+            channel_id = self.shared_cache.get(f"zoom_channel:{channel_name}")
+            if channel_id is not None:
+                self._channels[channel_name] = (channel_id, time.monotonic() + self.channel_ttl)
+                return channel_id
+        
+        lookup = self._channel_lookups.get(channel_name)
+        if lookup is None:
+            lookup = asyncio.ensure_future(self._lookup_channel(channel_name, create_if_missing))
+            self._channel_lookups[channel_name] = lookup
+            lookup.add_done_callback(lambda _: self._channel_lookups.pop(channel_name, None))
+        
+        try:
+            return await asyncio.shield(lookup)
+        except Exception as e:
+            print(f"Error getting/creating Zoom channel: {e}")
+            return None
+    
+    async def _lookup_channel(self, channel_name: str, create_if_missing: bool):
+        if self.shared_cache is None:
+            return await self._list_channels(channel_name, create_if_missing)
+        
+        # One process lists (or creates) the channel; the others reuse its id
+        async def fetch():
+            return await self._list_channels(channel_name, create_if_missing), self.channel_ttl
+        
+        channel_id = await self._shared_fetch(f"zoom_channel:{channel_name}", fetch)
+        if channel_id is not None:
+            self._channels[channel_name] = (channel_id, time.monotonic() + self.channel_ttl)
+        return channel_id
+    
+    async def _list_channels(self, channel_name: str, create_if_missing: bool):
+        response = await self._request("GET", "/chat/users/me/channels")
+        if response.status_code != 200:
+            raise ZoomAPIError.from_response("get Zoom channels", response)
+        
+        channel_id = None
+        # Cache every channel we saw, not just the one asked for
+        expiry = time.monotonic() + self.channel_ttl
+        for channel in response.json().get("channels", []):
+            self._channels[channel.get("name")] = (channel.get("id"), expiry)
+            if channel.get("name") == channel_name:
+                channel_id = channel.get("id")
+        
+        if channel_id is None and create_if_missing:
+            channel_id = await self.create_channel(channel_name)
+        return channel_id
+    
+    async def create_channel(self, channel_name: str):
+        """Create a new Zoom chat channel"""
+        response = await self._request("POST", "/chat/users/me/channels",
+                                       json={"name": channel_name, "type": 2})  # 2 is for group chat
+        if response.status_code == 201:
+            channel_id = response.json().get("id")
+            self._channels[channel_name] = (channel_id, time.monotonic() + self.channel_ttl)
+            return channel_id
+        raise ZoomAPIError.from_response("create Zoom channel", response)
+    
+    def invalidate_channel(self, channel_name: str):
+        self._channels.pop(channel_name, None)
+        if self.shared_cache is not None:
+            self.shared_cache.delete(f"zoom_channel:{channel_name}")
+    
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+# Shared async client used by the server
+zoom_client = ZoomClient(shared_cache=SharedCache(ZOOM_SHARED_CACHE_PATH) if ZOOM_SHARED_CACHE_PATH else None)
@@ -0,0 +1,243 @@
+import asyncio
+import random
+import time
+from collections import deque
+from datetime import datetime
+
+from app.metrics import stage_metrics
+from app.zoom_integration import ZoomAPIError
+
+
+class TokenBucket:
+    """Async token bucket: `rate` requests per second with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def penalize(self, seconds: float):
+        """Stop handing out tokens for `seconds` (e.g. after a 429 with Retry-After)"""
+        self._tokens = min(self._tokens, 0) - seconds * self.rate
+
+
+class Batch:
+    def __init__(self, meeting_id: str, channel_name: str):
+        self.meeting_id = meeting_id
+        self.channel_name = channel_name
+        self.parts = []
+        self.size = 0
+        self.first_enqueued = time.monotonic()
+        self.first_timestamp = datetime.now().strftime("%H:%M:%S")
+        self.attempts = 0
+
+    def add(self, text: str):
+        self.parts.append(text)
+        self.size += len(text)
+
+    def message(self) -> str:
+        return f"[{self.first_timestamp}] Transcription:\n" + "\n".join(self.parts)
+
+
+class ZoomOutbox:
+    """Off-request-path delivery of transcriptions to Zoom chat.
+
+    Transcriptions for the same meeting and channel are coalesced into one
+    message until `window_seconds` pass or `max_chars` is reached. Batches
+    are sent by a few workers behind a token bucket, and 429/5xx responses
+    are retried with jittered exponential backoff (honouring Retry-After).
+    A 404 or 400 usually means the cached channel id has gone stale, so the
+    channel is looked up again and the batch retried once before it is dropped.
+    """
+
+    def __init__(self, client, window_seconds: float = 3.0, max_chars: int = 3000,
+                 rate: float = 5.0, burst: float = 10.0, workers: int = 4,
+                 max_retries: int = 5, max_pending: int = 1000):
+        self.client = client
+        self.window_seconds = window_seconds
+        self.max_chars = max_chars
+        self.workers = workers
+        self.max_retries = max_retries
+        self.max_pending = max_pending
+        self.bucket = TokenBucket(rate, burst)
+        self._open = {}  # (meeting_id, channel_name) -> Batch being coalesced
+        self._ready = None
+        self._wakeup = None
+        self._tasks = []
+
+        # Stats
+        self.enqueued = 0
+        self.batches_sent = 0
+        self.messages_sent = 0
+        self.retries = 0
+        self.failed = 0
+        self.dropped = 0
+        self.in_flight = 0
+        self.max_batch_size = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self._recent_lags = deque(maxlen=100)
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._ready = asyncio.Queue()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._flush_loop())]
+        self._tasks += [asyncio.create_task(self._deliver_loop()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = 10.0):
+        """Flush open batches, give workers `timeout` seconds to drain, then cancel"""
+        if not self._tasks:
+            return
+        for key in list(self._open):
+            self._close_batch(key)
+        try:
+            await asyncio.wait_for(self._ready.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"Zoom outbox stopped with {self._ready.qsize()} undelivered batches")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def enqueue(self, meeting_id: str, channel_name: str, text: str):
+        """Queue a transcription for delivery; never blocks the caller"""
+        if self._ready is None:
+            raise RuntimeError("ZoomOutbox.start() has not been called")
+        self.enqueued += 1
+
+        key = (meeting_id, channel_name)
+        batch = self._open.get(key)
+        if batch and batch.size + len(text) > self.max_chars:
+            self._close_batch(key)
+            batch = None
+        if batch is None:
+            batch = self._open[key] = Batch(meeting_id, channel_name)
+        batch.add(text)
+        if batch.size >= self.max_chars:
+            self._close_batch(key)
+        self._wakeup.set()
+
+    def _close_batch(self, key):
+        batch = self._open.pop(key)
+        if self._ready.qsize() >= self.max_pending:
+            # Shed the oldest batch rather than growing without bound
+            oldest = self._ready.get_nowait()
+            self._ready.task_done()
+            self.dropped += len(oldest.parts)
+        self._ready.put_nowait(batch)
+
+    async def _flush_loop(self):
+        while True:
+            now = time.monotonic()
+            deadline = None
+            for key, batch in list(self._open.items()):
+                due = batch.first_enqueued + self.window_seconds
+                if due <= now:
+                    self._close_batch(key)
+                elif deadline is None or due < deadline:
+                    deadline = due
+
+            self._wakeup.clear()
+            try:
+                timeout = None if deadline is None else deadline - now
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _deliver_loop(self):
+        while True:
+            batch = await self._ready.get()
+            self.in_flight += 1
+            try:
+                await self._deliver(batch)
+            finally:
+                self.in_flight -= 1
+                self._ready.task_done()
+
+    async def _deliver(self, batch: Batch):
+        message = batch.message()
+        channel_refreshed = False
+        while True:
+            batch.attempts += 1
+            retry_after = None
+            try:
+                await self.bucket.acquire()
+                channel_id = await self.client.get_channel_id(batch.channel_name)
+                if not channel_id:
+                    raise ZoomAPIError(f"Could not resolve channel {batch.channel_name!r}", 503)
+                with stage_metrics.time("zoom_send"):
+                    await self.client.send_message(channel_id, message)
+
+                lag = time.monotonic() - batch.first_enqueued
+                self.batches_sent += 1
+                self.messages_sent += len(batch.parts)
+                self.max_batch_size = max(self.max_batch_size, len(batch.parts))
+                self.total_lag += lag
+                self.max_lag = max(self.max_lag, lag)
+                self._recent_lags.append(lag)
+                return
+            except ZoomAPIError as e:
+                if e.status_code in (400, 404) and not channel_refreshed:
+                    # Stale cached channel id: resolve the channel again and resend right away
+                    self.client.invalidate_channel(batch.channel_name)
+                    channel_refreshed = True
+                    self.retries += 1
+                    continue
+                if not e.retryable or batch.attempts > self.max_retries:
+                    break
+                retry_after = e.retry_after
+                if e.status_code == 429 and retry_after:
+                    self.bucket.penalize(retry_after)
+            except Exception as e:
+                # Network errors are worth retrying too
+                if batch.attempts > self.max_retries:
+                    print(f"Error sending to Zoom: {e}")
+                    break
+
+            self.retries += 1
+            backoff = retry_after or min(30.0, 0.5 * 2 ** (batch.attempts - 1))
+            await asyncio.sleep(backoff * random.uniform(0.8, 1.2))
+
+        self.failed += len(batch.parts)
+        print(f"Dropping Zoom message for meeting {batch.meeting_id} after {batch.attempts} attempts")
+
+    @property
+    def queue_depth(self) -> int:
+        open_items = sum(len(batch.parts) for batch in self._open.values())
+        return open_items + (self._ready.qsize() if self._ready else 0)
+
+    def stats(self) -> dict:
+        recent = sorted(self._recent_lags)
+        return {
+            "queue_depth": self.queue_depth,
+            "open_batches": len(self._open),
+            "ready_batches": self._ready.qsize() if self._ready else 0,
+            "in_flight": self.in_flight,
+            "enqueued": self.enqueued,
+            "messages_sent": self.messages_sent,
+            "batches_sent": self.batches_sent,
+            "avg_batch_size": round(self.messages_sent / self.batches_sent, 2) if self.batches_sent else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "retries": self.retries,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "avg_lag_seconds": round(self.total_lag / self.batches_sent, 3) if self.batches_sent else 0.0,
+            "p95_lag_seconds": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 3) if recent else 0.0,
+            "max_lag_seconds": round(self.max_lag, 3),
+        }
+
@@ -0,0 +1,123 @@
+"""Measure cross-meeting micro-batching of transcription requests.
+
+Simulates `--meetings` concurrent meetings, each sending a `--segment-seconds`
+segment every `--segment-seconds` (staggered at random), against a fake
+Gemini whose latency is a fixed per-request cost plus a per-audio-second
+cost, called from `--concurrency` threads like the transcription executor.
+For each batch window (0 = no batching) it reports:
+  - provider requests per second and segments per request
+  - segment latency percentiles (submit to transcription)
+  - latency added compared with no batching
+
+Usage: python benchmarks/bench_batching.py [--meetings 40] [--seconds 30]
+       [--windows 0,50,100,200,500] [--request-ms 400] [--output batching.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.transcription_batcher import TranscriptionBatcher  # noqa: E402
+
+
+class FakeGemini:
+    def __init__(self, request_latency: float, per_audio_second: float, concurrency: int):
+        self.request_latency = request_latency
+        self.per_audio_second = per_audio_second
+        self.slots = asyncio.Semaphore(concurrency)
+        self.requests = 0
+
+    async def _call(self, audio_seconds: float):
+        async with self.slots:
+            self.requests += 1
+            await asyncio.sleep(self.request_latency + self.per_audio_second * audio_seconds)
+
+    async def generate(self, content) -> str:
+        labels = [part["text"][len("Label: "):] for part in content if part.get("text", "").startswith("Label: ")]
+        await self._call(sum(part["inline_data"]["data"] for part in content if "inline_data" in part))
+        return json.dumps({label: f"transcription of {label}" for label in labels})
+
+    async def transcribe_one(self, seconds: float, mime_type: str) -> str:
+        await self._call(seconds)
+        return "transcription"
+
+
+def percentiles(values) -> dict:
+    samples = np.array(values) * 1000
+    return {"p50": round(float(np.percentile(samples, 50)), 1), "p95": round(float(np.percentile(samples, 95)), 1),
+            "p99": round(float(np.percentile(samples, 99)), 1)}
+
+
+async def run(args, window_ms: float) -> dict:
+    provider = FakeGemini(args.request_ms / 1000, args.ms_per_audio_second / 1000, args.concurrency)
+    batcher = TranscriptionBatcher(provider.generate, provider.transcribe_one, window_seconds=window_ms / 1000,
+                                   max_segments=args.max_segments)
+    latencies = []
+    rng = random.Random(0)
+
+    async def transcribe(seconds: float):
+        started = time.perf_counter()
+        # The payload stands in for the audio; the fake model only needs its length
+        if window_ms > 0:
+            await batcher.transcribe(seconds, "audio/wav", seconds)
+        else:
+            await provider.transcribe_one(seconds, "audio/wav")
+        latencies.append(time.perf_counter() - started)
+
+    async def meeting():
+        await asyncio.sleep(rng.uniform(0, args.segment_seconds))
+        tasks = []
+        for _ in range(int(args.seconds / args.segment_seconds)):
+            tasks.append(asyncio.create_task(transcribe(args.segment_seconds)))
+            await asyncio.sleep(args.segment_seconds)
+        await asyncio.gather(*tasks)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(meeting() for _ in range(args.meetings)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests_per_second": round(provider.requests / elapsed, 2),
+        "segments_per_request": round(len(latencies) / provider.requests, 2),
+        "latency_ms": percentiles(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--meetings", type=int, default=40)
+    parser.add_argument("--seconds", type=float, default=30.0, help="Audio per meeting")
+    parser.add_argument("--segment-seconds", type=float, default=5.0)
+    parser.add_argument("--windows", default="0,50,100,200,500", help="Batch windows to try, in ms")
+    parser.add_argument("--max-segments", type=int, default=8)
+    parser.add_argument("--request-ms", type=float, default=400.0, help="Fixed cost of a Gemini request")
+    parser.add_argument("--ms-per-audio-second", type=float, default=30.0)
+    parser.add_argument("--concurrency", type=int, default=4, help="Transcription threads")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for window_ms in (float(w) for w in args.windows.split(",")):
+        results[f"{window_ms:g}"] = asyncio.run(run(args, window_ms))
+
+    baseline = results[next(iter(results))]["latency_ms"]
+    print(f"{args.meetings} meetings, a {args.segment_seconds:g}s segment each every {args.segment_seconds:g}s, "
+          f"{args.request_ms:g}ms per request, {args.concurrency} threads")
+    print(f"{'window ms':>9} {'req/s':>7} {'seg/req':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'added p50':>10}")
+    for window, row in results.items():
+        latency = row["latency_ms"]
+        print(f"{window:>9} {row['requests_per_second']:>7} {row['segments_per_request']:>8} {latency['p50']:>8} "
+              f"{latency['p95']:>8} {latency['p99']:>8} {latency['p50'] - baseline['p50']:>10.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "windows": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
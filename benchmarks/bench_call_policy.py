@@ -0,0 +1,149 @@
+"""Measure what deadlines, hedging and circuit breaking do to model-call latency.
+
+Drives app.call_policy against an in-process fake provider whose latency is
+lognormal around `--latency-ms`, with `--slow-rate` of requests stalling for
+`--slow-ms` extra. Calls arrive at `--rate` per second, as many overlap as
+the provider allows. Reports, for no policy, deadline + retries only, and
+the full policy with hedging:
+  - p50/p95/p99/max call latency and failed calls
+  - provider requests per call (retries and hedges)
+
+A second run makes the provider fail every request for `--outage-seconds`
+and compares how long failing calls take with and without the breaker.
+
+Usage: python benchmarks/bench_call_policy.py [--calls 2000] [--latency-ms 50]
+       [--slow-rate 0.03] [--slow-ms 2000] [--output call_policy.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.call_policy import CallPolicy  # noqa: E402
+
+
+class ProviderError(Exception):
+    status_code = 503
+
+
+class FakeProvider:
+    def __init__(self, latency: float, slow_rate: float, slow_latency: float, seed: int = 0):
+        self.latency = latency
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.random = random.Random(seed)
+        self.failing = False
+        self.requests = 0
+
+    async def request(self, timeout: float = None):
+        self.requests += 1
+        if self.failing:
+            await asyncio.sleep(self.latency)
+            raise ProviderError("Injected outage")
+        delay = self.latency * self.random.lognormvariate(0, 0.3)
+        if self.random.random() < self.slow_rate:
+            delay += self.slow_latency
+        await asyncio.sleep(delay)
+        return "ok"
+
+
+def percentiles(values) -> dict:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    samples = np.array(values) * 1000
+    return {"p50": round(float(np.percentile(samples, 50)), 1), "p95": round(float(np.percentile(samples, 95)), 1),
+            "p99": round(float(np.percentile(samples, 99)), 1), "max": round(float(samples.max()), 1)}
+
+
+async def run_calls(provider: FakeProvider, policy, calls: int, rate: float) -> dict:
+    latencies, failures = [], 0
+
+    async def one():
+        nonlocal failures
+        started = time.perf_counter()
+        try:
+            if policy is None:
+                await provider.request()
+            else:
+                await policy.call(provider.request)
+        except Exception:
+            failures += 1
+        latencies.append(time.perf_counter() - started)
+
+    tasks = []
+    for _ in range(calls):
+        tasks.append(asyncio.create_task(one()))
+        await asyncio.sleep(1 / rate)
+    await asyncio.gather(*tasks)
+    return {"latency_ms": percentiles(latencies), "failed": failures,
+            "requests_per_call": round(provider.requests / calls, 3)}
+
+
+async def run_outage(args, breaker_failures: int) -> dict:
+    """Calls made while the provider is down: how long does each take to fail?"""
+    provider = FakeProvider(args.latency_ms / 1000, 0.0, 0.0)
+    policy = CallPolicy("fake", deadline_seconds=args.deadline_ms / 1000, backoff_seconds=0.05,
+                        breaker_failures=breaker_failures, breaker_open_seconds=args.outage_seconds)
+    await run_calls(provider, policy, 100, args.rate)  # healthy warm-up
+    provider.failing = True
+    provider.requests = 0
+    calls = int(args.outage_seconds * args.rate)
+    return await run_calls(provider, policy, calls, args.rate)
+
+
+async def run(args) -> dict:
+    results = {}
+    scenarios = (
+        ("no_policy", None),
+        ("deadline_retries", dict(hedge_quantile=0)),
+        ("hedged", dict(hedge_quantile=0.95)),
+    )
+    for name, options in scenarios:
+        provider = FakeProvider(args.latency_ms / 1000, args.slow_rate, args.slow_ms / 1000)
+        policy = None
+        if options is not None:
+            policy = CallPolicy("fake", deadline_seconds=args.deadline_ms / 1000, min_hedge_seconds=0.0,
+                                backoff_seconds=0.05, **options)
+        results[name] = await run_calls(provider, policy, args.calls, args.rate)
+        if policy is not None:
+            results[name]["hedges"] = policy.hedges
+            results[name]["hedge_wins"] = policy.hedge_wins
+    results["outage_without_breaker"] = await run_outage(args, breaker_failures=0)
+    results["outage_with_breaker"] = await run_outage(args, breaker_failures=5)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=200.0, help="Calls started per second")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Typical provider latency")
+    parser.add_argument("--slow-rate", type=float, default=0.03, help="Fraction of requests that stall")
+    parser.add_argument("--slow-ms", type=float, default=2000.0, help="Extra latency of a stalled request")
+    parser.add_argument("--deadline-ms", type=float, default=1500.0, help="Per-call deadline")
+    parser.add_argument("--outage-seconds", type=float, default=3.0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    print(f"{args.calls} calls, {args.latency_ms:g}ms typical, {args.slow_rate:.0%} stalled by {args.slow_ms:g}ms")
+    print(f"{'scenario':<24} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7} {'failed':>7} {'req/call':>9}")
+    for name, row in results.items():
+        latency = row["latency_ms"]
+        print(f"{name:<24} {latency['p50']:>7} {latency['p95']:>7} {latency['p99']:>7} {latency['max']:>7} "
+              f"{row['failed']:>7} {row['requests_per_call']:>9.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Compare WAV, FLAC and Ogg/Opus for websocket frames and model payloads.
+
+For each container, encodes synthetic meeting audio (talk spurts and pauses)
+cut into client frames (`--frame-seconds`, what a client sends per websocket
+message) and model windows (`--window-seconds`, what the server sends to
+Gemini), and reports:
+  - bytes per audio second on the wire (frame header included for frames)
+  - encode and decode CPU time per audio second
+  - for Opus, the SNR of the decoded audio against the original (lossy)
+
+Usage: python benchmarks/bench_codecs.py [--seconds 60] [--frame-seconds 1]
+       [--window-seconds 10] [--output codecs.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.audio_codecs import decode_audio, encode_audio  # noqa: E402
+from app.audio_protocol import (CODEC_FLAC, CODEC_OGG_OPUS, CODEC_PCM_S16LE, WAV_HEADER,  # noqa: E402
+                                parse_frame, pack_frame)
+from load_test import synthetic_meeting_audio  # noqa: E402
+
+SAMPLE_RATE = 16000
+CHANNELS = 1
+CODECS = (("wav", CODEC_PCM_S16LE), ("flac", CODEC_FLAC), ("opus", CODEC_OGG_OPUS))
+
+
+def decode(payload, codec: int) -> np.ndarray:
+    if codec == CODEC_PCM_S16LE:
+        return np.frombuffer(payload, dtype=np.int16)
+    pcm, _, _ = decode_audio(payload)
+    return np.frombuffer(pcm, dtype=np.int16)
+
+
+def snr_db(reference: np.ndarray, decoded: np.ndarray) -> float:
+    length = min(len(reference), len(decoded))
+    reference = reference[:length].astype(np.float64)
+    noise = reference - decoded[:length].astype(np.float64)
+    return round(float(10 * np.log10(np.sum(reference ** 2) / max(np.sum(noise ** 2), 1e-9))), 1)
+
+
+def measure(pcm: np.ndarray, chunk_seconds: float, codec: int, framed: bool) -> dict:
+    chunk = int(chunk_seconds * SAMPLE_RATE) * CHANNELS
+    chunks = [pcm[i:i + chunk] for i in range(0, len(pcm) - chunk + 1, chunk)]
+    audio_seconds = len(chunks) * chunk_seconds
+
+    start = time.process_time()
+    if framed:
+        # Websocket frames: raw PCM for codec 0, a complete file for the others
+        payloads = [pack_frame(c.tobytes() if codec == CODEC_PCM_S16LE
+                               else encode_audio(c.tobytes(), SAMPLE_RATE, CHANNELS, codec),
+                               seq, SAMPLE_RATE, 0, CHANNELS, codec)
+                    for seq, c in enumerate(chunks)]
+    else:
+        payloads = [encode_audio(c.tobytes(), SAMPLE_RATE, CHANNELS, codec) for c in chunks]
+    encode_cpu = time.process_time() - start
+
+    start = time.process_time()
+    if framed:
+        decoded = [decode(parse_frame(p).payload, codec) for p in payloads]
+    else:
+        decoded = [decode(p[WAV_HEADER.size:] if codec == CODEC_PCM_S16LE else p, codec) for p in payloads]
+    decode_cpu = time.process_time() - start
+
+    result = {
+        "bytes_per_second": round(sum(len(p) for p in payloads) / audio_seconds),
+        "encode_ms_per_second": round(encode_cpu * 1000 / audio_seconds, 3),
+        "decode_ms_per_second": round(decode_cpu * 1000 / audio_seconds, 3),
+    }
+    if codec == CODEC_OGG_OPUS:
+        result["snr_db"] = snr_db(np.concatenate(chunks), np.concatenate(decoded))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=60.0, help="Seconds of synthetic meeting audio")
+    parser.add_argument("--frame-seconds", type=float, default=1.0, help="Audio per websocket frame")
+    parser.add_argument("--window-seconds", type=float, default=10.0, help="Audio per model request")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    pcm = synthetic_meeting_audio(args.seconds, seed=0)
+    results = {"frames": {}, "windows": {}}
+    for name, codec in CODECS:
+        results["frames"][name] = measure(pcm, args.frame_seconds, codec, framed=True)
+        results["windows"][name] = measure(pcm, args.window_seconds, codec, framed=False)
+
+    print(f"{args.seconds:g}s of meeting audio @ {SAMPLE_RATE} Hz mono int16")
+    for kind, chunk_seconds in (("frames", args.frame_seconds), ("windows", args.window_seconds)):
+        print(f"\n{kind} of {chunk_seconds:g}s")
+        print(f"{'codec':<6} {'bytes/s':>9} {'ratio':>7} {'encode ms/s':>12} {'decode ms/s':>12} {'snr':>7}")
+        baseline = results[kind]["wav"]["bytes_per_second"]
+        for name, row in results[kind].items():
+            snr = f"{row['snr_db']:.1f}dB" if "snr_db" in row else "exact"
+            print(f"{name:<6} {row['bytes_per_second']:>9} {row['bytes_per_second'] / baseline:>7.2f} "
+                  f"{row['encode_ms_per_second']:>12.3f} {row['decode_ms_per_second']:>12.3f} {snr:>7}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"seconds": args.seconds, "frame_seconds": args.frame_seconds,
+                       "window_seconds": args.window_seconds, **results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
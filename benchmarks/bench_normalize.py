@@ -0,0 +1,100 @@
+"""Measure WAV normalization to 16 kHz mono int16 for common recorder formats.
+
+Writes synthetic meeting audio as WAV files in several rates, channel
+layouts and sample formats, then runs each file through the upload
+segmenter (which normalizes while reading) and reports:
+  - model payload bytes per audio second before and after normalization
+  - CPU time per audio second
+  - peak Python heap during the run (tracemalloc), which stays bounded by
+    one segment however long the file is
+
+Usage: python benchmarks/bench_normalize.py [--seconds 300] [--output normalize.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.audio_protocol import wav_header  # noqa: E402
+from app.audio_segmenter import iter_wav_segments  # noqa: E402
+from load_test import synthetic_meeting_audio  # noqa: E402
+
+# (name, sample rate, channels, bytes per sample)
+FORMATS = (
+    ("16k-mono-16bit", 16000, 1, 2),
+    ("44.1k-stereo-16bit", 44100, 2, 2),
+    ("48k-stereo-24bit", 48000, 2, 3),
+    ("48k-stereo-16bit", 48000, 2, 2),
+)
+
+
+def write_wav(path: str, seconds: float, sample_rate: int, channels: int, sample_width: int):
+    """Write the file in one-minute pieces so the benchmark itself stays small in memory"""
+    total = int(seconds * sample_rate)
+    piece = 60 * sample_rate
+    with open(path, "wb") as f:
+        f.write(wav_header(total * channels * sample_width, sample_rate, channels, sample_width))
+        for start in range(0, total, piece):
+            frames = min(piece, total - start)
+            mono = synthetic_meeting_audio(frames / sample_rate, seed=start, sample_rate=sample_rate)
+            samples = np.repeat(mono[:, None].astype(np.int32), channels, axis=1).reshape(-1)
+            if sample_width == 2:
+                f.write(samples.astype("<i2").tobytes())
+            else:
+                widened = (samples << 8).astype("<i4").view(np.uint8).reshape(-1, 4)
+                f.write(widened[:, 1:].tobytes())
+
+
+def measure(path: str) -> dict:
+    tracemalloc.start()
+    start = time.process_time()
+    audio_seconds = 0.0
+    output_bytes = 0
+    for window in iter_wav_segments(path, 30.0):
+        audio_seconds = window.end_time
+        output_bytes += window.pcm.nbytes
+    cpu = time.process_time() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "input_bytes_per_second": round((os.path.getsize(path) - 44) / audio_seconds),
+        "output_bytes_per_second": round(output_bytes / audio_seconds),
+        "cpu_ms_per_second": round(cpu * 1000 / audio_seconds, 3),
+        "peak_heap_mb": round(peak / 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=300.0, help="Length of each test file")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, sample_rate, channels, sample_width in FORMATS:
+            path = os.path.join(directory, f"{name}.wav")
+            write_wav(path, args.seconds, sample_rate, channels, sample_width)
+            results[name] = measure(path)
+            os.unlink(path)
+
+    print(f"{args.seconds:g}s files, segmented into 30s windows of 16 kHz mono int16")
+    print(f"{'format':<20} {'in bytes/s':>11} {'out bytes/s':>12} {'ratio':>6} {'cpu ms/s':>9} {'peak MB':>8}")
+    for name, row in results.items():
+        ratio = row["input_bytes_per_second"] / row["output_bytes_per_second"]
+        print(f"{name:<20} {row['input_bytes_per_second']:>11} {row['output_bytes_per_second']:>12} "
+              f"{ratio:>6.1f} {row['cpu_ms_per_second']:>9.3f} {row['peak_heap_mb']:>8.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"seconds": args.seconds, "formats": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Compare the memory-mapped vector index with Chroma on the Data/ corpus.
+
+Builds a throwaway Chroma collection from Data/*.txt (using the indexer's
+chunking), exports it to a memory-mapped index, then runs the same queries
+against both. Recall@k is measured against exact brute-force search; latency
+is reported as p50/p99 for retrieval only (pre-embedded queries) and
+end to end (text in, with the query-embedding cache warm).
+
+Requires chromadb and sentence-transformers.
+
+Usage: python benchmarks/bench_retrieval.py [--chunk-tokens 40] [--k 3] [--repeat 200]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.knowledge_indexer import chunk_document, document_metadata  # noqa: E402
+from app.vector_index import ChromaRetriever, MmapVectorIndex, QueryEmbeddingCache  # noqa: E402
+
+QUERIES = [
+    "We need a chatbot that can answer customer questions in several languages",
+    "Our call center wants to transcribe and analyze phone calls",
+    "Can you help us host our application in the cloud with auto scaling?",
+    "We are not sure where AI fits in our business, we need advice",
+    "We want to generate marketing copy and product descriptions automatically",
+    "Integrate a bot with our CRM to automate routine tasks",
+    "How much does a voice assistant cost?",
+    "We handle orders and payments online and want to automate it",
+]
+
+
+def percentile(samples, q):
+    return float(np.percentile(np.asarray(samples) * 1000, q))
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", default=os.path.join(os.path.dirname(__file__), "..", "Data"))
+    parser.add_argument("--chunk-tokens", type=int, default=40, help="Smaller chunks give a larger index")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    import chromadb
+    from chromadb.utils import embedding_functions
+
+    embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
+    workdir = tempfile.mkdtemp(prefix="bench_retrieval_")
+    client = chromadb.PersistentClient(path=workdir)
+    collection = client.create_collection(name="bench", embedding_function=embedding_function)
+
+    ids, documents, metadatas = [], [], []
+    for filename in sorted(os.listdir(args.data_dir)):
+        if not filename.endswith(".txt"):
+            continue
+        with open(os.path.join(args.data_dir, filename), encoding="utf-8") as f:
+            text = f.read()
+        metadata = document_metadata(filename, text)
+        for i, chunk in enumerate(chunk_document(text, args.chunk_tokens)):
+            ids.append(f"{filename}:{i}")
+            documents.append(chunk)
+            metadatas.append(metadata)
+    for start in range(0, len(ids), 64):
+        collection.add(ids=ids[start:start + 64], documents=documents[start:start + 64],
+                       metadatas=metadatas[start:start + 64])
+
+    queries = QUERIES + [doc.split(".")[0] for doc in documents[::max(1, len(documents) // 40)]]
+    cache = QueryEmbeddingCache(embedding_function)
+    index = MmapVectorIndex(os.path.join(workdir, "index"), cache).build_from_collection(collection)
+    chroma = ChromaRetriever(collection, cache)
+    query_vectors = cache.embed(queries)
+
+    # Ground truth: exact search over every stored vector
+    exact = np.argsort(-(query_vectors @ np.asarray(index.vectors).T), axis=1)[:, :args.k]
+    exact_ids = [{index.ids[i] for i in row} for row in exact]
+
+    def recall(results):
+        hits = sum(len(set(row) & truth) for row, truth in zip(results["ids"], exact_ids))
+        return hits / sum(len(truth) for truth in exact_ids)
+
+    chroma_recall = recall(chroma.query(queries, args.k))
+    mmap_recall = recall(index.query(queries, args.k))
+
+    single = query_vectors[:1]
+    chroma_search = timed(lambda: collection.query(query_embeddings=single.tolist(), n_results=args.k), args.repeat)
+    mmap_search = timed(lambda: index.search(single, args.k), args.repeat)
+    chroma_e2e = timed(lambda: chroma.query(queries[:1], args.k), args.repeat)
+    mmap_e2e = timed(lambda: index.query(queries[:1], args.k), args.repeat)
+
+    print(f"corpus: {len(ids)} chunks, {len(queries)} queries, k={args.k}")
+    print(f"{'backend':<8} {'recall@k':>9} {'search p50':>11} {'search p99':>11} {'e2e p50':>9} {'e2e p99':>9}")
+    for name, rec, search, e2e in [("chroma", chroma_recall, chroma_search, chroma_e2e),
+                                   ("mmap", mmap_recall, mmap_search, mmap_e2e)]:
+        print(f"{name:<8} {rec:>9.3f} {percentile(search, 50):>9.3f}ms {percentile(search, 99):>9.3f}ms "
+              f"{percentile(e2e, 50):>7.3f}ms {percentile(e2e, 99):>7.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Measure cold-import time and time-to-first-transcription of the server.
+
+1. Cold import: imports app.main in fresh interpreters and reports the median.
+   `--importtime` also lists the slowest modules (python -X importtime).
+2. Startup: launches uvicorn in a subprocess and records, from process start,
+   when /health answers (liveness), when /ready turns 200 (warm-up done), and
+   when the first /transcribe request returns.
+
+The transcription uses whatever Gemini backend the environment configures.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--port 8765] [--output startup.json]
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import wave
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def cold_import_seconds() -> float:
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(limit: int = 15):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, module = line.split("|")
+        rows.append((int(cumulative_us), module.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def sample_wav(seconds: float = 3.0, sample_rate: int = 16000) -> bytes:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    pcm = (np.sin(2 * np.pi * 220 * t) * 8000).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def startup_timeline(port: int, timeout: float) -> dict:
+    import httpx
+
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT
+    )
+    timeline = {}
+    try:
+        with httpx.Client(timeout=timeout) as client:
+            while "live_seconds" not in timeline or "ready_seconds" not in timeline:
+                if time.perf_counter() - started > timeout:
+                    raise TimeoutError("Server did not become ready in time")
+                try:
+                    if "live_seconds" not in timeline and client.get(f"{base}/health").status_code == 200:
+                        timeline["live_seconds"] = time.perf_counter() - started
+                    if "live_seconds" in timeline and client.get(f"{base}/ready").status_code == 200:
+                        timeline["ready_seconds"] = time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.02)
+
+            response = client.post(f"{base}/transcribe", params={"meeting_id": "bench"},
+                                   files={"file": ("bench.wav", sample_wav(), "audio/wav")})
+            timeline["first_transcription_seconds"] = time.perf_counter() - started
+            timeline["first_transcription_status"] = response.status_code
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    return {key: round(value, 3) if isinstance(value, float) else value for key, value in timeline.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--importtime", action="store_true", help="List the slowest imports")
+    parser.add_argument("--skip-server", action="store_true", help="Only measure cold import")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    imports = [cold_import_seconds() for _ in range(args.runs)]
+    results = {"cold_import_seconds": {"median": round(statistics.median(imports), 3),
+                                       "min": round(min(imports), 3), "max": round(max(imports), 3)}}
+    print(f"cold import of app.main: median {results['cold_import_seconds']['median']}s over {args.runs} runs")
+
+    if args.importtime:
+        for cumulative_us, module in slowest_imports():
+            print(f"  {cumulative_us / 1000:9.1f} ms  {module}")
+
+    if not args.skip_server:
+        results["startup"] = startup_timeline(args.port, args.timeout)
+        for key, value in results["startup"].items():
+            print(f"{key}: {value}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Compare the JSON/base64 and binary-frame websocket audio paths.
+
+Reports bytes on the wire and server-side CPU time per chunk for:
+  - legacy:  JSON + base64, temp WAV file written and read back
+  - json:    JSON + base64, WAV built in memory (current fallback path)
+  - binary:  fixed header + raw PCM, WAV built in memory
+
+Usage: python benchmarks/bench_ws_protocol.py [--seconds 5] [--iterations 500]
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.audio_protocol import pack_frame, parse_frame, build_wav  # noqa: E402
+
+SAMPLE_RATE = 16000
+CHANNELS = 1
+
+
+def legacy_server(message: str) -> bytes:
+    data = json.loads(message)
+    audio_data = base64.b64decode(data["audio_data"])
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
+        with wave.open(temp_file, "wb") as wav_file:
+            wav_file.setnchannels(CHANNELS)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(SAMPLE_RATE)
+            wav_file.writeframes(audio_data)
+        temp_file_path = temp_file.name
+    with open(temp_file_path, "rb") as f:
+        wav_data = f.read()
+    os.unlink(temp_file_path)
+    return wav_data
+
+
+def json_server(message: str) -> bytes:
+    data = json.loads(message)
+    audio_data = base64.b64decode(data["audio_data"])
+    return build_wav(audio_data, SAMPLE_RATE, CHANNELS)
+
+
+def binary_server(message: bytes) -> bytes:
+    frame = parse_frame(message)
+    return build_wav(frame.payload, frame.sample_rate, frame.channels)
+
+
+def measure(fn, message, iterations: int) -> float:
+    start = time.process_time()
+    for _ in range(iterations):
+        fn(message)
+    return (time.process_time() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0, help="Audio seconds per chunk")
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    pcm = (rng.standard_normal(int(SAMPLE_RATE * args.seconds)) * 3000).astype(np.int16).tobytes()
+
+    json_message = json.dumps({"audio_data": base64.b64encode(pcm).decode()})
+    binary_message = pack_frame(pcm, seq=1, sample_rate=SAMPLE_RATE, timestamp_ms=0)
+
+    assert legacy_server(json_message) == json_server(json_message) == binary_server(binary_message)
+
+    rows = [
+        ("legacy", legacy_server, json_message, len(json_message.encode())),
+        ("json", json_server, json_message, len(json_message.encode())),
+        ("binary", binary_server, binary_message, len(binary_message)),
+    ]
+
+    print(f"chunk: {args.seconds:g}s @ {SAMPLE_RATE} Hz mono int16 ({len(pcm)} PCM bytes)")
+    print(f"{'path':<8} {'wire bytes':>12} {'overhead':>9} {'cpu/chunk':>12}")
+    for name, fn, message, wire_bytes in rows:
+        cpu = measure(fn, message, args.iterations)
+        overhead = wire_bytes / len(pcm) - 1
+        print(f"{name:<8} {wire_bytes:>12} {overhead:>8.1%} {cpu * 1e6:>10.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Drive the Zoom outbox against the local stand-in Zoom server.
+
+Simulates many meetings producing transcriptions every few seconds and
+reports how many chat requests were needed, 429s hit, and delivery lag.
+
+Usage: python benchmarks/bench_zoom_outbox.py [--meetings 30] [--chunks 10] [--interval 0.5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+import uvicorn
+
+PORT = 9011
+os.environ.setdefault("ZOOM_OAUTH_URL", f"http://127.0.0.1:{PORT}/oauth/token")
+os.environ.setdefault("ZOOM_API_BASE_URL", f"http://127.0.0.1:{PORT}/v2")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.zoom_integration import ZoomClient  # noqa: E402
+from app.zoom_outbox import ZoomOutbox  # noqa: E402
+from fake_zoom import create_app  # noqa: E402
+
+
+async def run(args):
+    fake = create_app(latency=args.latency_ms / 1000, rate_limit=args.rate_limit)
+    server = uvicorn.Server(uvicorn.Config(fake, host="127.0.0.1", port=PORT, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    client = ZoomClient()
+    outbox = ZoomOutbox(client, window_seconds=args.window, rate=args.rate, burst=args.rate * 2)
+    await outbox.start()
+
+    async def meeting(i):
+        for n in range(args.chunks):
+            outbox.enqueue(f"meeting-{i}", "Meeting Recommendations", f"meeting {i} chunk {n}: lorem ipsum " * 4)
+            await asyncio.sleep(args.interval)
+
+    await asyncio.gather(*(meeting(i) for i in range(args.meetings)))
+    await outbox.stop(timeout=60)
+    await client.aclose()
+
+    print(json.dumps({"outbox": outbox.stats(), "zoom": {
+        "requests": fake.state.zoom["requests"],
+        "messages": len(fake.state.zoom["messages"]),
+        "rate_limited": fake.state.zoom["rate_limited"],
+    }}, indent=2))
+
+    server.should_exit = True
+    await server_task
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--meetings", type=int, default=30)
+    parser.add_argument("--chunks", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=0.5, help="Seconds between transcriptions per meeting")
+    parser.add_argument("--window", type=float, default=3.0, help="Outbox coalescing window")
+    parser.add_argument("--rate", type=float, default=5.0, help="Outbox token bucket rate")
+    parser.add_argument("--rate-limit", type=float, default=10.0, help="Fake Zoom requests/second limit")
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
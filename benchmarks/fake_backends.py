@@ -0,0 +1,164 @@
+"""Local stand-ins for every external service the server calls.
+
+Serves, on one port:
+  - Gemini generateContent (REST), answering after a fixed latency plus a
+    per-audio-second cost, so longer windows take longer like the real model
+    (micro-batched requests get a JSON object of labelled transcriptions)
+  - Groq chat completions (OpenAI-compatible)
+  - the Zoom OAuth and chat APIs (from fake_zoom.py)
+
+Point the server at it with:
+
+    GEMINI_API_ENDPOINT=http://127.0.0.1:9002
+    GROQ_BASE_URL=http://127.0.0.1:9002
+    ZOOM_OAUTH_URL=http://127.0.0.1:9002/oauth/token
+    ZOOM_API_BASE_URL=http://127.0.0.1:9002/v2
+
+A fraction of Gemini and Groq requests (`--slow-rate`) can be made to stall
+for `--slow-ms` extra, to exercise deadlines and hedged requests.
+
+Usage: python benchmarks/fake_backends.py [--port 9002] [--gemini-latency-ms 400]
+       [--gemini-ms-per-audio-second 30] [--groq-latency-ms 300] [--zoom-latency-ms 50]
+       [--error-rate 0] [--slow-rate 0] [--slow-ms 5000]
+"""
+import argparse
+import asyncio
+import base64
+import io
+import json
+import os
+import random
+import sys
+import time
+import uuid
+import wave
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+try:
+    import soundfile
+except ImportError:  # WAV payloads are still measured
+    soundfile = None
+
+sys.path.insert(0, os.path.dirname(__file__))
+from fake_zoom import create_app as create_zoom_app  # noqa: E402
+
+
+def _audio_seconds(data: str) -> float:
+    """Duration of a WAV, FLAC or Ogg payload; 0 if it can't be read"""
+    audio = base64.b64decode(data)
+    if soundfile is not None:
+        try:
+            return soundfile.info(io.BytesIO(audio)).duration
+        except (RuntimeError, ValueError, TypeError):
+            pass
+    try:
+        with wave.open(io.BytesIO(audio), "rb") as wav_file:
+            return wav_file.getnframes() / wav_file.getframerate()
+    except (wave.Error, EOFError, ValueError):
+        return 0.0
+
+
+def create_app(gemini_latency: float = 0.4, gemini_per_audio_second: float = 0.03,
+               groq_latency: float = 0.3, zoom_latency: float = 0.05, error_rate: float = 0.0,
+               slow_rate: float = 0.0, slow_latency: float = 5.0):
+    app = create_zoom_app(zoom_latency, 0.0, error_rate)
+    state = {"gemini_requests": 0, "gemini_audio_seconds": 0.0, "groq_requests": 0,
+             "in_flight": 0, "max_in_flight": 0, "errors": 0, "slow_requests": 0,
+             "gemini_batched_segments": 0}
+    app.state.backends = state
+
+    def injected_error():
+        if error_rate and random.random() < error_rate:
+            state["errors"] += 1
+            return JSONResponse({"error": {"code": 500, "message": "Injected error"}}, status_code=500)
+        return None
+
+    def injected_delay() -> float:
+        if slow_rate and random.random() < slow_rate:
+            state["slow_requests"] += 1
+            return slow_latency
+        return 0.0
+
+    @app.post("/v1beta/models/{model}:generateContent")
+    async def generate_content(model: str, request: Request):
+        body = await request.json()
+        audio_seconds = sum(
+            _audio_seconds(part["inline_data"]["data"] if "inline_data" in part else part["inlineData"]["data"])
+            for content in body.get("contents", [])
+            for part in content.get("parts", [])
+            if "inline_data" in part or "inlineData" in part
+        )
+        state["gemini_requests"] += 1
+        state["gemini_audio_seconds"] += audio_seconds
+        labels = [part["text"][len("Label: "):] for content in body.get("contents", [])
+                  for part in content.get("parts", []) if part.get("text", "").startswith("Label: ")]
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        try:
+            await asyncio.sleep(gemini_latency + gemini_per_audio_second * audio_seconds + injected_delay())
+        finally:
+            state["in_flight"] -= 1
+        error = injected_error()
+        if error:
+            return error
+        text = f"Synthetic transcription of {audio_seconds:.1f} seconds of audio for a cloud hosting chatbot project."
+        if labels:
+            # Micro-batched request: one transcription per labelled audio part, as JSON
+            state["gemini_batched_segments"] += len(labels)
+            text = json.dumps({label: f"Synthetic transcription of segment {label}." for label in labels})
+        return {
+            "candidates": [{"content": {"parts": [{"text": text}], "role": "model"},
+                            "finishReason": "STOP", "index": 0}],
+            "modelVersion": model,
+        }
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        state["groq_requests"] += 1
+        await asyncio.sleep(groq_latency + injected_delay())
+        error = injected_error()
+        if error:
+            return error
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": "Recommend the cloud hosting service."}}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    @app.get("/_backend_stats")
+    async def backend_stats():
+        return {**state, "gemini_audio_seconds": round(state["gemini_audio_seconds"], 3)}
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local stand-ins for Gemini, Groq and Zoom")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9002)
+    parser.add_argument("--gemini-latency-ms", type=float, default=400.0)
+    parser.add_argument("--gemini-ms-per-audio-second", type=float, default=30.0)
+    parser.add_argument("--groq-latency-ms", type=float, default=300.0)
+    parser.add_argument("--zoom-latency-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of model requests that stall")
+    parser.add_argument("--slow-ms", type=float, default=5000.0, help="Extra latency of a stalled request")
+    args = parser.parse_args()
+
+    app = create_app(args.gemini_latency_ms / 1000, args.gemini_ms_per_audio_second / 1000,
+                     args.groq_latency_ms / 1000, args.zoom_latency_ms / 1000, args.error_rate,
+                     args.slow_rate, args.slow_ms / 1000)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Local stand-in for the Zoom OAuth and chat APIs.
+
+Implements just enough of Zoom for app/zoom_integration.py: the OAuth token
+endpoint, listing/creating channels and posting chat messages. Latency,
+a per-second rate limit (answered with 429 + Retry-After) and a random 5xx
+error rate can be injected. Point the app at it with:
+
+    ZOOM_OAUTH_URL=http://127.0.0.1:9001/oauth/token
+    ZOOM_API_BASE_URL=http://127.0.0.1:9001/v2
+
+Usage: python benchmarks/fake_zoom.py [--port 9001] [--latency-ms 50] [--rate-limit 10] [--error-rate 0.01]
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def create_app(latency: float = 0.0, rate_limit: float = 0.0, error_rate: float = 0.0) -> FastAPI:
+    app = FastAPI(title="Fake Zoom")
+    state = {
+        "channels": {},  # id -> name
+        "messages": [],  # (channel id, message, received at)
+        "requests": 0,
+        "token_requests": 0,
+        "rate_limited": 0,
+        "errors": 0,
+        "window_start": time.monotonic(),
+        "window_count": 0,
+    }
+    app.state.zoom = state
+
+    async def simulate(request: Request):
+        """Apply latency, rate limiting and error injection; returns an error response or None"""
+        state["requests"] += 1
+        if latency:
+            await asyncio.sleep(latency)
+        if rate_limit:
+            now = time.monotonic()
+            if now - state["window_start"] >= 1.0:
+                state["window_start"] = now
+                state["window_count"] = 0
+            state["window_count"] += 1
+            if state["window_count"] > rate_limit:
+                state["rate_limited"] += 1
+                retry_after = max(0.0, 1.0 - (now - state["window_start"]))
+                return JSONResponse({"code": 429, "message": "Too many requests"}, status_code=429,
+                                    headers={"Retry-After": f"{retry_after:.3f}"})
+        if error_rate and random.random() < error_rate:
+            state["errors"] += 1
+            return JSONResponse({"code": 500, "message": "Injected error"}, status_code=500)
+        return None
+
+    @app.post("/oauth/token")
+    async def token(request: Request):
+        state["token_requests"] += 1
+        if latency:
+            await asyncio.sleep(latency)
+        return {"access_token": uuid.uuid4().hex, "token_type": "bearer", "expires_in": 3600}
+
+    @app.get("/v2/chat/users/me/channels")
+    async def list_channels(request: Request):
+        error = await simulate(request)
+        if error:
+            return error
+        return {"channels": [{"id": cid, "name": name} for cid, name in state["channels"].items()]}
+
+    @app.post("/v2/chat/users/me/channels", status_code=201)
+    async def create_channel(request: Request):
+        error = await simulate(request)
+        if error:
+            return error
+        body = await request.json()
+        channel_id = uuid.uuid4().hex[:12]
+        state["channels"][channel_id] = body.get("name")
+        return {"id": channel_id, "name": body.get("name")}
+
+    @app.post("/v2/chat/users/me/messages", status_code=201)
+    async def send_message(request: Request):
+        error = await simulate(request)
+        if error:
+            return error
+        body = await request.json()
+        if body.get("to_channel") not in state["channels"]:
+            return JSONResponse({"code": 404, "message": "Channel not found"}, status_code=404)
+        state["messages"].append((body["to_channel"], body["message"], time.time()))
+        return {"id": uuid.uuid4().hex}
+
+    @app.get("/_stats")
+    async def stats():
+        return {
+            "requests": state["requests"],
+            "token_requests": state["token_requests"],
+            "messages": len(state["messages"]),
+            "rate_limited": state["rate_limited"],
+            "errors": state["errors"],
+            "channels": len(state["channels"]),
+        }
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local stand-in Zoom API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Requests per second before 429s (0 = off)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args.latency_ms / 1000, args.rate_limit, args.error_rate),
+                host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""Load test: N concurrent websocket meetings against local Gemini, Groq and Zoom stand-ins.
+
+Boots benchmarks/fake_backends.py and the server (uvicorn app.main:app) as
+subprocesses, waits for /ready, then streams synthetic meeting audio
+(talk spurts and pauses) from N concurrent /ws/transcribe/{meeting_id}
+sessions as binary frames, paced in real time (or faster with --speedup).
+
+Reports transcription throughput, end-to-end chunk latency (from sending the
+frame that completes a window to receiving its transcription), the server's
+per-stage and event-loop-lag histograms from /metrics, and server RSS per
+meeting. Results are written as JSON, tagged with the git revision, so runs
+of different versions can be diffed.
+
+Requires the `websockets` package (installed with uvicorn[standard]); the
+server uses the real Gemini and Groq SDKs pointed at the stand-ins. Memory is
+read from /proc and is only reported on Linux.
+
+Usage: python benchmarks/load_test.py [--meetings 20] [--seconds 60] [--speedup 1]
+       [--gemini-latency-ms 400] [--output load_test.json]
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.audio_protocol import pack_frame  # noqa: E402
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SAMPLE_RATE = 16000
+
+
+def synthetic_meeting_audio(seconds: float, seed: int, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Alternating voiced talk spurts and near-silent pauses, different for every seed"""
+    rng = np.random.default_rng(seed)
+    total = int(seconds * sample_rate)
+    pcm = (rng.normal(0, 8, total)).astype(np.float32)  # room noise, about -72 dBFS
+    position = int(rng.uniform(0, 1.5) * sample_rate)
+    while position < total:
+        length = min(total - position, int(rng.uniform(1.5, 6.0) * sample_rate))
+        t = np.arange(length) / sample_rate
+        pitch = rng.uniform(100, 220)
+        voiced = sum(np.sin(2 * np.pi * pitch * h * t) / h for h in range(1, 6))
+        syllables = 0.5 * (1 + np.sin(2 * np.pi * rng.uniform(3, 5) * t)) ** 2
+        pcm[position:position + length] += (voiced * syllables * rng.uniform(1500, 5000)).astype(np.float32)
+        position += length + int(rng.uniform(0.5, 3.0) * sample_rate)
+    return np.clip(pcm, -32768, 32767).astype(np.int16)
+
+
+def percentiles(samples, scale: float = 1000.0) -> dict:
+    if not samples:
+        return {"count": 0}
+    values = np.asarray(samples) * scale
+    return {"count": len(samples), "p50": round(float(np.percentile(values, 50)), 2),
+            "p95": round(float(np.percentile(values, 95)), 2), "p99": round(float(np.percentile(values, 99)), 2),
+            "max": round(float(values.max()), 2)}
+
+
+def parse_stage_histograms(text: str) -> dict:
+    """stage -> {le bound: cumulative count} from the /metrics exposition"""
+    stages = {}
+    for line in text.splitlines():
+        if not line.startswith("zoomtx_stage_latency_seconds_bucket{"):
+            continue
+        labels, value = line[line.index("{") + 1:].split("} ")
+        fields = dict(part.split("=") for part in labels.split(","))
+        bound = float(fields["le"].strip('"').replace("+Inf", "inf"))
+        stages.setdefault(fields["stage"].strip('"'), {})[bound] = int(value)
+    return stages
+
+
+def histogram_delta(before: dict, after: dict) -> dict:
+    """Percentiles (bucket upper bounds, ms) of the observations made between two scrapes"""
+    summary = {}
+    for stage, buckets in after.items():
+        bounds = sorted(buckets)
+        counts = [buckets[b] - before.get(stage, {}).get(b, 0) for b in bounds]
+        total = counts[-1] if counts else 0
+        if not total:
+            summary[stage] = {"count": 0}
+            continue
+        result = {"count": total}
+        for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            bound = next(b for b, c in zip(bounds, counts) if c >= q * total)
+            result[name] = round(bound * 1000, 2) if math.isfinite(bound) else None
+        summary[stage] = result
+    return summary
+
+
+def rss_mb(pid: int):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run_meeting(url: str, meeting_id: str, pcm: np.ndarray, chunk_ms: int, speedup: float,
+                      drain_seconds: float, stats: dict):
+    import websockets
+
+    frame_samples = SAMPLE_RATE * chunk_ms // 1000
+    sent_at = []
+    last_received = [time.perf_counter()]
+
+    async with websockets.connect(f"{url}/ws/transcribe/{meeting_id}", max_size=None) as ws:
+        async def receive():
+            async for message in ws:
+                now = time.perf_counter()
+                last_received[0] = now
+                data = json.loads(message)
+                if "error" in data:
+                    stats["errors"] += 1
+                    continue
+                if "flow_control" in data:
+                    if data["flow_control"] == "slow_down":
+                        stats["slow_downs"] += 1
+                    continue
+                stats["transcriptions"] += 1
+                if "window_end" in data and sent_at:
+                    # The window became ready when the frame holding its last sample arrived
+                    frame = min(len(sent_at), max(1, math.ceil(data["window_end"] * 1000 / chunk_ms))) - 1
+                    stats["latencies"].append(now - sent_at[frame])
+
+        receiver = asyncio.create_task(receive())
+        started = time.perf_counter()
+        for seq, offset in enumerate(range(0, len(pcm), frame_samples)):
+            delay = started + seq * chunk_ms / 1000 / speedup - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif delay < -0.5:
+                stats["late_frames"] += 1
+            sent_at.append(time.perf_counter())
+            await ws.send(pack_frame(pcm[offset:offset + frame_samples].tobytes(), seq, SAMPLE_RATE, seq * chunk_ms))
+
+        # Wait for the last windows' transcriptions, then hang up
+        last_received[0] = max(last_received[0], time.perf_counter())
+        while time.perf_counter() - last_received[0] < drain_seconds and not receiver.done():
+            await asyncio.sleep(0.1)
+        await ws.close()
+        receiver.cancel()
+
+
+async def sample_memory(pid: int, samples: list, stop: asyncio.Event):
+    while not stop.is_set():
+        value = rss_mb(pid)
+        if value is not None:
+            samples.append(value)
+        try:
+            await asyncio.wait_for(stop.wait(), 0.5)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def drive(args, server_pid: int, base_url: str) -> dict:
+    import httpx
+
+    ws_url = base_url.replace("http://", "ws://")
+    audio = [synthetic_meeting_audio(args.seconds, seed) for seed in range(args.meetings)]
+    stats = {"transcriptions": 0, "errors": 0, "slow_downs": 0, "late_frames": 0, "latencies": []}
+
+    async with httpx.AsyncClient(timeout=30) as client:
+        metrics_before = parse_stage_histograms((await client.get(f"{base_url}/metrics")).text)
+        baseline_rss = rss_mb(server_pid)
+        memory = []
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(sample_memory(server_pid, memory, stop))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            run_meeting(ws_url, f"load-{i}", pcm, args.chunk_ms, args.speedup, args.drain_seconds, stats)
+            for i, pcm in enumerate(audio)
+        ))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await sampler
+
+        metrics_after = parse_stage_histograms((await client.get(f"{base_url}/metrics")).text)
+        backends = (await client.get(f"{args.backend_url}/_backend_stats")).json()
+        zoom = (await client.get(f"{args.backend_url}/_stats")).json()
+        providers = (await client.get(f"{base_url}/providers/stats")).json()
+
+    stages = histogram_delta(metrics_before, metrics_after)
+    peak_rss = max(memory) if memory else None
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "audio_seconds": args.meetings * args.seconds,
+        "audio_seconds_per_wall_second": round(args.meetings * args.seconds / elapsed, 2),
+        "transcriptions": stats["transcriptions"],
+        "transcriptions_per_second": round(stats["transcriptions"] / elapsed, 2),
+        "errors": stats["errors"],
+        "slow_downs": stats["slow_downs"],
+        "late_frames": stats["late_frames"],
+        "chunk_latency_ms": percentiles(stats["latencies"]),
+        "event_loop_lag_ms": stages.pop("event_loop_lag", {"count": 0}),
+        "stages_ms": stages,
+        "memory_mb": {
+            "baseline_rss": round(baseline_rss, 1) if baseline_rss else None,
+            "peak_rss": round(peak_rss, 1) if peak_rss else None,
+            "per_meeting": round((peak_rss - baseline_rss) / args.meetings, 2) if peak_rss and baseline_rss else None,
+        },
+        "backends": backends,
+        "providers": providers,
+        "zoom": zoom,
+    }
+
+
+def wait_for(url: str, timeout: float):
+    import httpx
+
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(url, timeout=2).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise TimeoutError(f"{url} did not answer in {timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--meetings", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=60.0, help="Audio per meeting")
+    parser.add_argument("--chunk-ms", type=int, default=100, help="Audio per websocket frame")
+    parser.add_argument("--speedup", type=float, default=1.0, help="Send audio faster than real time")
+    parser.add_argument("--drain-seconds", type=float, default=5.0, help="Idle time before a session hangs up")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--backend-port", type=int, default=9002)
+    parser.add_argument("--gemini-latency-ms", type=float, default=400.0)
+    parser.add_argument("--gemini-ms-per-audio-second", type=float, default=30.0)
+    parser.add_argument("--groq-latency-ms", type=float, default=300.0)
+    parser.add_argument("--zoom-latency-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of model requests that stall")
+    parser.add_argument("--slow-ms", type=float, default=5000.0, help="Extra latency of a stalled request")
+    parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra environment for the server, e.g. TRANSCRIPTION_CONCURRENCY=16")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for the server to be ready")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+    args.backend_url = f"http://127.0.0.1:{args.backend_port}"
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    backend = subprocess.Popen([
+        sys.executable, os.path.join(ROOT, "benchmarks", "fake_backends.py"), "--port", str(args.backend_port),
+        "--gemini-latency-ms", str(args.gemini_latency_ms),
+        "--gemini-ms-per-audio-second", str(args.gemini_ms_per_audio_second),
+        "--groq-latency-ms", str(args.groq_latency_ms), "--zoom-latency-ms", str(args.zoom_latency_ms),
+        "--error-rate", str(args.error_rate), "--slow-rate", str(args.slow_rate), "--slow-ms", str(args.slow_ms)
+    ], cwd=ROOT)
+    env = {
+        **os.environ,
+        "GEMINI_API_KEY": "load-test", "GEMINI_API_ENDPOINT": args.backend_url,
+        "GROQ_API_KEY": "load-test", "GROQ_BASE_URL": args.backend_url,
+        "ZOOM_CLIENT_ID": "load-test", "ZOOM_CLIENT_SECRET": "load-test", "ZOOM_ACCOUNT_ID": "load-test",
+        "ZOOM_OAUTH_URL": f"{args.backend_url}/oauth/token", "ZOOM_API_BASE_URL": f"{args.backend_url}/v2",
+        # Every run must reach the backends; a persistent cache would hide them
+        "TRANSCRIPTION_CACHE_DB": "",
+    }
+    env.update(item.split("=", 1) for item in args.server_env)
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port),
+                               "--log-level", "warning"], cwd=ROOT, env=env)
+    try:
+        wait_for(f"{args.backend_url}/_backend_stats", args.timeout)
+        wait_for(f"{base_url}/ready", args.timeout)
+        results = asyncio.run(drive(args, server.pid, base_url))
+    finally:
+        server.terminate()
+        backend.terminate()
+        server.wait(timeout=30)
+        backend.wait(timeout=10)
+
+    config = {key: value for key, value in vars(args).items() if key not in ("output", "backend_url")}
+    report = {"revision": git_revision(), "config": config, "results": results}
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import asyncio
+
+import pytest
+
+from app.admission import AdmissionController
+from app.vad import SpeechSegment
+
+RATE = 100  # samples per second; keeps segments small
+
+
+def segment(seconds: float, value: int = 1) -> SpeechSegment:
+    return SpeechSegment(bytes([value, 0]) * int(seconds * RATE), RATE, 1)
+
+
+def controller(**kwargs) -> AdmissionController:
+    options = {"max_in_flight": 1, "meeting_in_flight": 1, "meeting_queue": 2}
+    options.update(kwargs)
+    return AdmissionController(**options)
+
+
+def test_unknown_policy_is_refused():
+    with pytest.raises(ValueError):
+        AdmissionController(policy="fifo")
+
+
+def test_admit_refuses_duplicates_and_meetings_over_the_limit():
+    admission = controller(max_meetings=2)
+    assert admission.admit("a") is None
+    assert admission.admit("a") == "Meeting is already connected"
+    assert admission.admit("b") is None
+    assert "limit of 2 meetings" in admission.admit("c")
+    admission.release("a")
+    assert admission.admit("c") is None
+    assert admission.rejected == 2
+
+
+def test_free_slots_go_round_robin():
+    async def run():
+        admission = controller(max_in_flight=1, meeting_queue=4)
+        admission.admit("a")
+        admission.admit("b")
+        a1 = admission.submit("a", {"seq": 1}, segment(1))
+        a2 = admission.submit("a", {"seq": 2}, segment(1))
+        b1 = admission.submit("b", {"seq": 1}, segment(1))
+        assert a1.granted.done() and not a2.granted.done() and not b1.granted.done()
+
+        admission.finished("a")
+        assert b1.granted.result() is True and not a2.granted.done()
+        admission.finished("b")
+        assert a2.granted.result() is True
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("policy", ["drop_oldest", "reject"])
+def test_full_queue_drops_oldest_waiting_segment(policy):
+    async def run():
+        admission = controller(policy=policy)
+        admission.admit("a")
+        running = admission.submit("a", {"seq": 0}, segment(1))
+        jobs = [admission.submit("a", {"seq": seq}, segment(1)) for seq in (1, 2, 3)]
+
+        assert running.granted.result() is True
+        assert jobs[0].granted.result() is False
+        assert not jobs[1].granted.done() and not jobs[2].granted.done()
+        assert admission.dropped == 1
+        assert admission.meeting_stats("a")["queued"] == 2
+
+    asyncio.run(run())
+
+
+def test_merge_appends_to_newest_queued_segment():
+    async def run():
+        admission = controller(policy="merge")
+        admission.admit("a")
+        admission.submit("a", {"seq": 0}, segment(1))
+        admission.submit("a", {"seq": 1}, segment(1))
+        newest = admission.submit("a", {"seq": 2}, segment(1, value=2))
+
+        assert admission.submit("a", {"seq": 3}, segment(2, value=3)) is None
+        assert newest.seconds == 3
+        assert newest.segment.pcm == segment(1, value=2).pcm + segment(2, value=3).pcm
+        assert newest.tag["seq"] == 3
+        assert admission.merged == 1 and admission.dropped == 0
+
+    asyncio.run(run())
+
+
+def test_merge_keeps_overlapping_window_audio_once():
+    async def run():
+        admission = controller(policy="merge")
+        admission.admit("a")
+        admission.submit("a", {"seq": 0}, segment(1))
+        admission.submit("a", {"seq": 1}, segment(1))
+        newest = admission.submit("a", {"seq": 2, "window_start": 0.0, "window_end": 10.0}, segment(10))
+
+        # The next window starts 1 s before the queued one ends
+        admission.submit("a", {"seq": 3, "window_start": 9.0, "window_end": 19.0}, segment(10, value=3))
+        assert newest.seconds == pytest.approx(19)
+        assert newest.tag["window_end"] == 19.0
+
+    asyncio.run(run())
+
+
+def test_merge_past_max_length_drops_oldest():
+    async def run():
+        admission = controller(policy="merge", merge_max_seconds=5)
+        admission.admit("a")
+        admission.submit("a", {"seq": 0}, segment(1))
+        oldest = admission.submit("a", {"seq": 1}, segment(1))
+        admission.submit("a", {"seq": 2}, segment(4))
+
+        assert admission.submit("a", {"seq": 3}, segment(2)) is not None
+        assert oldest.granted.result() is False
+        assert admission.merged == 0 and admission.dropped == 1
+
+    asyncio.run(run())
+
+
+def test_reject_refuses_new_meetings_while_saturated():
+    async def run():
+        admission = controller(policy="reject")
+        admission.admit("a")
+        admission.submit("a", {"seq": 0}, segment(1))
+        admission.submit("a", {"seq": 1}, segment(1))
+        assert admission.admit("b") == "Server is overloaded"
+
+        admission.finished("a")
+        admission.finished("a")
+        assert admission.admit("b") is None
+
+    asyncio.run(run())
+
+
+def test_full_queue_asks_meeting_to_slow_down_then_resume():
+    async def run():
+        messages = []
+        admission = controller(meeting_queue=2, policy="drop_oldest")
+        admission.admit("a")
+        admission.attach("a", messages.append)
+        for seq in range(3):
+            admission.submit("a", {"seq": seq}, segment(1))
+        assert [m["flow_control"] for m in messages] == ["slow_down"]
+
+        admission.finished("a")
+        assert [m["flow_control"] for m in messages] == ["slow_down", "resume"]
+
+    asyncio.run(run())
+
+
+def test_release_drops_waiting_segments():
+    async def run():
+        admission = controller()
+        admission.admit("a")
+        admission.submit("a", {"seq": 0}, segment(1))
+        waiting = admission.submit("a", {"seq": 1}, segment(1))
+        admission.release("a")
+        assert waiting.granted.result() is False
+        assert admission.meeting_stats("a") is None
+
+    asyncio.run(run())
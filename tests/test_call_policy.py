@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+
+from app.call_policy import (
+    BREAKER_CLOSED,
+    BREAKER_OPEN,
+    AttemptTimeoutError,
+    CallPolicy,
+    CircuitOpenError,
+    DeadlineExceededError,
+    is_transient,
+)
+
+
+class FakeProvider:
+    """Coroutine standing in for a provider request; each call takes the next scripted behaviour.
+
+    A behaviour is a number of seconds to sleep before answering, or an exception to raise.
+    """
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+        self.timeouts = []
+
+    async def __call__(self, timeout: float):
+        self.timeouts.append(timeout)
+        behaviour = self.script[min(self.calls, len(self.script) - 1)]
+        self.calls += 1
+        if isinstance(behaviour, BaseException):
+            raise behaviour
+        await asyncio.sleep(behaviour)
+        return f"reply {self.calls}"
+
+
+def policy(**kwargs) -> CallPolicy:
+    options = {"deadline_seconds": 1.0, "max_attempts": 3, "backoff_seconds": 0.0, "hedge_quantile": 0}
+    options.update(kwargs)
+    return CallPolicy("fake", **options)
+
+
+def test_success_returns_the_reply():
+    calls = policy()
+    provider = FakeProvider(0)
+    assert asyncio.run(calls.call(provider)) == "reply 1"
+    assert calls.stats()["successes"] == 1 and len(calls.latency) == 1
+
+
+def test_each_attempt_gets_a_share_of_the_deadline():
+    calls = policy(deadline_seconds=0.3, max_attempts=3)
+    provider = FakeProvider(10, 0)
+    assert asyncio.run(calls.call(provider)) == "reply 2"
+    assert provider.timeouts[0] == pytest.approx(0.1)
+    assert calls.timeouts == 1 and calls.retries == 1
+
+
+def test_stalled_call_fails_at_its_deadline():
+    calls = policy(deadline_seconds=0.2, max_attempts=1)
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(calls.call(FakeProvider(10)))
+    assert calls.failures == 1
+
+
+def test_every_attempt_timing_out_raises_the_last_timeout():
+    calls = policy(deadline_seconds=0.3, max_attempts=2)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(calls.call(FakeProvider(10)))
+    assert calls.attempts == 2
+
+
+def test_transient_errors_are_retried():
+    calls = policy()
+    provider = FakeProvider(ConnectionError("reset"), 0)
+    assert asyncio.run(calls.call(provider)) == "reply 2"
+    assert calls.retries == 1 and calls.breaker.consecutive_failures == 0
+
+
+def test_other_errors_fail_at_once_without_tripping_the_breaker():
+    calls = policy(breaker_failures=1)
+    provider = FakeProvider(ValueError("bad request body"))
+    with pytest.raises(ValueError):
+        asyncio.run(calls.call(provider))
+    assert provider.calls == 1
+    assert calls.breaker.state == BREAKER_CLOSED
+
+
+def test_is_transient():
+    class StatusError(Exception):
+        def __init__(self, status_code):
+            self.status_code = status_code
+
+    class APIConnectionError(Exception):
+        pass
+
+    assert is_transient(StatusError(503)) and is_transient(StatusError(429))
+    assert not is_transient(StatusError(400))
+    assert is_transient(AttemptTimeoutError()) and is_transient(APIConnectionError())
+    assert not is_transient(KeyError("text")) and not is_transient(CircuitOpenError())
+
+
+def test_slow_attempt_is_hedged_and_first_reply_wins():
+    calls = policy(hedge_quantile=0.95, min_samples=1, min_hedge_seconds=0.05, max_hedge_ratio=1.0)
+    calls.latency.observe(0.01)
+    provider = FakeProvider(0.5, 0)
+    assert asyncio.run(calls.call(provider)) == "reply 2"
+    assert calls.hedges == 1 and calls.hedge_wins == 1 and calls.retries == 0
+
+
+def test_hedging_waits_for_enough_samples():
+    calls = policy(hedge_quantile=0.95, min_samples=20, min_hedge_seconds=0.01, max_hedge_ratio=1.0)
+    assert calls.hedge_delay() is None
+    assert asyncio.run(calls.call(FakeProvider(0.05))) == "reply 1"
+    assert calls.hedges == 0
+
+
+def test_hedges_are_limited_to_max_ratio():
+    calls = policy(hedge_quantile=0.95, min_samples=1, min_hedge_seconds=0.01, max_hedge_ratio=0.5)
+    calls.latency.observe(0.01)
+    calls.calls, calls.hedges = 3, 1
+    assert calls.hedge_delay() == pytest.approx(0.01)
+    calls.hedges = 2
+    assert calls.hedge_delay() is None
+
+
+def test_breaker_opens_after_repeated_failures_then_probes():
+    calls = policy(max_attempts=1, breaker_failures=2, breaker_open_seconds=60)
+    provider = FakeProvider(ConnectionError("down"), ConnectionError("down"), 0)
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await calls.call(provider)
+        assert calls.breaker.state == BREAKER_OPEN
+
+        with pytest.raises(CircuitOpenError):
+            await calls.call(provider)
+        assert provider.calls == 2 and calls.short_circuited == 1
+
+        # Once the open period is over, one probe decides whether the circuit closes
+        calls.breaker.open_seconds = 0
+        assert await calls.call(provider) == "reply 3"
+        assert calls.breaker.state == BREAKER_CLOSED
+
+    asyncio.run(run())
+
+
+def test_failed_probe_reopens_the_breaker():
+    calls = policy(max_attempts=1, breaker_failures=1, breaker_open_seconds=0)
+    provider = FakeProvider(ConnectionError("down"))
+
+    async def run():
+        with pytest.raises(ConnectionError):
+            await calls.call(provider)
+        with pytest.raises(ConnectionError):
+            await calls.call(provider)
+        assert calls.breaker.state == BREAKER_OPEN
+        assert calls.breaker.times_opened == 2
+
+    asyncio.run(run())
@@ -0,0 +1,135 @@
+import json
+
+import pytest
+
+from app.knowledge_indexer import KnowledgeIndexer
+
+MIGRATION = "Cloud Migration\n\nWe move enterprise workloads to the cloud with zero downtime.\n"
+SECURITY = "Security Audit\n\nA full review of your infrastructure, code and access policies.\n"
+
+
+class FakeCollection:
+    """The parts of a Chroma collection the indexer uses, with calls counted"""
+
+    def __init__(self):
+        self.items = {}  # id -> {"document": ..., "metadata": ...}
+        self.upserted = []
+        self.deleted = []
+
+    def get(self, include=None):
+        return {"ids": list(self.items)}
+
+    def upsert(self, ids, documents, metadatas):
+        self.upserted.extend(ids)
+        for chunk_id, document, metadata in zip(ids, documents, metadatas):
+            self.items[chunk_id] = {"document": document, "metadata": metadata}
+
+    def update(self, ids, metadatas):
+        for chunk_id, metadata in zip(ids, metadatas):
+            self.items[chunk_id]["metadata"] = metadata
+
+    def delete(self, ids):
+        self.deleted.extend(ids)
+        for chunk_id in ids:
+            del self.items[chunk_id]
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    path = tmp_path / "Data"
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def indexer(data_dir, tmp_path):
+    return KnowledgeIndexer(FakeCollection(), str(data_dir), str(tmp_path / "manifest.json"))
+
+
+def sources(collection):
+    return sorted(item["metadata"]["source"] for item in collection.items.values())
+
+
+def test_only_new_chunks_are_embedded(data_dir, indexer):
+    (data_dir / "a.txt").write_text(MIGRATION)
+    summary = indexer.index()
+    assert summary["files_indexed"] == 1 and summary["chunks_added"] == 1
+
+    (data_dir / "b.txt").write_text(SECURITY)
+    summary = indexer.index()
+    assert summary["files_unchanged"] == 1 and summary["files_indexed"] == 1
+    assert summary["chunks_added"] == 1 and summary["chunks_kept"] == 1
+    assert len(indexer.collection.upserted) == 2
+
+
+def test_shared_chunk_is_stored_once_and_kept_while_referenced(data_dir, indexer):
+    for name in ("a.txt", "b.txt"):
+        (data_dir / name).write_text(MIGRATION)
+    assert indexer.index()["chunks_added"] == 1
+    assert sources(indexer.collection) == ["a.txt"]
+
+    # The chunk is still in b.txt: it stays, and now takes its metadata from there
+    (data_dir / "a.txt").unlink()
+    summary = indexer.index()
+    assert summary["files_removed"] == 1 and summary["chunks_deleted"] == 0
+    assert sources(indexer.collection) == ["b.txt"]
+    assert len(indexer.collection.upserted) == 1
+
+    (data_dir / "b.txt").write_text(SECURITY)
+    summary = indexer.index()
+    assert summary["chunks_deleted"] == 1 and summary["chunks_added"] == 1
+    assert len(indexer.collection.items) == 1
+
+
+def test_chunk_moving_between_files_is_not_re_embedded(data_dir, indexer):
+    (data_dir / "b.txt").write_text(MIGRATION)
+    indexer.index()
+
+    (data_dir / "a.txt").write_text(MIGRATION)
+    summary = indexer.index()
+    assert summary["chunks_added"] == 0 and summary["chunks_deleted"] == 0
+    assert sources(indexer.collection) == ["a.txt"]
+
+    (data_dir / "a.txt").unlink()
+    indexer.index()
+    assert sources(indexer.collection) == ["b.txt"]
+    assert len(indexer.collection.upserted) == 1
+
+
+def test_unchanged_tree_does_nothing(data_dir, indexer):
+    (data_dir / "a.txt").write_text(MIGRATION)
+    indexer.index()
+    summary = indexer.index()
+    assert summary["files_unchanged"] == 1 and summary["files_indexed"] == 0
+    assert summary["chunks_added"] == summary["chunks_deleted"] == 0
+
+
+def test_old_manifest_is_rechunked_without_re_embedding(data_dir, indexer, tmp_path):
+    for name in ("a.txt", "b.txt"):
+        (data_dir / name).write_text(MIGRATION)
+    indexer.index()
+
+    # Version 1 manifests listed a shared chunk under its first file only
+    manifest_path = tmp_path / "manifest.json"
+    manifest = json.loads(manifest_path.read_text())
+    del manifest["version"]
+    manifest["files"]["b.txt"]["chunk_ids"] = []
+    manifest_path.write_text(json.dumps(manifest))
+
+    summary = indexer.index()
+    assert summary["files_indexed"] == 2 and summary["chunks_added"] == 0
+    assert json.loads(manifest_path.read_text())["files"]["b.txt"]["chunk_ids"]
+
+    (data_dir / "a.txt").unlink()
+    assert indexer.index()["chunks_deleted"] == 0
+    assert len(indexer.collection.items) == 1
+
+
+def test_full_rebuild_re_embeds_everything(data_dir, indexer):
+    (data_dir / "a.txt").write_text(MIGRATION)
+    indexer.index()
+    indexer.collection.items["orphan"] = {"document": "left over", "metadata": {"source": "gone.txt"}}
+
+    summary = indexer.index(full=True)
+    assert summary["chunks_added"] == 1
+    assert sources(indexer.collection) == ["a.txt"]
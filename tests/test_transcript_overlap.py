@@ -0,0 +1,43 @@
+from app.transcript_overlap import trim_overlap
+
+
+def test_drops_words_repeated_from_previous_window():
+    previous = "we should ship the release on friday"
+    assert trim_overlap(previous, "on friday then we test it", 1.0) == "then we test it"
+
+
+def test_ignores_case_and_punctuation():
+    previous = "We should ship the release on Friday."
+    assert trim_overlap(previous, "on friday, then we test it", 1.0) == "then we test it"
+
+
+def test_prefers_longest_repeated_run():
+    previous = "the plan is the plan is fine"
+    assert trim_overlap(previous, "the plan is fine by me", 2.0) == "by me"
+
+
+def test_single_word_echo_is_kept():
+    assert trim_overlap("are we agreed yes", "yes we are", 1.0) == "yes we are"
+
+
+def test_never_trims_to_nothing():
+    assert trim_overlap("see you on friday", "on friday", 1.0) == "on friday"
+
+
+def test_run_longer_than_overlap_is_kept():
+    previous = "one two three four five six"
+    # 1 s at 3 words/s holds at most three words, so a four-word repeat can't be overlap
+    assert trim_overlap(previous, "three four five six seven", 1.0) == "three four five six seven"
+    assert trim_overlap(previous, "three four five six seven", 1.5) == "seven"
+
+
+def test_without_overlap_text_is_unchanged():
+    previous = "we should ship on friday"
+    assert trim_overlap(previous, "on friday then", 0.0) == "on friday then"
+    assert trim_overlap(previous, "on friday then", -0.5) == "on friday then"
+    assert trim_overlap("", "on friday then", 1.0) == "on friday then"
+    assert trim_overlap(previous, "", 1.0) == ""
+
+
+def test_keeps_original_spacing_of_the_rest():
+    assert trim_overlap("ship on friday", "on  friday\nthen  we test", 1.0) == "then  we test"
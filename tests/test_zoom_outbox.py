@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from app.zoom_integration import ZoomAPIError
+from app.zoom_outbox import ZoomOutbox
+
+
+class FakeZoomClient:
+    """Records sent messages; `errors` are raised by the next sends, in order"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.channels = {}
+        self.sent = []
+        self.invalidated = []
+
+    async def get_channel_id(self, channel_name: str):
+        return self.channels.setdefault(channel_name, f"{channel_name}-{len(self.invalidated)}")
+
+    def invalidate_channel(self, channel_name: str):
+        self.invalidated.append(channel_name)
+        self.channels.pop(channel_name, None)
+
+    async def send_message(self, channel_id: str, message: str):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append((channel_id, message))
+
+
+def deliver(client, items, **kwargs):
+    """Enqueue (meeting_id, channel, text) items on a fresh outbox and stop it once they are sent"""
+    async def run():
+        options = {"window_seconds": 0.05, "rate": 1000, "burst": 1000}
+        options.update(kwargs)
+        outbox = ZoomOutbox(client, **options)
+        await outbox.start()
+        for item in items:
+            outbox.enqueue(*item)
+        await asyncio.sleep(options["window_seconds"] * 2)
+        await outbox.stop(timeout=1.0)
+        return outbox
+
+    return asyncio.run(run())
+
+
+def test_enqueue_before_start_is_an_error():
+    with pytest.raises(RuntimeError):
+        ZoomOutbox(FakeZoomClient()).enqueue("m1", "chan", "hello")
+
+
+def test_transcriptions_within_window_are_sent_as_one_message():
+    client = FakeZoomClient()
+    outbox = deliver(client, [("m1", "chan", "first"), ("m1", "chan", "second"), ("m1", "chan", "third")])
+
+    assert len(client.sent) == 1
+    channel_id, message = client.sent[0]
+    assert channel_id == "chan-0"
+    assert message.endswith("Transcription:\nfirst\nsecond\nthird")
+    stats = outbox.stats()
+    assert stats["batches_sent"] == 1 and stats["messages_sent"] == 3 and stats["max_batch_size"] == 3
+    assert stats["queue_depth"] == 0
+
+
+def test_meetings_and_channels_are_batched_separately():
+    client = FakeZoomClient()
+    deliver(client, [("m1", "chan", "a"), ("m2", "chan", "b"), ("m1", "other", "c"), ("m1", "chan", "d")])
+
+    bodies = sorted(message.split("\n", 1)[1] for _, message in client.sent)
+    assert bodies == ["a\nd", "b", "c"]
+
+
+def test_batch_is_closed_at_max_chars():
+    client = FakeZoomClient()
+    outbox = deliver(client, [("m1", "chan", "x" * 6) for _ in range(5)], max_chars=15)
+
+    assert [message.split("\n", 1)[1] for _, message in client.sent] == ["x" * 6 + "\n" + "x" * 6] * 2 + ["x" * 6]
+    assert outbox.messages_sent == 5
+
+
+def test_rate_limited_send_is_retried():
+    client = FakeZoomClient(ZoomAPIError("slow down", 429, retry_after=0.01), ZoomAPIError("unavailable", 503, retry_after=0.01))
+    outbox = deliver(client, [("m1", "chan", "hello")])
+
+    assert len(client.sent) == 1
+    assert outbox.retries == 2 and outbox.failed == 0
+
+
+def test_client_error_is_not_retried():
+    client = FakeZoomClient(ZoomAPIError("forbidden", 403))
+    outbox = deliver(client, [("m1", "chan", "hello"), ("m1", "chan", "there")])
+
+    assert client.sent == []
+    assert outbox.failed == 2 and outbox.retries == 0
+
+
+def test_stale_channel_is_looked_up_again_and_resent_once():
+    client = FakeZoomClient(ZoomAPIError("no such channel", 404))
+    outbox = deliver(client, [("m1", "chan", "hello")])
+
+    assert client.invalidated == ["chan"]
+    assert [channel_id for channel_id, _ in client.sent] == ["chan-1"]
+    assert outbox.failed == 0
+
+    client = FakeZoomClient(ZoomAPIError("no such channel", 404), ZoomAPIError("no such channel", 404))
+    outbox = deliver(client, [("m1", "chan", "hello")])
+    assert client.invalidated == ["chan"] and client.sent == []
+    assert outbox.failed == 1
+
+
+def test_oldest_batch_is_shed_when_too_many_are_pending():
+    async def run():
+        outbox = ZoomOutbox(FakeZoomClient(), max_chars=1, workers=0, max_pending=2)
+        await outbox.start()
+        for text in "abc":
+            outbox.enqueue("m1", "chan", text)
+        assert outbox.dropped == 1
+        assert outbox.stats()["ready_batches"] == 2
+        await outbox.stop(timeout=0.01)
+
+    asyncio.run(run())